@@ -3,3 +3,13 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from api import defaults
+        from api.models import Image, Role
+
+        for model in (Role, Image):
+            post_save.connect(defaults.invalidate, sender=model, dispatch_uid=f"defaults-save-{model.__name__}")
+            post_delete.connect(defaults.invalidate, sender=model, dispatch_uid=f"defaults-delete-{model.__name__}")
@@ -0,0 +1,50 @@
+from rest_framework import authentication, exceptions
+
+from api import tokens
+from api.defaults import ADMIN_ROLE_ID
+
+
+class TokenUser:
+    """The requesting user as described by the token, no database row behind it."""
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, payload):
+        self.id = payload["uid"]
+        self.role_id = payload["role"]
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def is_admin(self):
+        return self.role_id == ADMIN_ROLE_ID
+
+
+class SignedTokenAuthentication(authentication.BaseAuthentication):
+    """
+    Authorization: Bearer <token> as issued by Login. Requests without the
+    header are left unauthenticated, views decide whether that is allowed.
+    """
+
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed("Invalid Authorization header")
+
+        try:
+            payload = tokens.verify(header[1].decode())
+        except (tokens.InvalidToken, UnicodeError) as e:
+            raise exceptions.AuthenticationFailed(str(e))
+
+        return TokenUser(payload), payload
+
+    def authenticate_header(self, request):
+        return self.keyword
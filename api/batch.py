@@ -0,0 +1,174 @@
+import copy
+
+from django.db import transaction
+
+from api import hooks, reference_cache, versions
+from api.importers import RowError, build_object
+from api.models import ParkirnaMesta, SlovenskaMesta, SlovenskeUlice
+
+BATCH_MAX_ITEMS = 5000
+
+_MODELS = {
+    "parkirna-mesta": ParkirnaMesta,
+    "slovenske-ulice": SlovenskeUlice,
+    "slovenska-mesta": SlovenskaMesta,
+}
+
+_TABLES = {
+    "parkirna-mesta": versions.PARKIRNA_MESTA,
+    "slovenske-ulice": versions.SLOVENSKE_ULICE,
+    "slovenska-mesta": versions.SLOVENSKA_MESTA,
+}
+
+# columns copied from a validated object onto the stored one on update
+_UPDATE_FIELDS = {
+    "parkirna-mesta": ["name", "latitude", "longitude", "geohash"],
+    "slovenske-ulice": ["name", "name_normalized"],
+    "slovenska-mesta": ["name"],
+}
+
+
+class BatchError(ValueError):
+    pass
+
+
+# alternative keys accepted by api.importers, stored under the primary key
+# before merging so an item's "name" replaces the stored "ime"
+_ALIASES = {"name": "ime"}
+
+
+def _as_record(obj):
+    record = {"ime": obj.name}
+    if isinstance(obj, ParkirnaMesta):
+        record["latitude"] = obj.latitude
+        record["longitude"] = obj.longitude
+    return record
+
+
+def _canonical(item):
+    record = dict(item)
+    for alias, key in _ALIASES.items():
+        if alias in record and key not in record:
+            record[key] = record.pop(alias)
+    return record
+
+
+def _parse_id(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def run_batch(resource, payload):
+    """
+    Apply creates, updates and deletes in one transaction with a fixed number
+    of queries: one locking lookup of the touched ids, bulk_create,
+    bulk_update and a filtered delete. Invalid items are reported and skipped.
+    """
+    model = _MODELS[resource]
+
+    if not isinstance(payload, dict):
+        raise BatchError("Body must be an object with create, update and/or delete lists")
+
+    creates = payload.get("create") or []
+    updates = payload.get("update") or []
+    deletes = payload.get("delete") or []
+
+    if not all(isinstance(items, list) for items in (creates, updates, deletes)):
+        raise BatchError("create, update and delete must be lists")
+
+    if len(creates) + len(updates) + len(deletes) > BATCH_MAX_ITEMS:
+        raise BatchError(f"At most {BATCH_MAX_ITEMS} items per batch")
+
+    results = {"create": [], "update": [], "delete": []}
+
+    # --- validate creates ---
+    new_objs = []
+    for index, item in enumerate(creates):
+        try:
+            new_objs.append((index, build_object(resource, item)))
+        except RowError as e:
+            results["create"].append({"index": index, "status": "error", "message": str(e)})
+
+    update_ids = [_parse_id(item.get("id")) if isinstance(item, dict) else None for item in updates]
+    delete_ids = [_parse_id(item) for item in deletes]
+
+    with transaction.atomic():
+        # --- one lookup for every id that is updated or deleted ---
+        # rows are locked (in id order) until the batch commits, so the hooks
+        # below see exactly the rows that are updated and deleted
+        existing = model.objects.select_for_update().order_by("id").in_bulk(
+            [i for i in update_ids + delete_ids if i is not None]
+        )
+
+        # --- validate updates ---
+        changed = []
+        seen = set()
+        for item, obj_id in zip(updates, update_ids):
+            if obj_id is None:
+                results["update"].append({"id": None, "status": "error", "message": "id is required"})
+                continue
+            if obj_id not in existing:
+                results["update"].append({"id": obj_id, "status": "not_found"})
+                continue
+            if obj_id in seen:
+                results["update"].append({"id": obj_id, "status": "error", "message": "id is repeated"})
+                continue
+
+            obj = existing[obj_id]
+            try:
+                validated = build_object(resource, {**_as_record(obj), **_canonical(item)})
+            except RowError as e:
+                results["update"].append({"id": obj_id, "status": "error", "message": str(e)})
+                continue
+
+            old = copy.copy(obj)
+            for field in _UPDATE_FIELDS[resource]:
+                setattr(obj, field, getattr(validated, field))
+
+            seen.add(obj_id)
+            changed.append((old, obj))
+            results["update"].append({"id": obj_id, "status": "updated"})
+
+        # --- validate deletes ---
+        removed = []
+        for obj_id in delete_ids:
+            if obj_id is None:
+                results["delete"].append({"id": None, "status": "error", "message": "id must be a number"})
+            elif obj_id not in existing:
+                results["delete"].append({"id": obj_id, "status": "not_found"})
+            elif obj_id in seen:
+                results["delete"].append({"id": obj_id, "status": "error", "message": "id is repeated"})
+            else:
+                seen.add(obj_id)
+                removed.append(existing[obj_id])
+                results["delete"].append({"id": obj_id, "status": "deleted"})
+
+        created = model.objects.bulk_create([obj for _, obj in new_objs])
+        for (index, _), obj in zip(new_objs, created):
+            results["create"].append({"index": index, "status": "created", "id": obj.id})
+
+        if changed:
+            model.objects.bulk_update([obj for _, obj in changed], _UPDATE_FIELDS[resource])
+
+        if removed:
+            model.objects.filter(id__in=[obj.id for obj in removed]).delete()
+
+        if created or changed or removed:
+            if resource == "parkirna-mesta":
+                if created:
+                    hooks.parkirna_mesta_created(created)
+                if changed:
+                    hooks.parkirna_mesta_updated(changed)
+                if removed:
+                    hooks.parkirna_mesta_deleted(removed)
+            else:
+                touched = [f"detail:{obj.id}" for _, obj in changed] + [f"detail:{obj.id}" for obj in removed]
+                reference_cache.invalidate(_TABLES[resource], *touched)
+                versions.bump(_TABLES[resource])
+
+    results["create"].sort(key=lambda result: result["index"])
+    return results
@@ -0,0 +1,231 @@
+import atexit
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# a batch whose write fails is put back and retried on the next flushes,
+# after this many failures in a row it is dropped (and counted in `dropped`)
+WRITE_RETRIES = 3
+
+
+class BufferFull(Exception):
+    """Raised when items cannot be buffered within the timeout."""
+
+
+class PeriodicFlusher:
+    """
+    Calls `callback` on a background thread every `interval` seconds, or
+    sooner when woken. On stop (and at interpreter exit) the callback runs
+    once more so nothing buffered is lost.
+    """
+
+    def __init__(self, callback, interval, name="flusher"):
+        self.callback = callback
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self._call()
+        self._call()
+
+    def _call(self):
+        try:
+            self.callback()
+        except Exception:
+            logger.exception("%s failed", self._thread.name)
+
+    @property
+    def stopped(self):
+        return self._stopped.is_set()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self, timeout=30):
+        if self.stopped:
+            return
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(timeout)
+
+
+class BatchBuffer:
+    """
+    Collects items in memory and hands them to `write` in batches, when
+    `batch_size` items are waiting or the oldest has waited `max_wait`
+    seconds. Producers block for up to `timeout` seconds while `capacity`
+    items are pending and then get BufferFull. A failed batch goes back to
+    the front of the buffer and is dropped after WRITE_RETRIES failures.
+    """
+
+    def __init__(self, write, batch_size, max_wait, capacity, name="buffer"):
+        self.write = write
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.capacity = capacity
+        self.name = name
+        self.dropped = 0
+
+        self._items = []
+        self._oldest = None
+        self._writing = 0
+        self._failures = 0
+        self._cond = threading.Condition()
+        self._flusher = PeriodicFlusher(self._flush_due, min(max_wait, 1.0), name=name)
+
+    def pending(self):
+        with self._cond:
+            return len(self._items) + self._writing
+
+    def add(self, items, timeout=0):
+        items = list(items)
+        if len(items) > self.capacity:
+            raise BufferFull()
+
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while len(self._items) + self._writing + len(items) > self.capacity:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise BufferFull()
+                self._cond.wait(remaining)
+
+            if not self._items:
+                self._oldest = time.monotonic()
+            self._items.extend(items)
+            full = len(self._items) >= self.batch_size
+
+        if full:
+            self._flusher.wake()
+
+    def _flush_due(self):
+        with self._cond:
+            due = self._items and (
+                len(self._items) >= self.batch_size
+                or time.monotonic() - self._oldest >= self.max_wait
+                or self._flusher.stopped
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write everything buffered so far, in batches of `batch_size`."""
+        while True:
+            with self._cond:
+                if not self._items:
+                    return
+                batch = self._items[:self.batch_size]
+                del self._items[:self.batch_size]
+                self._oldest = time.monotonic() if self._items else None
+                self._writing += len(batch)
+
+            try:
+                self.write(batch)
+            except Exception:
+                with self._cond:
+                    self._writing -= len(batch)
+                    self._failures += 1
+                    if self._failures <= WRITE_RETRIES:
+                        logger.warning("%s: writing %d items failed, retrying", self.name, len(batch), exc_info=True)
+                        self._items[:0] = batch
+                        self._oldest = time.monotonic() - self.max_wait
+                    else:
+                        logger.exception("%s: dropped %d items after %d failed writes",
+                                         self.name, len(batch), self._failures)
+                        self.dropped += len(batch)
+                        self._failures = 0
+                    self._cond.notify_all()
+                # retried on the next tick, not in a tight loop
+                return
+
+            with self._cond:
+                self._writing -= len(batch)
+                self._failures = 0
+                self._cond.notify_all()
+
+    def close(self):
+        self._flusher.stop()
+
+
+class CoalescingBuffer:
+    """
+    Keeps only the latest value per key and hands the pending values to
+    `write` every `interval` seconds, so a burst of updates to one key costs
+    one write. A value whose `order` is lower than the pending one for the same
+    key is dropped. With `capacity` distinct keys pending, new keys raise
+    BufferFull; updates to pending keys are always accepted. Values of a
+    failed write are merged back and dropped after WRITE_RETRIES failures.
+    """
+
+    def __init__(self, write, interval, capacity, order=None, name="coalescer"):
+        self.write = write
+        self.capacity = capacity
+        self.order = order
+        self.name = name
+        self.dropped = 0
+
+        self._pending = {}
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._flusher = PeriodicFlusher(self.flush, interval, name=name)
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _merge(self, values):
+        kept = 0
+        for key, value in values.items():
+            current = self._pending.get(key)
+            if current is not None and self.order is not None and self.order(value) < self.order(current):
+                continue
+            self._pending[key] = value
+            kept += 1
+        return kept
+
+    def put(self, values):
+        """`values` is a dict of key -> value, returns how many were kept."""
+        with self._lock:
+            new_keys = sum(1 for key in values if key not in self._pending)
+            if new_keys and len(self._pending) + new_keys > self.capacity:
+                raise BufferFull()
+            return self._merge(values)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if not pending:
+            return
+
+        try:
+            self.write(pending)
+        except Exception:
+            with self._lock:
+                self._failures += 1
+                if self._failures <= WRITE_RETRIES:
+                    logger.warning("%s: writing %d values failed, retrying", self.name, len(pending), exc_info=True)
+                    # values put meanwhile are newer and win
+                    newer, self._pending = self._pending, pending
+                    self._merge(newer)
+                else:
+                    logger.exception("%s: dropped %d values after %d failed writes",
+                                     self.name, len(pending), self._failures)
+                    self.dropped += len(pending)
+                    self._failures = 0
+            return
+
+        with self._lock:
+            self._failures = 0
+
+    def close(self):
+        self._flusher.stop()
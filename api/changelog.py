@@ -0,0 +1,84 @@
+from django.db.models import Exists, Max, OuterRef
+
+from api.models import ParkirnaMestaChange
+
+SYNC_DEFAULT_LIMIT = 1000
+SYNC_MAX_LIMIT = 5000
+
+
+def coordinate(value):
+    """Coordinates go out as JSON numbers on every endpoint, not Decimal strings."""
+    return None if value is None else float(value)
+
+
+def record(op, parks):
+    """
+    Append one change per spot and return them. Called from api.hooks after
+    the table version was bumped, so the version row lock orders seq values
+    by commit order.
+    """
+    deleted = op == ParkirnaMestaChange.DELETE
+
+    return ParkirnaMestaChange.objects.bulk_create([
+        ParkirnaMestaChange(
+            spot_id=park.id,
+            op=op,
+            name="" if deleted else park.name,
+            latitude=None if deleted else park.latitude,
+            longitude=None if deleted else park.longitude
+        )
+        for park in parks
+    ])
+
+
+def changes_since(since, limit=SYNC_DEFAULT_LIMIT):
+    rows = list(
+        ParkirnaMestaChange.objects.filter(seq__gt=since).order_by("seq")[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    changes = [
+        {
+            "seq": change.seq,
+            "op": change.op,
+            "id": change.spot_id,
+            "ime": change.name if change.op != ParkirnaMestaChange.DELETE else None,
+            "latitude": coordinate(change.latitude),
+            "longitude": coordinate(change.longitude)
+        }
+        for change in rows
+    ]
+
+    return {
+        "changes": changes,
+        "next_since": rows[-1].seq if rows else since,
+        "has_more": has_more
+    }
+
+
+def latest_seq():
+    return ParkirnaMestaChange.objects.aggregate(latest=Max("seq"))["latest"] or 0
+
+
+def compact(chunk_size=10000):
+    """
+    Delete changes that are superseded by a later change of the same spot.
+    Clients syncing from any seq still receive the latest state of every spot.
+    """
+    deleted = 0
+    upper = latest_seq()
+    start = 0
+
+    while start < upper:
+        end = start + chunk_size
+        superseded = ParkirnaMestaChange.objects.filter(
+            seq__gt=start,
+            seq__lte=end
+        ).filter(
+            Exists(ParkirnaMestaChange.objects.filter(spot_id=OuterRef("spot_id"), seq__gt=OuterRef("seq")))
+        )
+        deleted += superseded.delete()[0]
+        start = end
+
+    return deleted
@@ -0,0 +1,135 @@
+from collections import defaultdict
+
+from django.db import connection, transaction
+
+from api.geo import bbox_cell_count, bbox_cells, cell_size
+from api.models import ParkirnaMesta, ParkirnaMestaCluster
+
+CLUSTER_PRECISIONS = range(1, 8)
+CLUSTER_MAX_CELLS = 1024
+
+
+def zoom_to_precision(zoom):
+    """
+    Pick the geohash precision whose cells are about a quarter of a map tile
+    wide at the given zoom level.
+    """
+    wanted_width = 360.0 / (2 ** (zoom + 2))
+    for precision in CLUSTER_PRECISIONS:
+        if cell_size(precision)[1] <= wanted_width:
+            return precision
+    return CLUSTER_PRECISIONS[-1]
+
+
+def _deltas(parks, sign, deltas=None):
+    if deltas is None:
+        deltas = defaultdict(lambda: [0, 0.0, 0.0])
+
+    for park in parks:
+        latitude = float(park.latitude)
+        longitude = float(park.longitude)
+        for precision in CLUSTER_PRECISIONS:
+            delta = deltas[(precision, park.geohash[:precision])]
+            delta[0] += sign
+            delta[1] += sign * latitude
+            delta[2] += sign * longitude
+
+    return deltas
+
+
+def _apply(deltas):
+    deltas = {key: value for key, value in deltas.items() if value[0] or value[1] or value[2]}
+    if not deltas:
+        return
+
+    qn = connection.ops.quote_name
+    table = qn(ParkirnaMestaCluster._meta.db_table)
+    precision, cell, count, latitude_sum, longitude_sum = map(
+        qn, ("precision", "cell", "count", "latitude_sum", "longitude_sum")
+    )
+    rows = []
+    params = []
+    for key, value in deltas.items():
+        rows.append("(%s, %s, %s, %s, %s)")
+        params.extend([*key, *value])
+
+    # one upsert for all touched cells, aggregates are incremented in place
+    sql = (
+        f"INSERT INTO {table} ({precision}, {cell}, {count}, {latitude_sum}, {longitude_sum}) "
+        f"VALUES {', '.join(rows)} "
+        f"ON CONFLICT ({precision}, {cell}) DO UPDATE SET "
+        f"{count} = {table}.{count} + EXCLUDED.{count}, "
+        f"{latitude_sum} = {table}.{latitude_sum} + EXCLUDED.{latitude_sum}, "
+        f"{longitude_sum} = {table}.{longitude_sum} + EXCLUDED.{longitude_sum}"
+    )
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+        emptied = defaultdict(list)
+        for (precision_value, cell_value), value in deltas.items():
+            if value[0] < 0:
+                emptied[precision_value].append(cell_value)
+
+        for precision_value, cells in emptied.items():
+            ParkirnaMestaCluster.objects.filter(precision=precision_value, cell__in=cells, count__lte=0).delete()
+
+
+def add_spots(parks):
+    _apply(_deltas(parks, 1))
+
+
+def remove_spots(parks):
+    _apply(_deltas(parks, -1))
+
+
+def move_spots(changes):
+    """changes is a list of (old, new) spot pairs."""
+    moved = [
+        (old, new) for old, new in changes
+        if (old.latitude, old.longitude) != (new.latitude, new.longitude)
+    ]
+    if not moved:
+        return
+
+    deltas = _deltas([old for old, _ in moved], -1)
+    _apply(_deltas([new for _, new in moved], 1, deltas))
+
+
+def rebuild():
+    with transaction.atomic():
+        ParkirnaMestaCluster.objects.all().delete()
+
+        batch = []
+        for park in ParkirnaMesta.objects.only("latitude", "longitude", "geohash").iterator(chunk_size=2000):
+            batch.append(park)
+            if len(batch) >= 2000:
+                add_spots(batch)
+                batch = []
+
+        if batch:
+            add_spots(batch)
+
+
+def clusters_in_bbox(zoom, min_lat, min_lon, max_lat, max_lon):
+    """
+    Return cluster dicts for the viewport. If the viewport would need more
+    than CLUSTER_MAX_CELLS cells at this zoom a coarser precision is used.
+    """
+    precision = zoom_to_precision(zoom)
+    while precision > 1 and bbox_cell_count(min_lat, min_lon, max_lat, max_lon, precision) > CLUSTER_MAX_CELLS:
+        precision -= 1
+
+    cells = bbox_cells(min_lat, min_lon, max_lat, max_lon, precision)
+    clusters = ParkirnaMestaCluster.objects.filter(precision=precision, cell__in=cells)
+
+    return [
+        {
+            "cell": c.cell,
+            "count": c.count,
+            "latitude": round(c.latitude_sum / c.count, 6),
+            "longitude": round(c.longitude_sum / c.count, 6)
+        }
+        for c in clusters
+    ]
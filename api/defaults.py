@@ -0,0 +1,58 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+
+from api.models import Image, Role
+
+ADMIN_ROLE_ID = 1
+DEFAULT_ROLE_ID = 2
+AVATAR_IMAGE_IDS = range(1, 11)
+
+_lock = threading.Lock()
+_state = None
+
+
+def _load():
+    role_exists = Role.objects.filter(id=DEFAULT_ROLE_ID).exists()
+    image_ids = list(
+        Image.objects.filter(id__in=AVATAR_IMAGE_IDS).values_list("id", flat=True)
+    )
+
+    return {
+        "role_id": DEFAULT_ROLE_ID if role_exists else None,
+        "image_ids": image_ids,
+        "loaded_at": time.monotonic(),
+    }
+
+
+def _get():
+    global _state
+
+    state = _state
+    max_age = getattr(settings, "SIGNUP_DEFAULTS_MAX_AGE", 300)
+    if state is not None and time.monotonic() - state["loaded_at"] < max_age:
+        return state
+
+    with _lock:
+        if _state is None or time.monotonic() - _state["loaded_at"] >= max_age:
+            _state = _load()
+        return _state
+
+
+def default_role_id():
+    """Id of the role given to new users, or None if it does not exist."""
+    return _get()["role_id"]
+
+
+def random_image_id():
+    """Id of a random avatar image, or None if there are none."""
+    image_ids = _get()["image_ids"]
+    return random.choice(image_ids) if image_ids else None
+
+
+def invalidate(*args, **kwargs):
+    # connected to Role/Image post_save and post_delete in ApiConfig.ready
+    global _state
+    _state = None
@@ -0,0 +1,111 @@
+import json
+
+from asgiref.sync import sync_to_async
+
+from api.models import ParkirnaMesta, SlovenskaMesta, SlovenskeUlice
+
+FORMATS = ("ndjson", "geojson")
+RESOURCES = ("parkirna-mesta", "slovenske-ulice", "slovenska-mesta")
+
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "geojson": "application/geo+json",
+}
+
+EXPORT_CHUNK_SIZE = 2000
+_FLUSH_SIZE = 64 * 1024
+
+
+def _spots():
+    rows = ParkirnaMesta.objects.order_by("id").values_list("id", "name", "latitude", "longitude")
+    for park_id, name, latitude, longitude in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {"id": park_id, "ime": name, "latitude": float(latitude), "longitude": float(longitude)}
+
+
+def _names(model):
+    rows = model.objects.order_by("id").values_list("id", "name")
+    for row_id, name in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {"id": row_id, "ime": name}
+
+
+def _records(resource):
+    if resource == "parkirna-mesta":
+        return _spots()
+    if resource == "slovenske-ulice":
+        return _names(SlovenskeUlice)
+    return _names(SlovenskaMesta)
+
+
+def _feature(record):
+    geometry = None
+    if "latitude" in record:
+        geometry = {"type": "Point", "coordinates": [record["longitude"], record["latitude"]]}
+
+    return {
+        "type": "Feature",
+        "id": record["id"],
+        "geometry": geometry,
+        "properties": {key: value for key, value in record.items() if key not in ("latitude", "longitude")}
+    }
+
+
+def _buffered(pieces):
+    # group small pieces so the response is written in reasonably sized chunks
+    buf = []
+    size = 0
+    for piece in pieces:
+        buf.append(piece)
+        size += len(piece)
+        if size >= _FLUSH_SIZE:
+            yield "".join(buf).encode()
+            buf = []
+            size = 0
+
+    if buf:
+        yield "".join(buf).encode()
+
+
+def _ndjson(resource):
+    for record in _records(resource):
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def _geojson(resource):
+    first = True
+    for record in _records(resource):
+        yield ("" if first else ",\n") + json.dumps(_feature(record), ensure_ascii=False)
+        first = False
+
+
+def stream(resource, fmt):
+    """
+    Yield the whole table as encoded chunks. Rows come from a server-side
+    cursor, so memory use does not depend on the table size.
+    """
+    if fmt == "ndjson":
+        yield from _buffered(_ndjson(resource))
+        return
+
+    # the header goes out before the first query returns
+    yield b'{"type": "FeatureCollection", "features": [\n'
+    yield from _buffered(_geojson(resource))
+    yield b"\n]}\n"
+
+
+def _next_chunk(chunks):
+    return next(chunks, None)
+
+
+async def astream(resource, fmt):
+    """
+    stream() for ASGI servers, which would otherwise collect a sync iterator
+    into a list before sending it. Each chunk is produced in the request's
+    sync thread, where the server-side cursor lives.
+    """
+    chunks = stream(resource, fmt)
+    next_chunk = sync_to_async(_next_chunk, thread_sensitive=True)
+    try:
+        while (chunk := await next_chunk(chunks)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)()
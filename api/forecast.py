@@ -0,0 +1,155 @@
+import sys
+from array import array
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import ParkirnaMestaOccupancyHistogram
+
+# Each histogram is two arrays of uint32 counters, one slot per weekday and
+# SLOT_MINUTES of local time: index = weekday * SLOTS_PER_DAY + slot.
+# `total` counts the seconds a state was known, `free` those the spot was free.
+
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+SLOTS = 7 * SLOTS_PER_DAY
+
+
+def _time_zone():
+    return ZoneInfo(getattr(settings, "FORECAST_TIME_ZONE", "Europe/Ljubljana"))
+
+
+def slot_index(weekday, minutes):
+    return weekday * SLOTS_PER_DAY + minutes // SLOT_MINUTES
+
+
+def slot_of(moment):
+    local = moment.astimezone(_time_zone())
+    return slot_index(local.weekday(), local.hour * 60 + local.minute)
+
+
+def _unpack(data):
+    counts = array("I")
+    counts.frombytes(bytes(data))
+    if sys.byteorder != "little":
+        counts.byteswap()
+    return counts
+
+
+def _pack(counts):
+    # stored little-endian so the rows do not depend on the server
+    if sys.byteorder != "little":
+        counts = array("I", counts)
+        counts.byteswap()
+    return counts.tobytes()
+
+
+def _empty():
+    return _pack(array("I", bytes(4 * SLOTS)))
+
+
+def _max_gap():
+    return timedelta(seconds=getattr(settings, "FORECAST_MAX_GAP_SECONDS", 3600))
+
+
+def _slot_seconds(start, end):
+    """Yield (slot, seconds) for the local time slots covered by [start, end)."""
+    time_zone = _time_zone()
+    cursor = start
+    while cursor < end:
+        local = cursor.astimezone(time_zone)
+        # offsets are whole hours, so slot boundaries are the same in UTC
+        into_slot = timedelta(minutes=local.minute % SLOT_MINUTES, seconds=local.second,
+                              microseconds=local.microsecond)
+        slot_end = min(cursor + timedelta(minutes=SLOT_MINUTES) - into_slot, end)
+        yield slot_index(local.weekday(), local.hour * 60 + local.minute), (slot_end - cursor).total_seconds()
+        cursor = slot_end
+
+
+def record(previous, states):
+    """
+    Credit the time between the stored and the new state of every spot to the
+    stored state: `previous` is {spot_id: (free, reported_at)} as read before
+    the write, `states` {spot_id: (free, reported_at, source)} the states
+    written. A state is trusted for at most FORECAST_MAX_GAP_SECONDS, so a
+    silent sensor does not count as hours of one state. Rows are locked in
+    spot order while they are updated, so concurrent writers neither lose
+    counts nor deadlock.
+    """
+    spans = {}
+    for spot_id, (_, reported_at, _) in sorted(states.items()):
+        if spot_id not in previous:
+            continue
+        was_free, since = previous[spot_id]
+        end = min(reported_at, since + _max_gap())
+        if end > since:
+            spans[spot_id] = (was_free, since, end)
+
+    if not spans:
+        return
+
+    with transaction.atomic():
+        ParkirnaMestaOccupancyHistogram.objects.bulk_create(
+            [ParkirnaMestaOccupancyHistogram(spot_id=spot_id, free=_empty(), total=_empty()) for spot_id in spans],
+            ignore_conflicts=True
+        )
+
+        now = timezone.now()
+        histograms = list(
+            ParkirnaMestaOccupancyHistogram.objects.select_for_update()
+            .filter(spot_id__in=spans.keys()).order_by("spot_id")
+        )
+        for histogram in histograms:
+            was_free, since, end = spans[histogram.spot_id]
+            total_counts = _unpack(histogram.total)
+            free_counts = _unpack(histogram.free)
+
+            for slot, seconds in _slot_seconds(since, end):
+                seconds = round(seconds)
+                total_counts[slot] += seconds
+                if was_free:
+                    free_counts[slot] += seconds
+
+            histogram.total = _pack(total_counts)
+            histogram.free = _pack(free_counts)
+            histogram.updated_at = now
+
+        ParkirnaMestaOccupancyHistogram.objects.bulk_update(histograms, ["free", "total", "updated_at"])
+
+
+def _probability(free_counts, total_counts, slot):
+    total = total_counts[slot]
+    return round(free_counts[slot] / total, 3) if total else None
+
+
+def forecast(spot_id, weekday, minutes):
+    """
+    Probability that the spot is free in the slot of `weekday` (0 is Monday)
+    and `minutes` after local midnight, plus the profile of the whole day.
+    Probabilities are None for slots without observations.
+    """
+    row = ParkirnaMestaOccupancyHistogram.objects.filter(spot_id=spot_id).values_list("free", "total").first()
+    if row is None:
+        row = (_empty(), _empty())
+
+    free_counts, total_counts = _unpack(row[0]), _unpack(row[1])
+    slot = slot_index(weekday, minutes)
+    first = weekday * SLOTS_PER_DAY
+
+    return {
+        "weekday": weekday,
+        "slot_start": f"{(slot - first) * SLOT_MINUTES // 60:02d}:{(slot - first) * SLOT_MINUTES % 60:02d}",
+        "slot_minutes": SLOT_MINUTES,
+        "probability_free": _probability(free_counts, total_counts, slot),
+        "observed_seconds": total_counts[slot],
+        "day": [_probability(free_counts, total_counts, s) for s in range(first, first + SLOTS_PER_DAY)]
+    }
+
+
+def local_now():
+    """(weekday, minutes after midnight) in the forecast time zone."""
+    local = timezone.now().astimezone(_time_zone())
+    return local.weekday(), local.hour * 60 + local.minute
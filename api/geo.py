@@ -0,0 +1,119 @@
+import math
+
+# geohash helpers used to index parking spots by location
+
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = 111320.0
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat = float(latitude)
+    lon = float(longitude)
+
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                bits = bits * 2 + 1
+                lon_lo = mid
+            else:
+                bits = bits * 2
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                bits = bits * 2 + 1
+                lat_lo = mid
+            else:
+                bits = bits * 2
+                lat_hi = mid
+
+        even = not even
+        bit_count += 1
+
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """Return (height, width) in degrees of a geohash cell."""
+    total_bits = precision * 5
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lon_bits)
+
+
+def _cell_ranges(min_lat, min_lon, max_lat, max_lon, precision):
+    height, width = cell_size(precision)
+
+    min_lat = max(min_lat, -90.0)
+    max_lat = min(max_lat, 90.0 - height / 2)
+    min_lon = max(min_lon, -180.0)
+    max_lon = min(max_lon, 180.0 - width / 2)
+
+    lat_range = range(int(math.floor((min_lat + 90.0) / height)), int(math.floor((max_lat + 90.0) / height)) + 1)
+    lon_range = range(int(math.floor((min_lon + 180.0) / width)), int(math.floor((max_lon + 180.0) / width)) + 1)
+    return lat_range, lon_range, height, width
+
+
+def bbox_cell_count(min_lat, min_lon, max_lat, max_lon, precision):
+    lat_range, lon_range, _, _ = _cell_ranges(min_lat, min_lon, max_lat, max_lon, precision)
+    return len(lat_range) * len(lon_range)
+
+
+def bbox_cells(min_lat, min_lon, max_lat, max_lon, precision):
+    """Return the geohash cells of the given precision overlapping the bounding box."""
+    lat_range, lon_range, height, width = _cell_ranges(min_lat, min_lon, max_lat, max_lon, precision)
+
+    return [
+        geohash_encode(-90.0 + (i + 0.5) * height, -180.0 + (j + 0.5) * width, precision)
+        for i in lat_range
+        for j in lon_range
+    ]
+
+
+def cover_bbox(min_lat, min_lon, max_lat, max_lon, max_cells=9):
+    """
+    Return geohash prefixes covering the bounding box, using the finest
+    precision that needs at most `max_cells` cells.
+    """
+    precision = GEOHASH_PRECISION
+    while precision > 1 and bbox_cell_count(min_lat, min_lon, max_lat, max_lon, precision) > max_cells:
+        precision -= 1
+
+    return bbox_cells(min_lat, min_lon, max_lat, max_lon, precision)
+
+
+def radius_bbox(latitude, longitude, radius_m):
+    """Return (min_lat, min_lon, max_lat, max_lon) enclosing the circle."""
+    lat = float(latitude)
+    lon = float(longitude)
+
+    dlat = radius_m / METERS_PER_DEGREE
+    cos_lat = max(math.cos(math.radians(lat)), 0.01)
+    dlon = radius_m / (METERS_PER_DEGREE * cos_lat)
+
+    return lat - dlat, lon - dlon, lat + dlat, lon + dlon
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (float(lat1), float(lon1), float(lat2), float(lon2)))
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
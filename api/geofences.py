@@ -0,0 +1,271 @@
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+
+from api import pubsub, versions
+from api.geo import bbox_cell_count, bbox_cells, geohash_encode, haversine_m, radius_bbox
+from api.models import Geofence, ParkirnaMestaChange
+
+GEOFENCE_MAX_RADIUS_M = 50000
+GEOFENCE_MAX_POINTS = 100
+GEOFENCE_MAX_PER_USER = 50
+
+# every geofence is put into the buckets of the finest geohash precision
+# that covers its bounding box with at most this many cells
+INDEX_PRECISIONS = range(7, 0, -1)
+INDEX_MAX_CELLS = 16
+
+
+class GeofenceError(ValueError):
+    pass
+
+
+def alerts_channel(user_id):
+    return f"geofence-alerts:{user_id}"
+
+
+# --- validation ---
+
+def _coordinate(value, name, limit):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise GeofenceError(f"{name} must be a number")
+    if not -limit <= value <= limit:
+        raise GeofenceError(f"{name} out of range")
+    return value
+
+
+def build_geofence(user_id, data):
+    """Validate request data and return an unsaved Geofence, raises GeofenceError."""
+    name = data.get("name", "")
+    if not isinstance(name, str) or len(name) > 100:
+        raise GeofenceError("name must be a string of at most 100 characters")
+
+    if data.get("points") is not None:
+        points = data["points"]
+        if not isinstance(points, list) or not 3 <= len(points) <= GEOFENCE_MAX_POINTS:
+            raise GeofenceError(f"points must be a list of 3 to {GEOFENCE_MAX_POINTS} [latitude, longitude] pairs")
+
+        vertices = []
+        for point in points:
+            if not isinstance(point, (list, tuple)) or len(point) != 2:
+                raise GeofenceError("points must be [latitude, longitude] pairs")
+            vertices.append([_coordinate(point[0], "latitude", 90), _coordinate(point[1], "longitude", 180)])
+
+        return Geofence(user_id=user_id, name=name, kind=Geofence.POLYGON, points=vertices)
+
+    latitude = _coordinate(data.get("latitude"), "latitude", 90)
+    longitude = _coordinate(data.get("longitude"), "longitude", 180)
+    try:
+        radius_m = float(data.get("radius"))
+    except (TypeError, ValueError):
+        raise GeofenceError("radius (or points for a polygon) is required")
+    if not 0 < radius_m <= GEOFENCE_MAX_RADIUS_M:
+        raise GeofenceError(f"radius must be in (0, {GEOFENCE_MAX_RADIUS_M}]")
+
+    return Geofence(
+        user_id=user_id, name=name, kind=Geofence.CIRCLE,
+        latitude=latitude, longitude=longitude, radius_m=radius_m
+    )
+
+
+# --- matching ---
+
+class _Circle:
+    __slots__ = ("id", "user_id", "name", "latitude", "longitude", "radius_m", "_bbox")
+
+    def __init__(self, fence_id, user_id, name, latitude, longitude, radius_m):
+        self.id, self.user_id, self.name = fence_id, user_id, name
+        self.latitude, self.longitude, self.radius_m = latitude, longitude, radius_m
+        self._bbox = radius_bbox(latitude, longitude, radius_m)
+
+    def bbox(self):
+        return self._bbox
+
+    def contains(self, latitude, longitude):
+        min_lat, min_lon, max_lat, max_lon = self._bbox
+        if not (min_lat <= latitude <= max_lat and min_lon <= longitude <= max_lon):
+            return False
+        return haversine_m(self.latitude, self.longitude, latitude, longitude) <= self.radius_m
+
+
+class _Polygon:
+    __slots__ = ("id", "user_id", "name", "points")
+
+    def __init__(self, fence_id, user_id, name, points):
+        self.id, self.user_id, self.name = fence_id, user_id, name
+        self.points = [(float(lat), float(lon)) for lat, lon in points]
+
+    def bbox(self):
+        lats = [lat for lat, _ in self.points]
+        lons = [lon for _, lon in self.points]
+        return min(lats), min(lons), max(lats), max(lons)
+
+    def contains(self, latitude, longitude):
+        # ray casting, edges are straight lines in latitude/longitude
+        inside = False
+        j = len(self.points) - 1
+        for i, (lat_i, lon_i) in enumerate(self.points):
+            lat_j, lon_j = self.points[j]
+            if (lat_i > latitude) != (lat_j > latitude):
+                crossing = lon_i + (latitude - lat_i) / (lat_j - lat_i) * (lon_j - lon_i)
+                if longitude < crossing:
+                    inside = not inside
+            j = i
+        return inside
+
+
+class GeofenceIndex:
+    """
+    Geofences bucketed by geohash cell. A point is matched by looking up its
+    own cell at each precision in use, so the cost depends on how many fences
+    overlap that cell and not on the total number of fences.
+
+    Buckets are replaced rather than changed in place, so add() and remove()
+    can run while other threads match.
+    """
+
+    def __init__(self):
+        self._buckets = {}
+        # fence id -> (precision, cells) it is stored under
+        self._cells = {}
+
+    @property
+    def size(self):
+        return len(self._cells)
+
+    def add(self, fence):
+        self.remove(fence.id)
+
+        min_lat, min_lon, max_lat, max_lon = fence.bbox()
+        for precision in INDEX_PRECISIONS:
+            if bbox_cell_count(min_lat, min_lon, max_lat, max_lon, precision) <= INDEX_MAX_CELLS:
+                break
+
+        cells = bbox_cells(min_lat, min_lon, max_lat, max_lon, precision)
+        buckets = self._buckets.setdefault(precision, {})
+        for cell in cells:
+            buckets[cell] = buckets.get(cell, []) + [fence]
+        self._cells[fence.id] = (precision, cells)
+
+    def remove(self, fence_id):
+        entry = self._cells.pop(fence_id, None)
+        if entry is None:
+            return
+
+        precision, cells = entry
+        buckets = self._buckets[precision]
+        for cell in cells:
+            remaining = [fence for fence in buckets.get(cell, ()) if fence.id != fence_id]
+            if remaining:
+                buckets[cell] = remaining
+            else:
+                buckets.pop(cell, None)
+
+    def match(self, latitude, longitude):
+        latitude = float(latitude)
+        longitude = float(longitude)
+        cell = geohash_encode(latitude, longitude, INDEX_PRECISIONS[0])
+
+        for precision, buckets in list(self._buckets.items()):
+            for fence in buckets.get(cell[:precision], ()):
+                if fence.contains(latitude, longitude):
+                    yield fence
+
+
+def _matcher(fence_id, user_id, name, kind, latitude, longitude, radius_m, points):
+    if kind == Geofence.CIRCLE:
+        return _Circle(fence_id, user_id, name, latitude, longitude, radius_m)
+    return _Polygon(fence_id, user_id, name, points)
+
+
+def _load():
+    index = GeofenceIndex()
+    rows = Geofence.objects.values_list(
+        "id", "user_id", "name", "kind", "latitude", "longitude", "radius_m", "points"
+    )
+    for row in rows.iterator(chunk_size=5000):
+        index.add(_matcher(*row))
+    return index
+
+
+_lock = threading.Lock()
+_index = None
+_index_version = None
+_rebuilding = False
+_rebuild_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="geofence-index")
+
+
+def _rebuild():
+    global _index, _index_version, _rebuilding
+
+    try:
+        # read before loading, a change committed meanwhile triggers another rebuild
+        version = versions.get_version(versions.GEOFENCES)
+        rebuilt = _load()
+        with _lock:
+            _index, _index_version = rebuilt, version
+    except Exception as e:
+        print(f"[ERROR] Geofence index rebuild failed: {e}")
+    finally:
+        _rebuilding = False
+        connections.close_all()
+
+
+def index():
+    """
+    The index of all geofences. Only the first call loads it in the calling
+    thread; after the geofences table changed it is rebuilt in the background
+    and the current index is used until then, so spot writes never wait for
+    a reload. Changes made by this process are applied right away through
+    fence_saved() and fence_deleted().
+    """
+    global _index, _index_version, _rebuilding
+
+    version = versions.get_version(versions.GEOFENCES)
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index = _load()
+                _index_version = version
+    elif _index_version != version and not _rebuilding:
+        with _lock:
+            if _index_version != version and not _rebuilding:
+                _rebuilding = True
+                _rebuild_executor.submit(_rebuild)
+    return _index
+
+
+def fence_saved(fence):
+    """Add a committed Geofence to the index of this process."""
+    with _lock:
+        if _index is not None:
+            _index.add(_matcher(
+                fence.id, fence.user_id, fence.name, fence.kind,
+                fence.latitude, fence.longitude, fence.radius_m, fence.points
+            ))
+
+
+def fence_deleted(fence_id):
+    """Remove a deleted geofence from the index of this process."""
+    with _lock:
+        if _index is not None:
+            _index.remove(fence_id)
+
+
+def dispatch(messages):
+    """Send an alert to the owner of every geofence a created or updated spot lies in."""
+    alerts = defaultdict(list)
+    fences = index()
+
+    for message in messages:
+        if message["op"] == ParkirnaMestaChange.DELETE:
+            continue
+        for fence in fences.match(message["latitude"], message["longitude"]):
+            alerts[fence.user_id].append({**message, "geofence_id": fence.id, "geofence": fence.name})
+
+    for user_id, user_alerts in alerts.items():
+        pubsub.publish(alerts_channel(user_id), user_alerts)
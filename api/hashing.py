@@ -0,0 +1,62 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+# Password hashing (PBKDF2) runs on a small dedicated pool so a burst of
+# logins cannot occupy the event loop or the threads serving other endpoints.
+# hashlib releases the GIL while hashing, so threads run in parallel.
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+
+
+class HashingBusy(Exception):
+    """Raised when the pool and its queue are full."""
+
+
+def _workers():
+    return getattr(settings, "PASSWORD_HASHING_WORKERS", None) or os.cpu_count() or 1
+
+
+def _max_pending():
+    # jobs running plus jobs waiting in the queue
+    return _workers() + getattr(settings, "PASSWORD_HASHING_MAX_QUEUE", 32)
+
+
+def _pool():
+    global _executor, _slots
+
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _slots = threading.BoundedSemaphore(_max_pending())
+                _executor = ThreadPoolExecutor(max_workers=_workers(), thread_name_prefix="password-hashing")
+    return _executor, _slots
+
+
+def _submit(fn, *args):
+    executor, slots = _pool()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy()
+
+    try:
+        future = executor.submit(fn, *args)
+    except BaseException:
+        slots.release()
+        raise
+
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+
+async def check_password(password, encoded):
+    return await asyncio.wrap_future(_submit(hashers.check_password, password, encoded))
+
+
+async def make_password(password):
+    return await asyncio.wrap_future(_submit(hashers.make_password, password))
@@ -0,0 +1,54 @@
+from django.db import transaction
+
+from api import changelog, clusters, geofences, pubsub, versions
+from api.models import ParkirnaMestaChange
+
+# called by every write path that changes ParkirnaMesta rows, inside the
+# same transaction as the write; deleted spots must still carry their id
+
+CHANNEL = "parkirna-mesta"
+
+
+def _publish(changes, parks, previous=None):
+    """Push the changes to live subscribers once the transaction commits."""
+    messages = []
+    for i, (change, park) in enumerate(zip(changes, parks)):
+        message = {
+            "seq": change.seq,
+            "op": change.op,
+            "id": park.id,
+            "ime": change.name if change.op != ParkirnaMestaChange.DELETE else None,
+            "latitude": changelog.coordinate(park.latitude),
+            "longitude": changelog.coordinate(park.longitude)
+        }
+        if previous is not None:
+            # lets area filters notice a spot that moved out of the area
+            message["previous"] = {
+                "latitude": changelog.coordinate(previous[i].latitude),
+                "longitude": changelog.coordinate(previous[i].longitude)
+            }
+        messages.append(message)
+
+    pubsub.publish(CHANNEL, messages)
+    # matched after commit, a failing match must not fail the write
+    transaction.on_commit(lambda: geofences.dispatch(messages), robust=True)
+
+
+def parkirna_mesta_created(parks):
+    clusters.add_spots(parks)
+    versions.bump(versions.PARKIRNA_MESTA)
+    _publish(changelog.record(ParkirnaMestaChange.CREATE, parks), parks)
+
+
+def parkirna_mesta_updated(changes):
+    """changes is a list of (old, new) spot pairs."""
+    clusters.move_spots(changes)
+    versions.bump(versions.PARKIRNA_MESTA)
+    parks = [new for _, new in changes]
+    _publish(changelog.record(ParkirnaMestaChange.UPDATE, parks), parks, [old for old, _ in changes])
+
+
+def parkirna_mesta_deleted(parks):
+    clusters.remove_spots(parks)
+    versions.bump(versions.PARKIRNA_MESTA)
+    _publish(changelog.record(ParkirnaMestaChange.DELETE, parks), parks)
@@ -0,0 +1,350 @@
+import codecs
+import csv
+import json
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import DatabaseError, transaction
+
+from api import hooks, reference_cache, versions
+from api.geo import geohash_encode
+from api.models import ParkirnaMesta, SlovenskaMesta, SlovenskeUlice
+from api.text import normalize_name
+
+FORMATS = ("csv", "ndjson", "geojson")
+RESOURCES = ("parkirna-mesta", "slovenske-ulice", "slovenska-mesta")
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+MAX_FEATURE_SIZE = 1024 * 1024
+
+_READ_SIZE = 64 * 1024
+_STRUCTURAL = re.compile(r'["{}\[\],]')
+_STRING_END = re.compile(r'\\.|"', re.DOTALL)
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+class RowError(ValueError):
+    pass
+
+
+def guess_format(name="", content_type=""):
+    name = (name or "").lower()
+    content_type = (content_type or "").split(";")[0].strip().lower()
+
+    if name.endswith(".csv") or content_type == "text/csv":
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    if name.endswith((".geojson", ".json")) or content_type in ("application/geo+json", "application/json"):
+        return "geojson"
+    return None
+
+
+# --- parsers, each yields (row_number, record or RowError) ---
+
+def _iter_csv(text):
+    reader = csv.DictReader(text)
+    for number, record in enumerate(reader, 1):
+        yield number, record
+
+
+def _iter_ndjson(text):
+    for number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, RowError("Invalid JSON")
+
+
+def _element_end(buf, i, state):
+    """
+    Scan one element of the features array from `i`. Return the index of the
+    "," or "]" that ends it, or -1 and the (nesting depth, inside a string)
+    state plus the index to continue from once the buffer is refilled.
+    """
+    depth, in_string = state
+    while True:
+        if in_string:
+            match = _STRING_END.search(buf, i)
+            if match is None:
+                # a trailing backslash escapes the first character of the next chunk
+                resume = len(buf) - 1 if buf.endswith("\\") and i < len(buf) else len(buf)
+                return -1, (depth, True), resume
+            i = match.end()
+            in_string = match.group() != '"'
+            continue
+
+        match = _STRUCTURAL.search(buf, i)
+        if match is None:
+            return -1, (depth, False), len(buf)
+        i = match.end()
+
+        char = match.group()
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif depth > 0 and char in "}]":
+            depth -= 1
+        elif depth == 0 and char in ",]":
+            return match.start(), (0, False), i
+
+
+def _iter_geojson(text):
+    """
+    Yield the features of a FeatureCollection without loading the whole
+    document. A malformed feature is reported and parsing resumes at the
+    next feature.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = text.read(_READ_SIZE)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    while True:
+        key = buf.find('"features"')
+        bracket = buf.find("[", key) if key >= 0 else -1
+        if bracket >= 0:
+            pos = bracket + 1
+            break
+        if eof or len(buf) > MAX_FEATURE_SIZE:
+            raise ImportFormatError("GeoJSON FeatureCollection with a features array expected")
+        fill()
+
+    number = 0
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+
+        if pos >= len(buf):
+            if eof:
+                raise ImportFormatError("Unterminated features array")
+            fill()
+            continue
+
+        if buf[pos] == "]":
+            return
+
+        try:
+            feature, pos = decoder.raw_decode(buf, pos)
+        except ValueError:
+            pass
+        else:
+            number += 1
+            yield number, feature
+            continue
+
+        # the feature is either cut off by the end of the buffer or malformed
+        end, state, resume = _element_end(buf, pos, (0, False))
+        if end < 0 and not eof and len(buf) - pos <= MAX_FEATURE_SIZE:
+            fill()
+            continue
+
+        number += 1
+        if end >= 0:
+            yield number, RowError("Invalid JSON")
+            pos = end
+            continue
+
+        if eof:
+            yield number, RowError("Invalid JSON")
+            return
+
+        # too large to hold, skip it without buffering the rest
+        yield number, RowError(f"Feature is larger than {MAX_FEATURE_SIZE} characters")
+        while end < 0:
+            pos = resume
+            fill()
+            if eof:
+                return
+            end, state, resume = _element_end(buf, 0, state)
+        pos = end
+
+
+def iter_records(stream, fmt):
+    """Decode a binary stream and yield (row_number, record) pairs."""
+    if fmt not in FORMATS:
+        raise ImportFormatError(f"Unknown format: {fmt}")
+
+    text = codecs.getreader("utf-8-sig")(stream, errors="replace")
+
+    if fmt == "csv":
+        return _iter_csv(text)
+    if fmt == "ndjson":
+        return _iter_ndjson(text)
+    return _iter_geojson(text)
+
+
+# --- validation, record -> unsaved model instance ---
+
+def _flatten(record):
+    if not isinstance(record, dict):
+        raise RowError("Row must be an object")
+
+    if record.get("type") != "Feature":
+        return record
+
+    flat = dict(record.get("properties") or {})
+    geometry = record.get("geometry") or {}
+    if geometry.get("type") == "Point":
+        coordinates = geometry.get("coordinates") or []
+        if len(coordinates) >= 2:
+            flat["longitude"], flat["latitude"] = coordinates[0], coordinates[1]
+    return flat
+
+
+def _name(record):
+    name = record.get("ime") or record.get("name")
+    if not isinstance(name, str) or not name.strip():
+        raise RowError("ime is required")
+
+    name = name.strip()
+    if len(name) > 255:
+        raise RowError("ime is longer than 255 characters")
+    return name
+
+
+def _coordinate(record, field, limit):
+    try:
+        value = Decimal(str(record.get(field))).quantize(Decimal("0.000001"))
+    except (InvalidOperation, ValueError):
+        raise RowError(f"{field} must be a number")
+
+    if not value.is_finite():
+        raise RowError(f"{field} must be a number")
+
+    if not -limit <= value <= limit:
+        raise RowError(f"{field} out of range")
+    return value
+
+
+def _build_spot(record):
+    record = _flatten(record)
+    spot = ParkirnaMesta(
+        name=_name(record),
+        latitude=_coordinate(record, "latitude", 90),
+        longitude=_coordinate(record, "longitude", 180)
+    )
+    # bulk_create skips save(), so derived columns are set here
+    spot.geohash = geohash_encode(spot.latitude, spot.longitude)
+    return spot
+
+
+def _build_street(record):
+    name = _name(_flatten(record))
+    return SlovenskeUlice(name=name, name_normalized=normalize_name(name))
+
+
+def _build_city(record):
+    return SlovenskaMesta(name=_name(_flatten(record)))
+
+
+_BUILDERS = {
+    "parkirna-mesta": _build_spot,
+    "slovenske-ulice": _build_street,
+    "slovenska-mesta": _build_city,
+}
+
+
+def build_object(resource, record):
+    """Validate a record and return an unsaved model instance, raises RowError."""
+    return _BUILDERS[resource](record)
+
+
+_TABLES = {
+    "slovenske-ulice": versions.SLOVENSKE_ULICE,
+    "slovenska-mesta": versions.SLOVENSKA_MESTA,
+}
+
+
+# --- writing ---
+
+def _created(resource, objs):
+    if resource == "parkirna-mesta":
+        hooks.parkirna_mesta_created(objs)
+    else:
+        reference_cache.invalidate(_TABLES[resource])
+        versions.bump(_TABLES[resource])
+
+
+def _write_batch(resource, batch, report):
+    objs = [obj for _, obj in batch]
+
+    try:
+        with transaction.atomic():
+            created = objs[0].__class__.objects.bulk_create(objs)
+            _created(resource, created)
+        report["created"] += len(created)
+        return
+    except DatabaseError:
+        pass
+
+    # isolate the failing rows, everything else in the batch is still written
+    for number, obj in batch:
+        try:
+            with transaction.atomic():
+                obj.pk = None
+                created = obj.__class__.objects.bulk_create([obj])
+                _created(resource, created)
+            report["created"] += 1
+        except DatabaseError as e:
+            _add_error(report, number, str(e))
+
+
+def _add_error(report, number, message):
+    report["failed"] += 1
+    if len(report["errors"]) < MAX_REPORTED_ERRORS:
+        report["errors"].append({"row": number, "message": message})
+
+
+def import_records(resource, records, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Validate and insert records in batches of `batch_size`, each in its own
+    transaction. Invalid rows are reported and skipped. Only one batch is
+    held in memory at a time.
+    """
+    if resource not in _BUILDERS:
+        raise ImportFormatError(f"Unknown resource: {resource}")
+
+    build = _BUILDERS[resource]
+    report = {"created": 0, "failed": 0, "errors": []}
+
+    batch = []
+    try:
+        for number, record in records:
+            if isinstance(record, RowError):
+                _add_error(report, number, str(record))
+                continue
+
+            try:
+                batch.append((number, build(record)))
+            except RowError as e:
+                _add_error(report, number, str(e))
+                continue
+
+            if len(batch) >= batch_size:
+                _write_batch(resource, batch, report)
+                batch = []
+    except ImportFormatError as e:
+        # the rest of the file cannot be read, keep what was parsed so far
+        _add_error(report, None, str(e))
+
+    if batch:
+        _write_batch(resource, batch, report)
+
+    return report
@@ -0,0 +1,96 @@
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.buffering import BatchBuffer
+from api.models import User, UserData
+
+INGEST_MAX_EVENTS = 1000
+INGEST_MAX_DESCRIPTION = 10000
+
+_lock = threading.Lock()
+_buffer = None
+
+
+class EventError(ValueError):
+    pass
+
+
+def parse_timestamp(value):
+    """Return an aware datetime for an ISO 8601 string, or None."""
+    if not isinstance(value, str):
+        return None
+
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        return None
+
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def build_event(user_id, record):
+    """Validate one event and return an unsaved UserData, raises EventError."""
+    if not isinstance(record, dict):
+        raise EventError("Event must be an object")
+
+    description = record.get("description", "")
+    if not isinstance(description, str):
+        raise EventError("description must be a string")
+    if len(description) > INGEST_MAX_DESCRIPTION:
+        raise EventError(f"description is longer than {INGEST_MAX_DESCRIPTION} characters")
+
+    ts_ins = record.get("ts_ins")
+    if ts_ins is None:
+        ts_ins = timezone.now()
+    else:
+        ts_ins = parse_timestamp(ts_ins)
+        if ts_ins is None:
+            raise EventError("ts_ins must be an ISO 8601 datetime")
+
+    return UserData(user_id=user_id, ts_ins=ts_ins, description=description)
+
+
+def _write(events):
+    close_old_connections()
+
+    try:
+        with transaction.atomic():
+            UserData.objects.bulk_create(events)
+        return
+    except IntegrityError:
+        pass
+
+    # a user was deleted while its events were buffered, drop only those
+    user_ids = {event.user_id for event in events}
+    existing = set(User.objects.filter(id__in=user_ids).values_list("id", flat=True))
+    events = [event for event in events if event.user_id in existing]
+    if events:
+        UserData.objects.bulk_create(events)
+
+
+def buffer():
+    global _buffer
+
+    if _buffer is None:
+        with _lock:
+            if _buffer is None:
+                _buffer = BatchBuffer(
+                    _write,
+                    batch_size=getattr(settings, "USERDATA_INGEST_BATCH_SIZE", 1000),
+                    max_wait=getattr(settings, "USERDATA_INGEST_MAX_WAIT", 1.0),
+                    capacity=getattr(settings, "USERDATA_INGEST_CAPACITY", 50000),
+                    name="userdata-ingest"
+                )
+    return _buffer
+
+
+def submit(events):
+    """Queue events for writing, raises BufferFull when the buffer stays full."""
+    buffer().add(events, timeout=getattr(settings, "USERDATA_INGEST_BLOCK_TIMEOUT", 0.5))
+
@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from rest_framework.renderers import BaseRenderer
+
+from api import changelog, geofences, pubsub
+from api.geo import haversine_m
+from api.hooks import CHANNEL
+
+LIVE_HEARTBEAT_SECONDS = 15
+LIVE_RETRY_MS = 2000
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets EventSource clients (Accept: text/event-stream) pass content negotiation."""
+
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # only error responses are rendered, events are streamed directly
+        return f"event: error\ndata: {json.dumps(data, default=str)}\n\n".encode()
+
+
+class BBoxArea:
+    def __init__(self, min_lat, min_lon, max_lat, max_lon):
+        self.min_lat, self.min_lon, self.max_lat, self.max_lon = min_lat, min_lon, max_lat, max_lon
+
+    def contains(self, latitude, longitude):
+        return self.min_lat <= latitude <= self.max_lat and self.min_lon <= longitude <= self.max_lon
+
+
+class CircleArea:
+    def __init__(self, latitude, longitude, radius_m):
+        self.latitude, self.longitude, self.radius_m = latitude, longitude, radius_m
+
+    def contains(self, latitude, longitude):
+        return haversine_m(self.latitude, self.longitude, latitude, longitude) <= self.radius_m
+
+
+def matches(area, message):
+    """True if the spot is, or was before the change, inside the area."""
+    if area is None or message.get("latitude") is None:
+        # replayed deletes carry no position, clients ignore unknown ids
+        return True
+
+    points = [message]
+    if message.get("previous"):
+        points.append(message["previous"])
+    return any(area.contains(float(p["latitude"]), float(p["longitude"])) for p in points)
+
+
+def _event(message):
+    data = json.dumps(message, default=str, ensure_ascii=False)
+    return f"id: {message['seq']}\nevent: {message['op']}\ndata: {data}\n\n"
+
+
+async def stream(area=None, since=None):
+    """
+    Server-Sent Events with every parking spot change inside `area`. With
+    `since` the changes after that seq are replayed from the change log
+    before live changes follow, so a reconnecting client misses nothing.
+    """
+    # subscribe first, changes committed during the replay are queued
+    subscription = pubsub.subscribe(CHANNEL, lambda message: matches(area, message))
+    try:
+        yield f"retry: {LIVE_RETRY_MS}\n\n"
+
+        replayed = 0
+        if since is not None:
+            replayed = since
+            while True:
+                page = await sync_to_async(changelog.changes_since)(replayed, changelog.SYNC_MAX_LIMIT)
+                for change in page["changes"]:
+                    if matches(area, change):
+                        yield _event(change)
+                replayed = page["next_since"]
+                if not page["has_more"]:
+                    break
+
+        async for event in _follow(subscription, replayed):
+            yield event
+    finally:
+        subscription.close()
+
+
+async def _follow(subscription, replayed=0):
+    while True:
+        try:
+            message = await subscription.get(LIVE_HEARTBEAT_SECONDS)
+        except asyncio.TimeoutError:
+            # keeps proxies from closing an idle connection
+            yield ": ping\n\n"
+            continue
+
+        if message is None:
+            # fell too far behind, the client resyncs through /sync/
+            yield "event: reset\ndata: {}\n\n"
+            return
+
+        if message["seq"] > replayed:
+            yield _event(message)
+
+
+async def stream_alerts(user_id):
+    """Server-Sent Events with the geofence alerts of one user."""
+    subscription = pubsub.subscribe(geofences.alerts_channel(user_id))
+    try:
+        yield f"retry: {LIVE_RETRY_MS}\n\n"
+        async for event in _follow(subscription):
+            yield event
+    finally:
+        subscription.close()
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api import retention
+
+
+class Command(BaseCommand):
+    help = "Roll old UserData events up into daily summaries and remove them, optionally archiving them first."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None,
+                            help="Keep raw events of this many days, default USERDATA_RETENTION_DAYS")
+        parser.add_argument("--chunk-size", type=int, default=retention.RETENTION_CHUNK_SIZE)
+        parser.add_argument("--archive-dir", help="Write removed events to gzip NDJSON files in this directory")
+
+    def handle(self, *args, **options):
+        removed = retention.apply_retention(
+            days=options["days"],
+            chunk_size=max(1, options["chunk_size"]),
+            archive_dir=options["archive_dir"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rolled up and removed {removed} events"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api import changelog
+
+
+class Command(BaseCommand):
+    help = "Remove parking spot changes that are superseded by a later change of the same spot."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        deleted = changelog.compact(chunk_size=max(1, options["chunk_size"]))
+        self.stdout.write(self.style.SUCCESS(f"Removed {deleted} superseded changes"))
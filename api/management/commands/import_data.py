@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importers import DEFAULT_BATCH_SIZE, FORMATS, RESOURCES, ImportFormatError, guess_format, \
+    import_records, iter_records
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV, NDJSON or GeoJSON file into parking spots, streets or cities."
+
+    def add_arguments(self, parser):
+        parser.add_argument("resource", choices=RESOURCES)
+        parser.add_argument("path", help="File to import, - reads from stdin")
+        parser.add_argument("--format", choices=FORMATS, help="Input format, guessed from the file name if omitted")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or guess_format(path)
+        if fmt is None:
+            raise CommandError("Cannot guess the format, use --format")
+
+        stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+        try:
+            report = import_records(
+                options["resource"],
+                iter_records(stream, fmt),
+                batch_size=max(1, options["batch_size"])
+            )
+        except ImportFormatError as e:
+            raise CommandError(str(e))
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+        for error in report["errors"]:
+            self.stderr.write(f"row {error['row']}: {error['message']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} rows, {report['failed']} failed"
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api import purge
+
+
+class Command(BaseCommand):
+    help = "Finish user deletions whose background purge was interrupted or failed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=purge.PURGE_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        for job in purge.resume(chunk_size=max(1, options["chunk_size"])):
+            self.stdout.write(f"User {job.user_id}: {job.status}, {job.deleted_rows} rows deleted")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api import clusters
+from api.models import ParkirnaMestaCluster
+
+
+class Command(BaseCommand):
+    help = "Recompute the parking spot cluster aggregates from scratch."
+
+    def handle(self, *args, **options):
+        clusters.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {ParkirnaMestaCluster.objects.count()} cluster cells"
+        ))
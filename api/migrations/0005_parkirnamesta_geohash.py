@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-18 10:20
+
+from django.db import migrations, models
+
+from api.geo import geohash_encode
+
+
+def fill_geohash(apps, schema_editor):
+    ParkirnaMesta = apps.get_model('api', 'ParkirnaMesta')
+
+    batch = []
+    for park in ParkirnaMesta.objects.only('id', 'latitude', 'longitude').iterator(chunk_size=2000):
+        park.geohash = geohash_encode(park.latitude, park.longitude)
+        batch.append(park)
+        if len(batch) >= 2000:
+            ParkirnaMesta.objects.bulk_update(batch, ['geohash'])
+            batch = []
+
+    if batch:
+        ParkirnaMesta.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_alter_userdata_ts_ins'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='parkirnamesta',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.RunPython(fill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 10:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_parkirnamesta_geohash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='parkirnamesta',
+            index=models.Index(fields=['latitude', 'longitude'], name='parkirnamesta_lat_lon_idx'),
+        ),
+    ]
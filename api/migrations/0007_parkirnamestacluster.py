@@ -0,0 +1,57 @@
+# Generated by Django 6.0 on 2026-10-18 10:19
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def fill_clusters(apps, schema_editor):
+    ParkirnaMesta = apps.get_model('api', 'ParkirnaMesta')
+    ParkirnaMestaCluster = apps.get_model('api', 'ParkirnaMestaCluster')
+
+    totals = defaultdict(lambda: [0, 0.0, 0.0])
+    for park in ParkirnaMesta.objects.only('latitude', 'longitude', 'geohash').iterator(chunk_size=2000):
+        for precision in range(1, 8):
+            total = totals[(precision, park.geohash[:precision])]
+            total[0] += 1
+            total[1] += float(park.latitude)
+            total[2] += float(park.longitude)
+
+    ParkirnaMestaCluster.objects.bulk_create(
+        [
+            ParkirnaMestaCluster(
+                precision=precision,
+                cell=cell,
+                count=count,
+                latitude_sum=latitude_sum,
+                longitude_sum=longitude_sum
+            )
+            for (precision, cell), (count, latitude_sum, longitude_sum) in totals.items()
+        ],
+        batch_size=2000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_parkirnamesta_lat_lon_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParkirnaMestaCluster',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('precision', models.PositiveSmallIntegerField()),
+                ('cell', models.CharField(max_length=12)),
+                ('count', models.IntegerField(default=0)),
+                ('latitude_sum', models.FloatField(default=0)),
+                ('longitude_sum', models.FloatField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('precision', 'cell'), name='parkirnamestacluster_precision_cell_uniq')],
+            },
+        ),
+        migrations.RunPython(fill_clusters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-18 10:40
+
+from django.db import migrations, models
+
+from api.text import normalize_name
+
+
+def fill_name_normalized(apps, schema_editor):
+    SlovenskeUlice = apps.get_model('api', 'SlovenskeUlice')
+
+    batch = []
+    for street in SlovenskeUlice.objects.only('id', 'name').iterator(chunk_size=2000):
+        street.name_normalized = normalize_name(street.name)
+        batch.append(street)
+        if len(batch) >= 2000:
+            SlovenskeUlice.objects.bulk_update(batch, ['name_normalized'])
+            batch = []
+
+    if batch:
+        SlovenskeUlice.objects.bulk_update(batch, ['name_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_tableversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='slovenskeulice',
+            name='name_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_name_normalized, migrations.RunPython.noop),
+    ]
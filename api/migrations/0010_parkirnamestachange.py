@@ -0,0 +1,49 @@
+# Generated by Django 6.0 on 2026-10-18 10:25
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def seed_changes(apps, schema_editor):
+    # existing spots become "create" changes so a sync from 0 is a full load
+    ParkirnaMesta = apps.get_model('api', 'ParkirnaMesta')
+    ParkirnaMestaChange = apps.get_model('api', 'ParkirnaMestaChange')
+
+    batch = []
+    for park in ParkirnaMesta.objects.order_by('id').iterator(chunk_size=2000):
+        batch.append(ParkirnaMestaChange(
+            spot_id=park.id,
+            op='create',
+            name=park.name,
+            latitude=park.latitude,
+            longitude=park.longitude
+        ))
+        if len(batch) >= 2000:
+            ParkirnaMestaChange.objects.bulk_create(batch)
+            batch = []
+
+    if batch:
+        ParkirnaMestaChange.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_slovenskeulice_name_normalized'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParkirnaMestaChange',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('spot_id', models.IntegerField(db_index=True)),
+                ('op', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete')], max_length=10)),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('ts', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(seed_changes, migrations.RunPython.noop),
+    ]
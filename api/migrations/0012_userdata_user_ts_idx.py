@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_userpurge'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userdata',
+            index=models.Index(fields=['user', 'ts_ins', 'id'], name='userdata_user_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-18 13:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_userdata_user_ts_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDataDaily',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('events', models.IntegerField(default=0)),
+                ('first_ts', models.DateTimeField()),
+                ('last_ts', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='users_data_daily', to='api.user')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'day'), name='userdatadaily_user_day_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 14:55
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_geofence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParkirnaMestaOccupancy',
+            fields=[
+                ('spot', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='occupancy', serialize=False, to='api.parkirnamesta')),
+                ('free', models.BooleanField(db_index=True)),
+                ('source', models.CharField(choices=[('sensor', 'Sensor'), ('crowd', 'Crowd')], default='sensor', max_length=10)),
+                ('reported_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
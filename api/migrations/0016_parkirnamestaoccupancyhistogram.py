@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 15:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_parkirnamestaoccupancy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParkirnaMestaOccupancyHistogram',
+            fields=[
+                ('spot', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='occupancy_histogram', serialize=False, to='api.parkirnamesta')),
+                ('free', models.BinaryField()),
+                ('total', models.BinaryField()),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -1,6 +1,9 @@
 from django.db import models
 from django.utils import timezone
 
+from api.geo import geohash_encode
+from api.text import normalize_name
+
 # Create your models here.
 
 class Role(models.Model):
@@ -56,12 +59,81 @@ class UserData(models.Model):
         null=True,
         blank=True)
     description = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # history pages are range scans on (user, ts_ins, id)
+            models.Index(fields=["user", "ts_ins", "id"], name="userdata_user_ts_idx"),
+        ]
+
     def __str__(self):
         return self.user
 
+class UserDataDaily(models.Model):
+    # per user and day totals of UserData events removed by retention
+    id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="users_data_daily"
+    )
+    day = models.DateField()
+    events = models.IntegerField(default=0)
+    first_ts = models.DateTimeField()
+    last_ts = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "day"], name="userdatadaily_user_day_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.day}"
+
+
+class Geofence(models.Model):
+    # an area a user wants parking spot alerts for, a circle or a polygon
+    CIRCLE = "circle"
+    POLYGON = "polygon"
+    KINDS = [
+        (CIRCLE, "Circle"),
+        (POLYGON, "Polygon"),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="geofences"
+    )
+    name = models.CharField(max_length=100, blank=True)
+    kind = models.CharField(max_length=10, choices=KINDS)
+    # circle center and radius
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    radius_m = models.FloatField(null=True, blank=True)
+    # polygon vertices as [[latitude, longitude], ...]
+    points = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.user_id} {self.name or self.kind}"
+
+
 class SlovenskeUlice(models.Model):
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=255)
+    name_normalized = models.CharField(max_length=255, db_index=True, blank=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        self.name_normalized = normalize_name(self.name)
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = set(update_fields) | {"name_normalized"}
+
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
 
@@ -76,5 +148,136 @@ class ParkirnaMesta(models.Model):
     name = models.CharField(max_length=255)
     latitude = models.DecimalField(max_digits=9, decimal_places=6)
     longitude = models.DecimalField(max_digits=9, decimal_places=6)
+    geohash = models.CharField(max_length=12, db_index=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["latitude", "longitude"], name="parkirnamesta_lat_lon_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.geohash = geohash_encode(self.latitude, self.longitude)
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = set(update_fields) | {"geohash"}
+
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.name
+
+
+class ParkirnaMestaOccupancy(models.Model):
+    # latest reported state of a parking spot, one row per spot
+    SENSOR = "sensor"
+    CROWD = "crowd"
+    SOURCES = [
+        (SENSOR, "Sensor"),
+        (CROWD, "Crowd"),
+    ]
+
+    spot = models.OneToOneField(
+        ParkirnaMesta,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="occupancy"
+    )
+    free = models.BooleanField(db_index=True)
+    source = models.CharField(max_length=10, choices=SOURCES, default=SENSOR)
+    reported_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.spot_id} {'free' if self.free else 'taken'}"
+
+
+class ParkirnaMestaOccupancyHistogram(models.Model):
+    # seconds observed per weekday and time slot, packed arrays of uint32
+    # (see api.forecast for the layout)
+    spot = models.OneToOneField(
+        ParkirnaMesta,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="occupancy_histogram"
+    )
+    free = models.BinaryField()
+    total = models.BinaryField()
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.spot_id}"
+
+
+class ParkirnaMestaCluster(models.Model):
+    # aggregate of all parking spots inside one geohash cell
+    id = models.AutoField(primary_key=True)
+    precision = models.PositiveSmallIntegerField()
+    cell = models.CharField(max_length=12)
+    count = models.IntegerField(default=0)
+    latitude_sum = models.FloatField(default=0)
+    longitude_sum = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["precision", "cell"], name="parkirnamestacluster_precision_cell_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.precision}:{self.cell}"
+
+
+class TableVersion(models.Model):
+    # bumped on every write to a reference table, used for ETags and caches
+    name = models.CharField(max_length=100, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name}@{self.version}"
+
+
+class ParkirnaMestaChange(models.Model):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+    OPERATIONS = [
+        (CREATE, "Create"),
+        (UPDATE, "Update"),
+        (DELETE, "Delete"),
+    ]
+
+    seq = models.BigAutoField(primary_key=True)
+    spot_id = models.IntegerField(db_index=True)
+    op = models.CharField(max_length=10, choices=OPERATIONS)
+    name = models.CharField(max_length=255, blank=True)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    ts = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.seq} {self.op} {self.spot_id}"
+
+
+class UserPurge(models.Model):
+    # background removal of a user with a large UserData history
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    user_id = models.IntegerField(db_index=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    deleted_rows = models.BigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(default=timezone.now)
+
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return f"{self.user_id} {self.status}"
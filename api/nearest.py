@@ -0,0 +1,95 @@
+import threading
+
+import numpy as np
+
+from api import versions
+from api.geo import EARTH_RADIUS_M
+from api.models import ParkirnaMesta
+
+BATCH_NEAREST_MAX_POSITIONS = 1000
+BATCH_NEAREST_MAX_K = 20
+# queries are processed in blocks so the distance matrix stays below this
+# many elements (8 bytes each)
+_MAX_MATRIX_ELEMENTS = 4_000_000
+
+
+def _unit_vectors(latitudes, longitudes):
+    lat = np.radians(latitudes)
+    lon = np.radians(longitudes)
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+class SpotArray:
+    """
+    All parking spots as unit vectors on the sphere. The closest spots to a
+    position are the ones with the largest dot product, so a batch of
+    positions is one matrix product followed by a partial sort per row.
+    """
+
+    def __init__(self, rows):
+        self.ids = [row[0] for row in rows]
+        self.names = [row[1] for row in rows]
+        self.latitudes = [row[2] for row in rows]
+        self.longitudes = [row[3] for row in rows]
+        self.vectors = _unit_vectors(
+            np.array(self.latitudes, dtype=np.float64),
+            np.array(self.longitudes, dtype=np.float64)
+        ).reshape(-1, 3)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def nearest(self, positions, k, max_radius_m=None):
+        """
+        For every (latitude, longitude) in `positions` return [(distance_m, index)]
+        of the k closest spots, closest first.
+        """
+        if not len(self) or not positions:
+            return [[] for _ in positions]
+
+        k = min(k, len(self))
+        points = np.array(positions, dtype=np.float64)
+        queries = _unit_vectors(points[:, 0], points[:, 1])
+        block = max(1, _MAX_MATRIX_ELEMENTS // len(self))
+
+        results = []
+        for start in range(0, len(queries), block):
+            dots = queries[start:start + block] @ self.vectors.T
+
+            if k < len(self):
+                top = np.argpartition(-dots, k - 1, axis=1)[:, :k]
+            else:
+                top = np.broadcast_to(np.arange(len(self)), (len(dots), len(self)))
+            top_dots = np.take_along_axis(dots, top, axis=1)
+
+            order = np.argsort(-top_dots, axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+            distances = EARTH_RADIUS_M * np.arccos(np.clip(np.take_along_axis(top_dots, order, axis=1), -1.0, 1.0))
+
+            for row_indexes, row_distances in zip(top.tolist(), distances.tolist()):
+                results.append([
+                    (distance, index) for distance, index in zip(row_distances, row_indexes)
+                    if max_radius_m is None or distance <= max_radius_m
+                ])
+
+        return results
+
+
+_lock = threading.Lock()
+_array = None
+_array_version = None
+
+
+def spot_array():
+    """The in-memory spot array, rebuilt when the parking spot table changed."""
+    global _array, _array_version
+
+    version = versions.get_version(versions.PARKIRNA_MESTA)
+    if _array is None or _array_version != version:
+        with _lock:
+            if _array is None or _array_version != version:
+                rows = list(ParkirnaMesta.objects.order_by("id").values_list("id", "name", "latitude", "longitude"))
+                _array = SpotArray(rows)
+                _array_version = version
+    return _array
@@ -0,0 +1,167 @@
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.utils import timezone
+
+from api import forecast
+from api.buffering import CoalescingBuffer
+from api.ingest import parse_timestamp
+from api.models import ParkirnaMesta, ParkirnaMestaOccupancy
+
+OCCUPANCY_MAX_REPORTS = 5000
+
+_lock = threading.Lock()
+_buffer = None
+
+
+class ReportError(ValueError):
+    pass
+
+
+def build_report(record):
+    """Validate one report and return (spot_id, (free, reported_at, source)), raises ReportError."""
+    if not isinstance(record, dict):
+        raise ReportError("Report must be an object")
+
+    spot_id = record.get("id")
+    if not isinstance(spot_id, int) or isinstance(spot_id, bool):
+        raise ReportError("id must be a number")
+
+    free = record.get("free")
+    if not isinstance(free, bool):
+        raise ReportError("free must be true or false")
+
+    source = record.get("source", ParkirnaMestaOccupancy.SENSOR)
+    if source not in (ParkirnaMestaOccupancy.SENSOR, ParkirnaMestaOccupancy.CROWD):
+        raise ReportError("source must be sensor or crowd")
+
+    reported_at = timezone.now()
+    if record.get("ts") is not None:
+        reported_at = parse_timestamp(record["ts"])
+        if reported_at is None:
+            raise ReportError("ts must be an ISO 8601 datetime")
+
+    return spot_id, (free, reported_at, source)
+
+
+def _applies(state, current, refresh):
+    """
+    Whether a report replaces the stored (free, reported_at): it must not be
+    older, and either change the state or be due for a refresh.
+    """
+    if current is None:
+        return True
+
+    free, reported_at, _ = state
+    current_free, current_reported_at = current
+    if reported_at < current_reported_at:
+        return False
+    return free != current_free or (reported_at - current_reported_at).total_seconds() >= refresh
+
+
+def _upsert(states):
+    """
+    Insert or update the rows of `states` in one statement and return the ids
+    of the spots written. A row is never replaced by an older report, which
+    covers rows inserted by another worker since they were read.
+    """
+    qn = connection.ops.quote_name
+    table = qn(ParkirnaMestaOccupancy._meta.db_table)
+    spot, free, reported_at, source = map(qn, ("spot_id", "free", "reported_at", "source"))
+
+    rows = []
+    params = []
+    for spot_id, (state_free, state_reported_at, state_source) in states:
+        rows.append("(%s, %s, %s, %s)")
+        params.extend([
+            spot_id, state_free, connection.ops.adapt_datetimefield_value(state_reported_at), state_source
+        ])
+
+    sql = (
+        f"INSERT INTO {table} ({spot}, {free}, {reported_at}, {source}) "
+        f"VALUES {', '.join(rows)} "
+        f"ON CONFLICT ({spot}) DO UPDATE SET "
+        f"{free} = EXCLUDED.{free}, "
+        f"{reported_at} = EXCLUDED.{reported_at}, "
+        f"{source} = EXCLUDED.{source} "
+        f"WHERE EXCLUDED.{reported_at} >= {table}.{reported_at} "
+        f"RETURNING {spot}"
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {row[0] for row in cursor.fetchall()}
+
+
+def _apply(states):
+    refresh = getattr(settings, "OCCUPANCY_REFRESH_SECONDS", 300)
+
+    with transaction.atomic():
+        # the stored rows are locked in spot order, so concurrent flushes
+        # compare against the state the other one committed
+        current = {
+            spot_id: (free, reported_at)
+            for spot_id, free, reported_at in ParkirnaMestaOccupancy.objects.select_for_update()
+            .filter(spot_id__in=states.keys()).order_by("spot_id").values_list("spot_id", "free", "reported_at")
+        }
+
+        changed = sorted(
+            (spot_id, state) for spot_id, state in states.items()
+            if _applies(state, current.get(spot_id), refresh)
+        )
+        if not changed:
+            return
+
+        written = _upsert(changed)
+        forecast.record(current, {spot_id: state for spot_id, state in changed if spot_id in written})
+
+
+def _write(pending):
+    close_old_connections()
+
+    try:
+        _apply(pending)
+    except IntegrityError:
+        # reports for unknown or deleted spots are dropped
+        existing = set(ParkirnaMesta.objects.filter(id__in=pending.keys()).values_list("id", flat=True))
+        states = {spot_id: state for spot_id, state in pending.items() if spot_id in existing}
+        if states:
+            _apply(states)
+
+
+def buffer():
+    global _buffer
+
+    if _buffer is None:
+        with _lock:
+            if _buffer is None:
+                _buffer = CoalescingBuffer(
+                    _write,
+                    interval=getattr(settings, "OCCUPANCY_FLUSH_INTERVAL", 1.0),
+                    capacity=getattr(settings, "OCCUPANCY_MAX_PENDING", 100000),
+                    order=lambda state: state[1],
+                    name="occupancy"
+                )
+    return _buffer
+
+
+def submit(reports):
+    """Queue (spot_id, state) pairs, only the latest state per spot is written."""
+    latest = {}
+    for spot_id, state in reports:
+        if spot_id not in latest or state[1] >= latest[spot_id][1]:
+            latest[spot_id] = state
+    return buffer().put(latest)
+
+
+def free_states(spot_ids):
+    """Return {spot_id: free} for the spots that have a reported state."""
+    return dict(
+        ParkirnaMestaOccupancy.objects.filter(spot_id__in=spot_ids).values_list("spot_id", "free")
+    )
+
+
+def filter_free(queryset, free):
+    """Only spots currently reported free (free=True) or taken (free=False)."""
+    return queryset.filter(occupancy__free=free)
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+# In-process fan-out of published messages to subscribers. Where messages
+# come from is up to the backend: LocalBackend delivers publishes of this
+# process only, RedisBackend relays them through Redis to every node.
+
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+class Subscription:
+    """
+    Messages for one subscriber, read with `await get()`. If the reader falls
+    more than SUBSCRIBER_QUEUE_SIZE messages behind the subscription is marked
+    overflowed and receives nothing more; the client has to resync.
+    """
+
+    def __init__(self, hub, channel, accepts=None):
+        self.hub = hub
+        self.channel = channel
+        self.accepts = accepts or (lambda message: True)
+        self.overflowed = False
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+
+    def _put(self, message):
+        if self.overflowed:
+            return
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def push(self, message):
+        # called from any thread, the queue belongs to the subscriber's loop
+        try:
+            self._loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # the loop is gone, the subscriber disconnected without closing
+            self.close()
+
+    async def get(self, timeout=None):
+        """Next message, None after an overflow, raises TimeoutError."""
+        if self.overflowed and self._queue.empty():
+            return None
+        return await asyncio.wait_for(self._queue.get(), timeout)
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, channel, accepts=None):
+        subscription = Subscription(self, channel, accepts)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.get(subscription.channel, set()).discard(subscription)
+
+    def deliver(self, channel, messages):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+
+        for subscription in subscribers:
+            for message in messages:
+                if subscription.accepts(message):
+                    subscription.push(message)
+
+
+class LocalBackend:
+    """Delivers to subscribers of this process, for development and tests."""
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def publish(self, channel, messages):
+        self.hub.deliver(channel, messages)
+
+
+class RedisBackend:
+    """
+    Relays messages through Redis pub/sub (settings.PUBSUB_REDIS_URL) so
+    subscribers on every node receive them. Needs the `redis` package.
+    """
+
+    def __init__(self, hub):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("RedisBackend needs the redis package")
+
+        self.hub = hub
+        self.client = redis.Redis.from_url(getattr(settings, "PUBSUB_REDIS_URL", "redis://localhost:6379/0"))
+        self._prefix = "parking-alert:"
+        self._thread = threading.Thread(target=self._listen, name="pubsub-redis", daemon=True)
+        self._thread.start()
+
+    def publish(self, channel, messages):
+        self.client.publish(self._prefix + channel, json.dumps(messages, default=str))
+
+    def _listen(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(self._prefix + "*")
+        for item in pubsub.listen():
+            channel = item["channel"].decode()[len(self._prefix):]
+            self.hub.deliver(channel, json.loads(item["data"]))
+
+
+_lock = threading.Lock()
+_hub = None
+_backend = None
+
+
+def hub():
+    global _hub, _backend
+
+    if _hub is None:
+        with _lock:
+            if _hub is None:
+                backend_class = import_string(getattr(settings, "PUBSUB_BACKEND", "api.pubsub.LocalBackend"))
+                new_hub = Hub()
+                _backend = backend_class(new_hub)
+                _hub = new_hub
+    return _hub
+
+
+def publish(channel, messages):
+    """Publish once the current transaction commits, a rollback publishes nothing."""
+    if not messages:
+        return
+
+    hub()
+    transaction.on_commit(lambda: _publish(channel, messages))
+
+
+def _publish(channel, messages):
+    try:
+        _backend.publish(channel, messages)
+    except Exception as e:
+        # clients recover from missed messages through the sync endpoint
+        print(f"[ERROR] Publishing to {channel} failed: {e}")
+
+
+def subscribe(channel, accepts=None):
+    """Call from async code, returns a Subscription."""
+    return hub().subscribe(channel, accepts)
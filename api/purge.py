@@ -0,0 +1,96 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from api import versions
+from api.models import Geofence, User, UserData, UserPurge
+
+PURGE_CHUNK_SIZE = 5000
+# users with up to this many UserData rows are deleted within the request
+PURGE_INLINE_ROWS = 10000
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="user-purge")
+
+
+def _delete_chunk(user_id, chunk_size):
+    ids = list(UserData.objects.filter(user_id=user_id).values_list("id", flat=True)[:chunk_size])
+    if ids:
+        UserData.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def _delete_user_row(user_id):
+    with transaction.atomic():
+        # rows written while the history was purged go with the user
+        _, deleted = User.objects.filter(id=user_id).delete()
+        if deleted.get(Geofence._meta.label):
+            versions.bump(versions.GEOFENCES)
+    return deleted.get(User._meta.label, 0) > 0
+
+
+def delete_user(user_id):
+    """
+    Delete a user and its UserData. Small histories are removed right away
+    and None is returned, larger ones get a UserPurge job that deletes them
+    in chunks in the background. Raises User.DoesNotExist.
+    """
+    if not User.objects.filter(id=user_id).exists():
+        raise User.DoesNotExist()
+
+    history = UserData.objects.filter(user_id=user_id)
+    if not history[PURGE_INLINE_ROWS:PURGE_INLINE_ROWS + 1].exists():
+        _delete_user_row(user_id)
+        return None
+
+    job = UserPurge.objects.filter(user_id=user_id).exclude(status=UserPurge.DONE).first()
+    if job is None:
+        job = UserPurge.objects.create(user_id=user_id)
+
+    transaction.on_commit(lambda: start(job.id))
+    return job
+
+
+def run(job_id, chunk_size=PURGE_CHUNK_SIZE):
+    """Run a purge job to completion. Jobs can be run again after a failure."""
+    job = UserPurge.objects.get(id=job_id)
+    if job.status == UserPurge.DONE:
+        return job
+
+    jobs = UserPurge.objects.filter(id=job.id)
+    jobs.update(status=UserPurge.RUNNING, error="", updated_at=timezone.now())
+
+    try:
+        deleted_rows = job.deleted_rows
+        while True:
+            # every chunk commits on its own, no long transaction or lock
+            deleted = _delete_chunk(job.user_id, chunk_size)
+            deleted_rows += deleted
+            jobs.update(deleted_rows=deleted_rows, updated_at=timezone.now())
+            if deleted < chunk_size:
+                break
+
+        _delete_user_row(job.user_id)
+        jobs.update(status=UserPurge.DONE, updated_at=timezone.now())
+    except Exception as e:
+        print(f"[ERROR] User purge {job.id} failed: {e}")
+        jobs.update(status=UserPurge.FAILED, error=str(e), updated_at=timezone.now())
+
+    return UserPurge.objects.get(id=job.id)
+
+
+def _run_in_thread(job_id):
+    try:
+        run(job_id)
+    finally:
+        connections.close_all()
+
+
+def start(job_id):
+    _executor.submit(_run_in_thread, job_id)
+
+
+def resume(chunk_size=PURGE_CHUNK_SIZE):
+    """Run every unfinished job, e.g. after a restart interrupted them."""
+    job_ids = list(UserPurge.objects.exclude(status=UserPurge.DONE).values_list("id", flat=True))
+    return [run(job_id, chunk_size) for job_id in job_ids]
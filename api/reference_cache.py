@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+from django.db import transaction
+
+from api import versions
+
+
+def _cache():
+    try:
+        return caches[getattr(settings, "REFERENCE_CACHE_ALIAS", "reference")]
+    except InvalidCacheBackendError:
+        return caches["default"]
+
+
+def _key(table, version, key):
+    return f"ref:{table}:{version}:{key}"
+
+
+def get_or_load(table, key, loader):
+    """
+    Return the cached value for `key` or call `loader` and cache its result.
+    Keys include the table version, so a bump makes old entries unreachable
+    and they age out through the backend's TTL/LRU eviction. None is never
+    cached.
+    """
+    cache = _cache()
+    cache_key = _key(table, versions.get_version(table), key)
+
+    value = cache.get(cache_key)
+    if value is None:
+        value = loader()
+        if value is not None:
+            cache.set(cache_key, value)
+
+    return value
+
+
+def invalidate(table, *keys):
+    """
+    Drop the list and the given detail keys of `table` once the writing
+    transaction commits. Call before versions.bump in the write handlers.
+    """
+    version = versions.get_version(table)
+    cache_keys = [_key(table, version, "list")] + [_key(table, version, key) for key in keys]
+
+    transaction.on_commit(lambda: _cache().delete_many(cache_keys))
@@ -0,0 +1,166 @@
+import gzip
+import json
+import os
+from collections import defaultdict, deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from api.models import User, UserData, UserDataDaily
+
+RETENTION_CHUNK_SIZE = 5000
+
+
+def default_days():
+    return getattr(settings, "USERDATA_RETENTION_DAYS", 90)
+
+
+def cutoff(days):
+    """Start of the local day `days` days ago, events before it are rolled up."""
+    today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=days)
+
+
+def _fsync_directory(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class _Archive:
+    """
+    Writes the events of every chunk to new gzip NDJSON files, one per month:
+    userdata-YYYY-MM-<first id>-<last id>.ndjson.gz. Each file is written
+    under a temporary name, synced and renamed, so it is either complete or
+    absent when the chunk's delete commits.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, rows):
+        """Archive the rows, returns the paths of the files written."""
+        months = defaultdict(list)
+        for row in rows:
+            ts = timezone.localtime(row["ts_ins"])
+            months[f"{ts.year:04d}-{ts.month:02d}"].append({
+                "id": row["id"],
+                "user_id": row["user_id"],
+                "ts_ins": ts.isoformat(),
+                "description": row["description"]
+            })
+
+        paths = []
+        try:
+            for month, events in months.items():
+                ids = [event["id"] for event in events]
+                path = os.path.join(self.directory, f"userdata-{month}-{min(ids)}-{max(ids)}.ndjson.gz")
+                temp_path = path + ".tmp"
+
+                with open(temp_path, "wb") as raw:
+                    with gzip.GzipFile(fileobj=raw, mode="wb") as f:
+                        for event in events:
+                            f.write((json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+                    raw.flush()
+                    os.fsync(raw.fileno())
+
+                os.replace(temp_path, path)
+                paths.append(path)
+
+            _fsync_directory(self.directory)
+        except BaseException:
+            self.discard(paths)
+            raise
+
+        return paths
+
+    def discard(self, paths):
+        """Remove files of a chunk whose delete did not commit."""
+        for path in paths + [path + ".tmp" for path in paths]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def _roll_up(rows):
+    days = defaultdict(lambda: [0, None, None])
+    for row in rows:
+        ts = row["ts_ins"]
+        summary = days[(row["user_id"], timezone.localtime(ts).date())]
+        summary[0] += 1
+        summary[1] = ts if summary[1] is None else min(summary[1], ts)
+        summary[2] = ts if summary[2] is None else max(summary[2], ts)
+
+    for (user_id, day), (events, first_ts, last_ts) in days.items():
+        updated = UserDataDaily.objects.filter(user_id=user_id, day=day).update(
+            events=F("events") + events,
+            first_ts=Least("first_ts", first_ts),
+            last_ts=Greatest("last_ts", last_ts)
+        )
+        if not updated:
+            UserDataDaily.objects.create(
+                user_id=user_id, day=day, events=events, first_ts=first_ts, last_ts=last_ts
+            )
+
+
+def _expire_chunk(user_ids, before, chunk_size, archive):
+    """
+    Roll up, archive and delete up to `chunk_size` events of the users at the
+    front of the `user_ids` deque, users with nothing left are popped.
+    """
+    paths = []
+    try:
+        with transaction.atomic():
+            rows = []
+            while user_ids and len(rows) < chunk_size:
+                wanted = chunk_size - len(rows)
+                # a range scan on the (user, ts_ins, id) index
+                user_rows = list(
+                    UserData.objects.filter(user_id=user_ids[0], ts_ins__lt=before)
+                    .order_by("ts_ins", "id")
+                    .values("id", "user_id", "ts_ins", "description")[:wanted]
+                )
+                rows.extend(user_rows)
+                if len(user_rows) < wanted:
+                    user_ids.popleft()
+
+            if not rows:
+                return 0
+
+            _roll_up(rows)
+            if archive is not None:
+                # synced to disk before the delete can commit
+                paths = archive.write(rows)
+            UserData.objects.filter(id__in=[row["id"] for row in rows]).delete()
+    except BaseException:
+        # the events are still in the table, their archive copy goes
+        if archive is not None:
+            archive.discard(paths)
+        raise
+
+    return len(rows)
+
+
+def apply_retention(days=None, chunk_size=RETENTION_CHUNK_SIZE, archive_dir=None):
+    """
+    Roll events older than `days` into UserDataDaily and delete them, one
+    chunk per transaction. With `archive_dir` the raw events of each chunk are
+    written to compressed NDJSON files first. Returns the number of rows removed.
+    """
+    before = cutoff(default_days() if days is None else days)
+    archive = _Archive(archive_dir) if archive_dir else None
+    user_ids = deque(User.objects.order_by("id").values_list("id", flat=True))
+
+    removed = 0
+    while user_ids:
+        removed += _expire_chunk(user_ids, before, chunk_size, archive)
+
+    return removed
@@ -0,0 +1,30 @@
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.functions import Length
+
+from api.models import SlovenskeUlice
+from api.text import normalize_name
+
+AUTOCOMPLETE_DEFAULT_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+
+def autocomplete_streets(query, limit=AUTOCOMPLETE_DEFAULT_LIMIT):
+    """
+    Return up to `limit` streets whose normalized name starts with the
+    normalized query. Exact matches come first, then shorter names, then
+    alphabetical order.
+    """
+    prefix = normalize_name(query)
+    if not prefix:
+        return []
+
+    # prefix lookup on the indexed column, the database ranks every match
+    # before the slice so a short name late in the alphabet is not cut off
+    streets = SlovenskeUlice.objects.filter(
+        name_normalized__startswith=prefix
+    ).annotate(
+        inexact=Case(When(name_normalized=prefix, then=Value(0)), default=Value(1), output_field=IntegerField()),
+        name_length=Length("name_normalized")
+    ).order_by("inexact", "name_length", "name_normalized", "id").values("id", "name")[:limit]
+
+    return [{"id": s["id"], "ime": s["name"]} for s in streets]
@@ -0,0 +1,86 @@
+import gzip
+import threading
+
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from api.models import ParkirnaMesta
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+
+class Snapshot:
+    """The full parking spot list rendered once as JSON plus compressed variants."""
+
+    def __init__(self, version, body):
+        self.version = version
+        self.encodings = {
+            "identity": body,
+            "gzip": gzip.compress(body, compresslevel=9),
+        }
+        if brotli is not None:
+            self.encodings["br"] = brotli.compress(body, quality=9)
+
+    def response(self, request):
+        encoding = _pick_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""), self.encodings)
+        body = self.encodings[encoding]
+
+        response = HttpResponse(body, content_type="application/json")
+        response["Content-Length"] = str(len(body))
+        response["Vary"] = "Accept-Encoding"
+        if encoding != "identity":
+            response["Content-Encoding"] = encoding
+        return response
+
+
+_lock = threading.Lock()
+_current = None
+
+
+def _pick_encoding(header, available):
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        params = params.replace(" ", "")
+        if params in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+
+    for encoding in ("br", "gzip"):
+        if encoding in available and encoding in accepted:
+            return encoding
+    return "identity"
+
+
+def _build(version):
+    result = [
+        {
+            "id": park_id,
+            "ime": name,
+            "latitude": latitude,
+            "longitude": longitude
+        }
+        for park_id, name, latitude, longitude in ParkirnaMesta.objects.values_list(
+            "id", "name", "latitude", "longitude"
+        ).iterator(chunk_size=2000)
+    ]
+
+    # same renderer as the regular Response, so the bytes are identical
+    return Snapshot(version, JSONRenderer().render(result))
+
+
+def get(version):
+    """Return the snapshot for `version`, rebuilding it once if it is stale."""
+    global _current
+
+    snapshot = _current
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    with _lock:
+        if _current is None or _current.version != version:
+            _current = _build(version)
+        return _current
@@ -0,0 +1,68 @@
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+from api.geo import cover_bbox, haversine_m, radius_bbox
+from api.models import ParkirnaMesta
+
+NEARBY_START_RADIUS_M = 250
+NEARBY_MAX_RADIUS_M = 50000
+NEARBY_MAX_K = 100
+BBOX_MAX_RESULTS = 1000
+
+
+def spots_in_cells(cells):
+    # every prefix is an index range scan on the geohash column
+    query = reduce(or_, (Q(geohash__startswith=cell) for cell in cells))
+    return ParkirnaMesta.objects.filter(query)
+
+
+def spots_within(latitude, longitude, radius_m, queryset=None):
+    """Return [(distance, spot)] within radius_m, closest first."""
+    min_lat, min_lon, max_lat, max_lon = radius_bbox(latitude, longitude, radius_m)
+    cells = cover_bbox(min_lat, min_lon, max_lat, max_lon)
+
+    candidates = spots_in_cells(cells)
+    if queryset is not None:
+        candidates = candidates & queryset
+
+    result = []
+    for park in candidates:
+        distance = haversine_m(latitude, longitude, park.latitude, park.longitude)
+        if distance <= radius_m:
+            result.append((distance, park))
+
+    result.sort(key=lambda item: (item[0], item[1].id))
+    return result
+
+
+def nearest_spots(latitude, longitude, k, max_radius_m=NEARBY_MAX_RADIUS_M, queryset=None):
+    """
+    Return the k closest spots as [(distance, spot)]. The search radius grows
+    until k spots are found, so the cost follows the result size.
+    """
+    radius = min(NEARBY_START_RADIUS_M, max_radius_m)
+
+    while True:
+        result = spots_within(latitude, longitude, radius, queryset)
+        if len(result) >= k or radius >= max_radius_m:
+            return result[:k]
+        radius = min(radius * 4, max_radius_m)
+
+
+def spots_in_bbox(min_lat, min_lon, max_lat, max_lon, limit=BBOX_MAX_RESULTS, queryset=None):
+    """
+    Return ([spot], truncated) for the rectangle. Served by the composite
+    (latitude, longitude) index; one extra row is read to detect truncation.
+    """
+    spots = queryset if queryset is not None else ParkirnaMesta.objects.all()
+    spots = spots.filter(
+        latitude__gte=min_lat,
+        latitude__lte=max_lat,
+        longitude__gte=min_lon,
+        longitude__lte=max_lon
+    )
+
+    result = list(spots.order_by("latitude", "longitude")[:limit + 1])
+    return result[:limit], len(result) > limit
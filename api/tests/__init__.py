@@ -0,0 +1,12 @@
+from zoneinfo import ZoneInfo
+
+from api.importers import build_object
+
+LJUBLJANA = ZoneInfo("Europe/Ljubljana")
+UTC = ZoneInfo("UTC")
+
+
+def create_spot(name, latitude, longitude):
+    spot = build_object("parkirna-mesta", {"ime": name, "latitude": latitude, "longitude": longitude})
+    spot.save()
+    return spot
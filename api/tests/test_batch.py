@@ -0,0 +1,97 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api import changelog, clusters, versions
+from api.batch import BATCH_MAX_ITEMS, run_batch
+from api.models import ParkirnaMestaChange, ParkirnaMestaCluster, SlovenskaMesta, SlovenskeUlice
+from api.tests.test_clusters import cluster_counts
+
+
+class BatchHookTests(TestCase):
+
+    def setUp(self):
+        result = run_batch("parkirna-mesta", {"create": [
+            {"ime": f"Spot {i}", "latitude": 46 + i / 100, "longitude": 14.5} for i in range(4)
+        ]})
+        self.ids = [item["id"] for item in result["create"]]
+
+    def test_clusters_match_a_rebuild(self):
+        run_batch("parkirna-mesta", {
+            "update": [{"id": self.ids[0], "latitude": 45.5}, {"id": self.ids[1], "ime": "Renamed"}],
+            "delete": [self.ids[2]]
+        })
+
+        incremental = cluster_counts()
+        clusters.rebuild()
+        self.assertEqual(incremental, cluster_counts())
+        self.assertEqual(ParkirnaMestaCluster.objects.get(precision=1, cell__startswith="u").count, 3)
+
+    def test_hooks_only_see_rows_that_changed(self):
+        with mock.patch("api.batch.hooks") as hooks:
+            result = run_batch("parkirna-mesta", {
+                "update": [{"id": self.ids[0], "latitude": 45.5}, {"id": 999, "latitude": 45.5}],
+                "delete": [self.ids[1], self.ids[1], 998]
+            })
+
+        self.assertEqual([item["status"] for item in result["update"]], ["updated", "not_found"])
+        self.assertEqual([item["status"] for item in result["delete"]], ["deleted", "error", "not_found"])
+
+        (changes,), _ = hooks.parkirna_mesta_updated.call_args
+        self.assertEqual([(old.id, old.latitude, new.latitude) for old, new in changes],
+                         [(self.ids[0], Decimal("46.000000"), Decimal("45.500000"))])
+        (removed,), _ = hooks.parkirna_mesta_deleted.call_args
+        self.assertEqual([park.id for park in removed], [self.ids[1]])
+        hooks.parkirna_mesta_created.assert_not_called()
+
+    def test_change_log_and_version(self):
+        version = versions.get_version(versions.PARKIRNA_MESTA)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            run_batch("parkirna-mesta", {"update": [{"id": self.ids[0], "latitude": 45.5}], "delete": [self.ids[1]]})
+
+        ops = list(ParkirnaMestaChange.objects.order_by("seq").values_list("op", "spot_id"))[-2:]
+        self.assertEqual(ops, [(ParkirnaMestaChange.UPDATE, self.ids[0]), (ParkirnaMestaChange.DELETE, self.ids[1])])
+        self.assertGreater(versions.get_version(versions.PARKIRNA_MESTA), version)
+
+        update = changelog.changes_since(0)["changes"][-2]
+        self.assertEqual(update["latitude"], 45.5)
+
+
+class BatchTests(TestCase):
+
+    def test_update_by_name_alias(self):
+        street = SlovenskeUlice.objects.create(name="Copova", name_normalized="copova")
+
+        result = run_batch("slovenske-ulice", {"update": [{"id": street.id, "name": "Trubarjeva"}]})
+
+        self.assertEqual(result["update"], [{"id": street.id, "status": "updated"}])
+        street.refresh_from_db()
+        self.assertEqual((street.name, street.name_normalized), ("Trubarjeva", "trubarjeva"))
+
+    def test_invalid_items_are_reported(self):
+        city = SlovenskaMesta.objects.create(name="Ljubljana")
+
+        result = run_batch("slovenska-mesta", {
+            "create": [{"ime": "Maribor"}, {"ime": ""}],
+            "update": [{"id": city.id, "ime": " "}, {"ime": "Koper"}],
+            "delete": ["x"]
+        })
+
+        self.assertEqual([item["status"] for item in result["create"]], ["created", "error"])
+        self.assertEqual([item["status"] for item in result["update"]], ["error", "error"])
+        self.assertEqual([item["status"] for item in result["delete"]], ["error"])
+        self.assertEqual(sorted(SlovenskaMesta.objects.values_list("name", flat=True)), ["Ljubljana", "Maribor"])
+
+    def test_endpoint(self):
+        client = APIClient()
+
+        response = client.post("/api/slovenska-mesta/batch/", {"create": [{"ime": "Maribor"}]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["create"][0]["status"], "created")
+
+        too_many = {"delete": list(range(BATCH_MAX_ITEMS + 1))}
+        self.assertEqual(client.post("/api/slovenska-mesta/batch/", too_many, format="json").status_code, 400)
+        self.assertEqual(client.post("/api/slovenska-mesta/batch/", [], format="json").status_code, 400)
@@ -0,0 +1,116 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from api.buffering import BatchBuffer, CoalescingBuffer, WRITE_RETRIES
+
+
+class CoalescingBufferTests(TestCase):
+
+    def make_buffer(self, write, **kwargs):
+        buffer = CoalescingBuffer(write, interval=3600, **kwargs)
+        self.addCleanup(buffer.close)
+        return buffer
+
+    def test_keeps_latest_value_per_key(self):
+        written = []
+        buffer = self.make_buffer(written.append, capacity=10)
+
+        buffer.put({1: "a", 2: "b"})
+        buffer.put({1: "c"})
+        buffer.flush()
+
+        self.assertEqual(written, [{1: "c", 2: "b"}])
+        self.assertEqual(buffer.pending(), 0)
+
+    def test_older_value_does_not_replace_newer(self):
+        written = []
+        buffer = self.make_buffer(written.append, capacity=10, order=lambda value: value[1])
+
+        buffer.put({1: ("taken", 20)})
+        kept = buffer.put({1: ("free", 10), 2: ("free", 5)})
+        buffer.flush()
+
+        self.assertEqual(kept, 1)
+        self.assertEqual(written, [{1: ("taken", 20), 2: ("free", 5)}])
+
+    def test_capacity_counts_new_keys_only(self):
+        buffer = self.make_buffer(lambda values: None, capacity=2)
+        buffer.put({1: 1, 2: 2})
+
+        buffer.put({1: 3})
+        with self.assertRaises(Exception):
+            buffer.put({3: 3})
+        self.assertEqual(buffer.pending(), 2)
+
+    def test_failed_write_is_retried_and_newer_values_win(self):
+        written = []
+
+        def write(values):
+            written.append(dict(values))
+            if len(written) == 1:
+                raise RuntimeError("database is down")
+
+        buffer = self.make_buffer(write, capacity=10, order=lambda value: value)
+        buffer.put({1: 5, 2: 5})
+        with self.assertLogs("api.buffering", "WARNING"):
+            buffer.flush()
+
+        buffer.put({1: 7, 2: 3})
+        buffer.flush()
+
+        self.assertEqual(written[-1], {1: 7, 2: 5})
+        self.assertEqual(buffer.dropped, 0)
+
+    def test_values_are_dropped_after_retries(self):
+        buffer = self.make_buffer(mock.Mock(side_effect=RuntimeError("database is down")), capacity=10)
+        buffer.put({1: 1, 2: 2})
+
+        with self.assertLogs("api.buffering", "WARNING") as logs:
+            for _ in range(WRITE_RETRIES + 1):
+                buffer.flush()
+
+        self.assertEqual(buffer.dropped, 2)
+        self.assertEqual(buffer.pending(), 0)
+        self.assertIn("dropped 2 values", logs.output[-1])
+
+
+class BatchBufferTests(TestCase):
+
+    def make_buffer(self, write, **kwargs):
+        buffer = BatchBuffer(write, max_wait=3600, **kwargs)
+        self.addCleanup(buffer.close)
+        # flushed by the test only, not by the background thread
+        wake = mock.patch.object(buffer._flusher, "wake")
+        wake.start()
+        self.addCleanup(wake.stop)
+        return buffer
+
+    def test_writes_in_batches_in_order(self):
+        batches = []
+        buffer = self.make_buffer(batches.append, batch_size=2, capacity=10)
+
+        buffer.add([1, 2, 3])
+        buffer.flush()
+
+        self.assertEqual(batches, [[1, 2], [3]])
+
+    def test_failed_batch_is_retried_in_order(self):
+        written = []
+        calls = []
+
+        def write(batch):
+            calls.append(batch)
+            if len(calls) == 1:
+                raise RuntimeError("database is down")
+            written.extend(batch)
+
+        buffer = self.make_buffer(write, batch_size=10, capacity=10)
+        buffer.add([1, 2, 3])
+        with self.assertLogs("api.buffering", "WARNING"):
+            buffer.flush()
+        buffer.add([4])
+        buffer.flush()
+
+        self.assertEqual(written, [1, 2, 3, 4])
+        self.assertEqual(buffer.pending(), 0)
@@ -0,0 +1,55 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api import changelog
+from api.models import ParkirnaMestaChange
+
+
+class DeltaSyncTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.first = self.create("Center", 46.05, 14.5)
+        self.second = self.create("Station", 46.06, 14.51)
+
+    def create(self, name, latitude, longitude):
+        return self.client.post("/api/parkirna-mesta/", {"ime": name, "latitude": latitude, "longitude": longitude},
+                                format="json").json()["id"]
+
+    def sync(self, since, **params):
+        return self.client.get("/api/parkirna-mesta/sync/", {"since": since, **params}).json()
+
+    def test_changes_in_order(self):
+        self.client.put(f"/api/parkirna-mesta/{self.first}/", {"ime": "Center", "latitude": 46.07, "longitude": 14.5},
+                        format="json")
+        self.client.delete(f"/api/parkirna-mesta/{self.second}/")
+
+        body = self.sync(0)
+        self.assertEqual([(c["op"], c["id"]) for c in body["changes"]], [
+            (ParkirnaMestaChange.CREATE, self.first), (ParkirnaMestaChange.CREATE, self.second),
+            (ParkirnaMestaChange.UPDATE, self.first), (ParkirnaMestaChange.DELETE, self.second),
+        ])
+        self.assertEqual(body["changes"][2]["latitude"], 46.07)
+        self.assertEqual(body["changes"][3], {"seq": body["next_since"], "op": ParkirnaMestaChange.DELETE,
+                                              "id": self.second, "ime": None, "latitude": None, "longitude": None})
+        self.assertFalse(body["has_more"])
+
+    def test_paging_with_next_since(self):
+        first = self.sync(0, limit=1)
+        self.assertTrue(first["has_more"])
+
+        rest = self.sync(first["next_since"])
+        self.assertEqual([c["id"] for c in first["changes"] + rest["changes"]], [self.first, self.second])
+        self.assertEqual(self.sync(rest["next_since"]), {"changes": [], "next_since": rest["next_since"],
+                                                         "has_more": False})
+
+    def test_compact_keeps_the_latest_change(self):
+        self.client.delete(f"/api/parkirna-mesta/{self.first}/")
+
+        self.assertEqual(changelog.compact(chunk_size=1), 1)
+        self.assertEqual([(c["op"], c["id"]) for c in self.sync(0)["changes"]],
+                         [(ParkirnaMestaChange.CREATE, self.second), (ParkirnaMestaChange.DELETE, self.first)])
+
+    def test_validation(self):
+        self.assertEqual(self.client.get("/api/parkirna-mesta/sync/").status_code, 400)
+        self.assertEqual(self.client.get("/api/parkirna-mesta/sync/", {"since": -1}).status_code, 400)
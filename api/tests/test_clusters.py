@@ -0,0 +1,59 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api import clusters
+from api.models import ParkirnaMesta, ParkirnaMestaCluster
+
+
+def cluster_counts():
+    return sorted(ParkirnaMestaCluster.objects.values_list("precision", "cell", "count"))
+
+
+class ClusterTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def create(self, **data):
+        return self.client.post("/api/parkirna-mesta/", data, format="json")
+
+    def test_writes_keep_clusters_in_sync(self):
+        first = self.create(ime="Center", latitude=46.05, longitude=14.5).json()["id"]
+        second = self.create(ime="Station", latitude=46.06, longitude=14.51).json()["id"]
+        self.client.put(f"/api/parkirna-mesta/{first}/", {"ime": "Center", "latitude": 45.5, "longitude": 13.7},
+                        format="json")
+        self.client.delete(f"/api/parkirna-mesta/{second}/")
+
+        incremental = cluster_counts()
+        clusters.rebuild()
+        self.assertEqual(incremental, cluster_counts())
+        self.assertEqual(ParkirnaMestaCluster.objects.get(precision=1, cell="u").count, 1)
+
+    def test_post_is_validated_like_put(self):
+        for data in [
+            {"ime": "Center", "latitude": "abc", "longitude": 14.5},
+            {"ime": "Center", "latitude": 46.05, "longitude": 181},
+        ]:
+            with self.subTest(data=data):
+                self.assertEqual(self.create(**data).status_code, 400)
+
+        self.assertFalse(ParkirnaMesta.objects.exists())
+        self.assertFalse(ParkirnaMestaCluster.objects.exists())
+
+    def test_post_rounds_coordinates(self):
+        spot_id = self.create(ime="Center", latitude="46.0500004", longitude="14.5").json()["id"]
+        self.assertEqual(str(ParkirnaMesta.objects.get(id=spot_id).latitude), "46.050000")
+
+    def test_clusters_endpoint(self):
+        for latitude in (46.05, 46.051, 46.3):
+            self.create(ime="Spot", latitude=latitude, longitude=14.5)
+
+        response = self.client.get("/api/parkirna-mesta/clusters/", {
+            "zoom": 3, "min_latitude": 45, "min_longitude": 13, "max_latitude": 47, "max_longitude": 16
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(cluster["count"] for cluster in response.json()), 3)
+        self.assertEqual(self.client.get("/api/parkirna-mesta/clusters/", {
+            "zoom": 30, "min_latitude": 45, "min_longitude": 13, "max_latitude": 47, "max_longitude": 16
+        }).status_code, 400)
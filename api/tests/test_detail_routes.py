@@ -0,0 +1,60 @@
+import json
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.models import SlovenskaMesta, SlovenskeUlice
+from api.tests import create_spot
+
+
+class DetailRouteTests(TestCase):
+
+    def setUp(self):
+        self.city = SlovenskaMesta.objects.create(name="Ljubljana")
+        self.client = APIClient()
+
+    def test_get_by_path_and_query(self):
+        for response in [
+            self.client.get(f"/api/slovenska-mesta/{self.city.id}/"),
+            self.client.get("/api/slovenska-mesta/", {"id": self.city.id}),
+        ]:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), {"id": self.city.id, "ime": "Ljubljana"})
+
+        self.assertEqual(self.client.get("/api/slovenska-mesta/999/").status_code, 404)
+        self.assertEqual(self.client.get("/api/slovenska-mesta/", {"id": "one"}).status_code, 400)
+
+    def test_legacy_body_id(self):
+        response = self.client.generic("GET", "/api/slovenska-mesta/", json.dumps({"id": self.city.id}),
+                                       content_type="application/json")
+        self.assertEqual(response.json()["ime"], "Ljubljana")
+
+    def test_body_is_not_parsed_when_the_path_has_the_id(self):
+        street = SlovenskeUlice.objects.create(name="Trubarjeva", name_normalized="trubarjeva")
+        spot = create_spot("Center", 46.05, 14.5)
+
+        for method, path, expected in [
+            ("GET", f"/api/slovenska-mesta/{self.city.id}/", 200),
+            ("GET", f"/api/slovenske-ulice/{street.id}/", 200),
+            ("GET", f"/api/parkirna-mesta/{spot.id}/", 200),
+            ("GET", f"/api/slovenska-mesta/?id={self.city.id}", 200),
+            ("DELETE", f"/api/parkirna-mesta/{spot.id}/", 200),
+        ]:
+            with self.subTest(method=method, path=path):
+                response = self.client.generic(method, path, "{not json", content_type="application/json")
+                self.assertEqual(response.status_code, expected)
+
+        self.assertEqual(self.client.generic("GET", f"/api/slovenska-mesta/{self.city.id}/", "{not json",
+                                             content_type="application/json").json()["ime"], "Ljubljana")
+
+    def test_post_on_detail_route(self):
+        response = self.client.post(f"/api/slovenska-mesta/{self.city.id}/", {"ime": "Maribor"}, format="json")
+        self.assertEqual(response.status_code, 405)
+
+    def test_put_and_delete_by_path(self):
+        path = f"/api/slovenska-mesta/{self.city.id}/"
+        self.assertEqual(self.client.put(path, {"ime": "Maribor"}, format="json").status_code, 200)
+        self.assertEqual(SlovenskaMesta.objects.get(id=self.city.id).name, "Maribor")
+
+        self.assertEqual(self.client.delete(path).status_code, 200)
+        self.assertFalse(SlovenskaMesta.objects.filter(id=self.city.id).exists())
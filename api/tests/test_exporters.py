@@ -0,0 +1,50 @@
+import json
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api import exporters
+from api.models import SlovenskaMesta
+from api.tests import create_spot
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        self.spots = [create_spot(f"Spot {i}", 46 + i / 100, 14.5) for i in range(3)]
+        self.client = APIClient()
+
+    def test_ndjson(self):
+        response = self.client.get("/api/export/parkirna-mesta/")
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn('filename="parkirna-mesta.ndjson"', response["Content-Disposition"])
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [
+            {"id": spot.id, "ime": spot.name, "latitude": float(spot.latitude), "longitude": 14.5}
+            for spot in self.spots
+        ])
+
+    def test_geojson(self):
+        SlovenskaMesta.objects.create(name="Ljubljana")
+
+        spots = json.loads(b"".join(exporters.stream("parkirna-mesta", "geojson")))
+        self.assertEqual(spots["features"][0]["geometry"], {"type": "Point", "coordinates": [14.5, 46.0]})
+        self.assertEqual(spots["features"][0]["properties"], {"id": self.spots[0].id, "ime": "Spot 0"})
+
+        cities = json.loads(b"".join(exporters.stream("slovenska-mesta", "geojson")))
+        self.assertEqual([f["geometry"] for f in cities["features"]], [None])
+
+    def test_empty_geojson_is_valid(self):
+        self.assertEqual(json.loads(b"".join(exporters.stream("slovenske-ulice", "geojson")))["features"], [])
+
+    def test_validation(self):
+        self.assertEqual(self.client.get("/api/export/users/").status_code, 404)
+        self.assertEqual(self.client.get("/api/export/parkirna-mesta/", {"file_format": "xml"}).status_code, 400)
+
+    async def test_asgi_gets_an_async_iterator(self):
+        response = await self.async_client.get("/api/export/parkirna-mesta/", {"file_format": "geojson"})
+
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(json.loads(body)["features"]), 3)
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api import forecast, occupancy
+from api.tests import LJUBLJANA, UTC, create_spot
+
+
+class ForecastSlotTests(TestCase):
+
+    def test_slot_index(self):
+        self.assertEqual(forecast.slot_index(0, 0), 0)
+        self.assertEqual(forecast.slot_index(0, 8 * 60 + 29), 16)
+        self.assertEqual(forecast.slot_index(6, 23 * 60 + 59), forecast.SLOTS - 1)
+
+    def test_slot_of_uses_local_time(self):
+        # 07:10 UTC is 09:10 CEST on Monday
+        moment = datetime(2026, 10, 12, 7, 10, tzinfo=UTC)
+        self.assertEqual(forecast.slot_of(moment), forecast.slot_index(0, 9 * 60))
+
+    def test_slot_seconds_split_at_slot_boundaries(self):
+        start = datetime(2026, 10, 12, 8, 20, tzinfo=LJUBLJANA)
+        spans = list(forecast._slot_seconds(start, start + timedelta(minutes=50)))
+
+        self.assertEqual(spans, [
+            (forecast.slot_index(0, 8 * 60), 600),
+            (forecast.slot_index(0, 8 * 60 + 30), 1800),
+            (forecast.slot_index(0, 9 * 60), 600),
+        ])
+
+    def test_slot_seconds_spring_forward(self):
+        # 2026-03-29: 02:00 CET jumps to 03:00 CEST, the 02:xx slots get nothing
+        start = datetime(2026, 3, 29, 0, 50, tzinfo=UTC)
+        spans = list(forecast._slot_seconds(start, start + timedelta(minutes=20)))
+
+        self.assertEqual(spans, [(forecast.slot_index(6, 90), 600), (forecast.slot_index(6, 180), 600)])
+
+    def test_slot_seconds_fall_back(self):
+        # 2026-10-25: 03:00 CEST falls back to 02:00 CET, 02:xx is lived twice
+        start = datetime(2026, 10, 25, 0, 0, tzinfo=UTC)
+        totals = {}
+        for slot, seconds in forecast._slot_seconds(start, start + timedelta(hours=2)):
+            totals[slot] = totals.get(slot, 0) + seconds
+
+        self.assertEqual(totals, {forecast.slot_index(6, 120): 3600, forecast.slot_index(6, 150): 3600})
+
+    def test_probability_is_weighted_by_time(self):
+        spot = create_spot("Center", 46.05, 14.5)
+        start = datetime(2026, 10, 12, 8, 0, tzinfo=LJUBLJANA)
+
+        # free 08:00-08:50 with a report every 5 minutes, taken 08:50-09:00
+        for minute in range(0, 50, 5):
+            occupancy._apply({spot.id: (True, start + timedelta(minutes=minute), "sensor")})
+        occupancy._apply({spot.id: (False, start + timedelta(minutes=50), "sensor")})
+        occupancy._apply({spot.id: (True, start + timedelta(minutes=60), "sensor")})
+
+        result = forecast.forecast(spot.id, 0, 8 * 60 + 40)
+        self.assertEqual(result["slot_start"], "08:30")
+        self.assertEqual(result["observed_seconds"], 1800)
+        self.assertEqual(result["probability_free"], round(1200 / 1800, 3))
+        self.assertEqual(result["day"][16], 1.0)
+
+    @override_settings(FORECAST_MAX_GAP_SECONDS=3600)
+    def test_gap_is_capped(self):
+        spot = create_spot("Center", 46.05, 14.5)
+        start = datetime(2026, 10, 12, 8, 0, tzinfo=LJUBLJANA)
+
+        occupancy._apply({spot.id: (False, start, "sensor")})
+        occupancy._apply({spot.id: (True, start + timedelta(hours=5), "sensor")})
+
+        histogram = spot.occupancy_histogram
+        histogram.refresh_from_db()
+        self.assertEqual(sum(forecast._unpack(histogram.total)), 3600)
+        self.assertEqual(sum(forecast._unpack(histogram.free)), 0)
+
+
+class ForecastAPITests(TestCase):
+
+    def setUp(self):
+        self.spot = create_spot("Center", 46.05, 14.5)
+        self.client = APIClient()
+
+    def get(self, spot_id=None, **params):
+        return self.client.get(f"/api/parkirna-mesta/{spot_id or self.spot.id}/forecast/", params)
+
+    def test_forecast(self):
+        start = datetime(2026, 10, 12, 8, 0, tzinfo=LJUBLJANA)
+        occupancy._apply({self.spot.id: (True, start, "sensor")})
+        occupancy._apply({self.spot.id: (False, start + timedelta(minutes=30), "sensor")})
+
+        body = self.get(weekday=0, time="08:15").json()
+        self.assertEqual((body["id"], body["slot_start"], body["probability_free"]), (self.spot.id, "08:00", 1.0))
+        self.assertEqual(len(body["day"]), forecast.SLOTS_PER_DAY)
+
+    def test_spot_without_observations(self):
+        response = self.get(weekday=0, time="08:15")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()["probability_free"])
+        self.assertEqual(response.json()["observed_seconds"], 0)
+        self.assertEqual(set(response.json()["day"]), {None})
+
+    def test_unknown_spot(self):
+        self.assertEqual(self.get(spot_id=999).status_code, 404)
+
+    def test_validation(self):
+        for params in [{"time": "12:75"}, {"time": "24:00"}, {"time": "-1:30"}, {"time": "noon"}, {"weekday": 7}]:
+            with self.subTest(params=params):
+                self.assertEqual(self.get(**params).status_code, 400)
+        self.assertEqual(self.get(time="23:59").status_code, 200)
@@ -0,0 +1,106 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api import geofences, tokens
+from api.geofences import GeofenceIndex, _Circle, _Polygon
+from api.models import Geofence, ParkirnaMestaChange, User
+from api.tests.test_users import create_roles, create_user
+
+
+class GeofenceIndexTests(TestCase):
+
+    def test_match(self):
+        index = GeofenceIndex()
+        circle = _Circle(1, 10, "home", 46.05, 14.5, 500)
+        triangle = _Polygon(2, 20, "work", [(46.0, 14.4), (46.1, 14.4), (46.05, 14.6)])
+        country = _Circle(3, 30, "everywhere", 46.0, 14.8, 50000)
+        for fence in (circle, triangle, country):
+            index.add(fence)
+
+        self.assertEqual(sorted(f.id for f in index.match(46.051, 14.5)), [1, 2, 3])
+        self.assertEqual(sorted(f.id for f in index.match(46.09, 14.55)), [3])
+        self.assertEqual(list(index.match(40, 10)), [])
+
+        index.remove(1)
+        self.assertEqual(sorted(f.id for f in index.match(46.051, 14.5)), [2, 3])
+        self.assertEqual(index.size, 2)
+
+    def test_readding_replaces(self):
+        index = GeofenceIndex()
+        index.add(_Circle(1, 10, "home", 46.05, 14.5, 500))
+        index.add(_Circle(1, 10, "home", 45.0, 14.5, 500))
+
+        self.assertEqual(list(index.match(46.05, 14.5)), [])
+        self.assertEqual(index.size, 1)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class GeofenceAPITests(TestCase):
+
+    def setUp(self):
+        create_roles()
+        self.user = create_user("ana")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens.issue(self.user)}")
+
+        # a fresh index for every test, loaded from the test database
+        for name in ("_index", "_index_version"):
+            patcher = mock.patch.object(geofences, name, None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def create(self, **data):
+        return self.client.post("/api/geofences/", {"name": "home", "latitude": 46.05, "longitude": 14.5,
+                                                    "radius": 500, **data}, format="json")
+
+    def test_create_list_and_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            fence = self.create().json()
+
+        self.assertEqual(fence["kind"], Geofence.CIRCLE)
+        self.assertEqual(self.client.get("/api/geofences/").json(), [fence])
+        self.assertEqual(self.client.get(f"/api/geofences/{fence['id']}/").json(), fence)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens.issue(create_user('bor'))}")
+        self.assertEqual(self.client.get(f"/api/geofences/{fence['id']}/").status_code, 404)
+        self.assertEqual(self.client.delete(f"/api/geofences/{fence['id']}/").status_code, 404)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens.issue(self.user)}")
+        self.assertEqual(self.client.delete(f"/api/geofences/{fence['id']}/").status_code, 200)
+        self.assertEqual(self.client.get("/api/geofences/").json(), [])
+
+    def test_validation(self):
+        for data in [{"radius": 0}, {"latitude": 91}, {"radius": None}, {"points": [[46, 14], [46.1, 14]]}]:
+            with self.subTest(data=data):
+                self.assertEqual(self.create(**data).status_code, 400)
+
+        self.client.credentials()
+        self.assertEqual(self.create().status_code, 401)
+
+    @mock.patch.object(geofences, "GEOFENCE_MAX_PER_USER", 1)
+    def test_limit_per_user(self):
+        self.assertEqual(self.create().status_code, 201)
+        self.assertEqual(self.create().status_code, 400)
+
+    def test_deleted_user(self):
+        User.objects.filter(id=self.user.id).delete()
+        self.assertEqual(self.create().status_code, 401)
+
+    def test_dispatch_alerts_the_owner(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            fence_id = self.create().json()["id"]
+            self.create(name="far", latitude=45.0)
+
+        changes = [
+            {"seq": 1, "op": ParkirnaMestaChange.CREATE, "id": 5, "latitude": 46.051, "longitude": 14.5},
+            {"seq": 2, "op": ParkirnaMestaChange.DELETE, "id": 6, "latitude": 46.051, "longitude": 14.5},
+        ]
+        with mock.patch.object(geofences.pubsub, "publish") as publish:
+            geofences.dispatch(changes)
+
+        publish.assert_called_once()
+        channel, alerts = publish.call_args.args
+        self.assertEqual(channel, geofences.alerts_channel(self.user.id))
+        self.assertEqual([(alert["id"], alert["geofence_id"]) for alert in alerts], [(5, fence_id)])
@@ -0,0 +1,91 @@
+import io
+import json
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api import importers
+from api.importers import ImportFormatError, RowError, import_records, iter_records
+from api.models import ParkirnaMesta, SlovenskeUlice
+
+
+def feature(name, latitude=46.05, longitude=14.5):
+    return json.dumps({
+        "type": "Feature",
+        "properties": {"ime": name},
+        "geometry": {"type": "Point", "coordinates": [longitude, latitude]}
+    })
+
+
+def collection(*features):
+    return '{"type": "FeatureCollection", "features": [' + ", ".join(features) + "]}"
+
+
+def parse(body, fmt):
+    return [
+        (number, str(record) if isinstance(record, RowError) else record)
+        for number, record in iter_records(io.BytesIO(body.encode()), fmt)
+    ]
+
+
+class ParserTests(TestCase):
+
+    def test_csv(self):
+        self.assertEqual(parse("﻿ime,latitude\nA,1\nB,2\n", "csv"),
+                         [(1, {"ime": "A", "latitude": "1"}), (2, {"ime": "B", "latitude": "2"})])
+
+    def test_ndjson(self):
+        self.assertEqual(parse('{"ime": "A"}\n\nnot json\n{"ime": "C"}\n', "ndjson"),
+                         [(1, {"ime": "A"}), (3, "Invalid JSON"), (4, {"ime": "C"})])
+
+    def test_geojson(self):
+        records = parse(collection(feature("A"), feature("B")), "geojson")
+        self.assertEqual([(number, record["properties"]["ime"]) for number, record in records], [(1, "A"), (2, "B")])
+
+    def test_geojson_resumes_after_a_malformed_feature(self):
+        body = collection(feature("A"), '{"type": "Feature", "properties": {"ime": "x\\" ,]"}, bad}', feature("C"),
+                          "{oops}", feature("E"))
+        records = parse(body, "geojson")
+
+        self.assertEqual([number for number, _ in records], [1, 2, 3, 4, 5])
+        self.assertEqual([record if isinstance(record, str) else record["properties"]["ime"] for _, record in records],
+                         ["A", "Invalid JSON", "C", "Invalid JSON", "E"])
+
+    def test_geojson_skips_an_oversized_feature(self):
+        big = json.dumps({"type": "Feature", "properties": {"ime": "x" * 500, "note": "\\" * 301}})
+        with mock.patch.object(importers, "MAX_FEATURE_SIZE", 100), mock.patch.object(importers, "_READ_SIZE", 16):
+            records = parse(collection(feature("A"), big, feature("C")), "geojson")
+
+        self.assertEqual([number for number, _ in records], [1, 2, 3])
+        self.assertIn("larger than 100", records[1][1])
+        self.assertEqual(records[2][1]["properties"]["ime"], "C")
+
+    def test_geojson_without_features(self):
+        with self.assertRaises(ImportFormatError):
+            parse('{"type": "FeatureCollection"}', "geojson")
+
+        with self.assertRaises(ImportFormatError):
+            parse('{"type": "FeatureCollection", "features": [' + feature("A"), "geojson")
+
+
+class ImportTests(TestCase):
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        body = "ime,latitude,longitude\nCenter,46.05,14.5\n,46,14\nFar,95,14\nStation,46.06,14.51\n"
+        report = import_records("parkirna-mesta", iter_records(io.BytesIO(body.encode()), "csv"), batch_size=2)
+
+        self.assertEqual(report["created"], 2)
+        self.assertEqual([error["row"] for error in report["errors"]], [2, 3])
+        self.assertEqual(sorted(ParkirnaMesta.objects.values_list("name", flat=True)), ["Center", "Station"])
+
+    def test_endpoint(self):
+        client = APIClient()
+        response = client.generic("POST", "/api/import/slovenske-ulice/", '{"ime": "Čopova"}\n{"name": "Trubarjeva"}\n',
+                                  content_type="application/x-ndjson")
+
+        self.assertEqual(response.json()["created"], 2)
+        self.assertEqual(SlovenskeUlice.objects.get(name="Čopova").name_normalized, "copova")
+
+        response = client.generic("POST", "/api/import/slovenske-ulice/", "ime\nA\n", content_type="text/plain")
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,99 @@
+import json
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api import live, pubsub
+from api.hooks import CHANNEL
+from api.models import ParkirnaMestaChange
+
+
+def message(seq, latitude, longitude, previous=None):
+    result = {"seq": seq, "op": ParkirnaMestaChange.UPDATE, "id": seq, "ime": "Spot",
+              "latitude": latitude, "longitude": longitude}
+    if previous is not None:
+        result["previous"] = {"latitude": previous[0], "longitude": previous[1]}
+    return result
+
+
+def data(event):
+    return json.loads(event.split("data: ", 1)[1])
+
+
+class AreaTests(TestCase):
+
+    def test_matches(self):
+        area = live.BBoxArea(46, 14, 46.1, 14.6)
+
+        self.assertTrue(live.matches(area, message(1, 46.05, 14.5)))
+        self.assertFalse(live.matches(area, message(1, 45, 14.5)))
+        # moved out of the area, the client must hear about it
+        self.assertTrue(live.matches(area, message(1, 45, 14.5, previous=(46.05, 14.5))))
+        self.assertTrue(live.matches(area, {"seq": 1, "op": ParkirnaMestaChange.DELETE, "latitude": None}))
+
+        self.assertTrue(live.matches(live.CircleArea(46.05, 14.5, 200), message(1, 46.051, 14.5)))
+        self.assertFalse(live.matches(live.CircleArea(46.05, 14.5, 50), message(1, 46.051, 14.5)))
+
+
+class StreamTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        for name, latitude in (("Center", 46.05), ("Far", 45.0)):
+            self.client.post("/api/parkirna-mesta/", {"ime": name, "latitude": latitude, "longitude": 14.5},
+                             format="json")
+
+    async def test_live_changes_inside_the_area(self):
+        events = live.stream(live.BBoxArea(46, 14, 46.1, 14.6))
+        try:
+            self.assertEqual(await anext(events), f"retry: {live.LIVE_RETRY_MS}\n\n")
+            pubsub.hub().deliver(CHANNEL, [message(100, 45, 14.5), message(101, 46.05, 14.5)])
+
+            event = await anext(events)
+            self.assertTrue(event.startswith(f"id: 101\nevent: {ParkirnaMestaChange.UPDATE}\n"))
+            self.assertEqual(data(event)["latitude"], 46.05)
+        finally:
+            await events.aclose()
+
+    async def test_replay_then_live(self):
+        events = live.stream(live.BBoxArea(46, 14, 46.1, 14.6), since=0)
+        try:
+            await anext(events)
+            replayed = await anext(events)
+            self.assertEqual(data(replayed)["ime"], "Center")
+
+            # already replayed changes are not sent twice
+            pubsub.hub().deliver(CHANNEL, [message(data(replayed)["seq"], 46.05, 14.5), message(100, 46.05, 14.5)])
+            self.assertEqual(data(await anext(events))["seq"], 100)
+        finally:
+            await events.aclose()
+
+    @mock.patch.object(live, "LIVE_HEARTBEAT_SECONDS", 0.01)
+    async def test_heartbeat(self):
+        events = live.stream()
+        try:
+            await anext(events)
+            self.assertEqual(await anext(events), ": ping\n\n")
+        finally:
+            await events.aclose()
+
+    @mock.patch.object(pubsub, "SUBSCRIBER_QUEUE_SIZE", 1)
+    async def test_slow_client_is_reset(self):
+        events = live.stream()
+        try:
+            await anext(events)
+            pubsub.hub().deliver(CHANNEL, [message(100, 46.05, 14.5), message(101, 46.05, 14.5)])
+
+            self.assertEqual(data(await anext(events))["seq"], 100)
+            self.assertEqual(await anext(events), "event: reset\ndata: {}\n\n")
+            with self.assertRaises(StopAsyncIteration):
+                await anext(events)
+        finally:
+            await events.aclose()
+
+    async def test_endpoint_validation(self):
+        response = await self.async_client.get("/api/parkirna-mesta/live/", {"min_latitude": 46},
+                                               HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.content.startswith(b"event: error\n"))
@@ -0,0 +1,56 @@
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api import nearest
+from api.tests import create_spot
+
+
+class NearestBatchTests(TestCase):
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        # table versions roll back with each test, so drop the array built by an earlier one
+        nearest._array = None
+
+        self.center = create_spot("Center", 46.05, 14.5)
+        self.close = create_spot("Close", 46.051, 14.5)
+        self.far = create_spot("Far", 46.1, 14.5)
+        self.client = APIClient()
+
+    def post(self, body):
+        return self.client.post("/api/parkirna-mesta/nearest/", body, format="json")
+
+    def test_nearest_per_position(self):
+        response = self.post({"positions": [[46.05, 14.5], [46.1, 14.5]], "k": 2})
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([spot["id"] for spot in results[0]], [self.center.id, self.close.id])
+        self.assertEqual([spot["id"] for spot in results[1]][0], self.far.id)
+        self.assertEqual(results[0][0]["distance"], 0.0)
+
+    def test_radius_limits_results(self):
+        response = self.post({"positions": [[46.05, 14.5]], "k": 3, "radius": 500})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([spot["id"] for spot in response.json()["results"][0]], [self.center.id, self.close.id])
+
+    def test_list_body_is_rejected(self):
+        self.assertEqual(self.post([[46.05, 14.5]]).status_code, 400)
+
+    def test_non_finite_radius_is_rejected(self):
+        for radius in ("NaN", "Infinity", "-Infinity"):
+            self.assertEqual(self.post({"positions": [[46.05, 14.5]], "radius": radius}).status_code, 400)
+
+    def test_non_finite_position_is_rejected(self):
+        self.assertEqual(self.post({"positions": [["NaN", 14.5]]}).status_code, 400)
+
+    def test_limits(self):
+        self.assertEqual(self.post({"positions": []}).status_code, 400)
+        too_many = [[46.05, 14.5]] * (nearest.BATCH_NEAREST_MAX_POSITIONS + 1)
+        self.assertEqual(self.post({"positions": too_many}).status_code, 400)
+        self.assertEqual(self.post({"positions": [[46.05, 14.5]], "k": 0}).status_code, 400)
+        self.assertEqual(self.post({"positions": [[46.05, 14.5]], "k": nearest.BATCH_NEAREST_MAX_K + 1}).status_code, 400)
+        self.assertEqual(self.post({"positions": [[46.05, 14.5]], "radius": -1}).status_code, 400)
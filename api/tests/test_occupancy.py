@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api import occupancy
+from api.models import ParkirnaMestaOccupancy
+from api.tests import create_spot
+
+
+class OccupancyTests(TestCase):
+
+    def setUp(self):
+        self.spot = create_spot("Center", 46.05, 14.5)
+        self.other = create_spot("Station", 46.06, 14.51)
+        self.now = timezone.now()
+
+    def report(self, spot, free, seconds):
+        occupancy._apply({spot.id: (free, self.now + timedelta(seconds=seconds), "sensor")})
+
+    def stored(self, spot):
+        return ParkirnaMestaOccupancy.objects.values_list("free", "reported_at").get(spot=spot)
+
+    def test_late_report_does_not_overwrite_newer_state(self):
+        self.report(self.spot, True, 10)
+        self.report(self.spot, False, 5)
+
+        self.assertEqual(self.stored(self.spot), (True, self.now + timedelta(seconds=10)))
+
+    def test_state_written_by_another_worker_is_compared(self):
+        self.report(self.spot, True, 0)
+        self.report(self.spot, False, 1)
+        self.report(self.spot, True, 2)
+
+        self.assertTrue(self.stored(self.spot)[0])
+
+    @override_settings(OCCUPANCY_REFRESH_SECONDS=300)
+    def test_unchanged_state_is_written_only_when_due(self):
+        self.report(self.spot, True, 0)
+        self.report(self.spot, True, 60)
+        self.assertEqual(self.stored(self.spot)[1], self.now)
+
+        self.report(self.spot, True, 300)
+        self.assertEqual(self.stored(self.spot)[1], self.now + timedelta(seconds=300))
+
+    def test_upsert_never_replaces_a_newer_row(self):
+        ParkirnaMestaOccupancy.objects.create(spot=self.spot, free=True, reported_at=self.now, source="sensor")
+
+        written = occupancy._upsert([
+            (self.spot.id, (False, self.now - timedelta(seconds=1), "crowd")),
+            (self.other.id, (False, self.now, "crowd")),
+        ])
+
+        self.assertEqual(written, {self.other.id})
+        self.assertTrue(self.stored(self.spot)[0])
+
+    def test_free_filters(self):
+        self.report(self.spot, True, 0)
+        self.report(self.other, False, 0)
+        client = APIClient()
+
+        nearby = client.get("/api/parkirna-mesta/nearby/", {
+            "latitude": 46.05, "longitude": 14.5, "radius": 5000, "free": "true"
+        }).json()
+        self.assertEqual([(spot["id"], spot["free"]) for spot in nearby], [(self.spot.id, True)])
+
+        bbox = client.get("/api/parkirna-mesta/bbox/", {
+            "min_latitude": 46, "min_longitude": 14.4, "max_latitude": 46.1, "max_longitude": 14.6, "free": "false"
+        }).json()
+        self.assertEqual([(spot["id"], spot["free"]) for spot in bbox["results"]], [(self.other.id, False)])
+
+        self.assertEqual(client.get("/api/parkirna-mesta/nearby/", {
+            "latitude": 46.05, "longitude": 14.5, "radius": 5000, "free": "maybe"
+        }).status_code, 400)
@@ -0,0 +1,38 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.models import SlovenskaMesta
+
+
+class KeysetPageTests(TestCase):
+
+    def setUp(self):
+        self.ids = [SlovenskaMesta.objects.create(name=f"City {i}").id for i in range(5)]
+        self.client = APIClient()
+
+    def pages(self, **params):
+        params = {"page_size": 2, **params}
+        while True:
+            body = self.client.get("/api/slovenska-mesta/", params).json()
+            yield [city["id"] for city in body["results"]]
+            if body["next_cursor"] is None:
+                return
+            params["cursor"] = body["next_cursor"]
+
+    def test_pages_cover_every_row_once(self):
+        self.assertEqual(list(self.pages()), [self.ids[:2], self.ids[2:4], self.ids[4:]])
+
+    def test_cursor_is_not_shifted_by_deletes(self):
+        first = self.client.get("/api/slovenska-mesta/", {"page_size": 2}).json()
+        SlovenskaMesta.objects.filter(id__in=self.ids[:2]).delete()
+
+        second = self.client.get("/api/slovenska-mesta/", {"page_size": 2, "cursor": first["next_cursor"]}).json()
+        self.assertEqual([city["id"] for city in second["results"]], self.ids[2:4])
+
+    def test_invalid_cursor_and_page_size(self):
+        self.assertEqual(self.client.get("/api/slovenska-mesta/", {"cursor": "forged"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/slovenska-mesta/", {"page_size": "many"}).status_code, 400)
+
+    def test_unpaginated_list_is_unchanged(self):
+        body = self.client.get("/api/slovenska-mesta/").json()
+        self.assertEqual([city["id"] for city in body], self.ids)
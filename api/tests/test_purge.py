@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.db.models.query import QuerySet
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api import defaults, purge, tokens
+from api.models import User, UserData, UserPurge
+from api.tests.test_users import create_roles, create_user
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class PurgeTests(TestCase):
+
+    def setUp(self):
+        create_roles()
+        self.user = create_user("ana")
+        UserData.objects.bulk_create([UserData(user=self.user, ts_ins=timezone.now()) for _ in range(5)])
+
+        # jobs are run by the test, not by the background thread
+        patcher = mock.patch.object(purge, "start")
+        self.start = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_small_history_is_deleted_inline(self):
+        self.assertIsNone(purge.delete_user(self.user.id))
+
+        self.assertFalse(User.objects.filter(id=self.user.id).exists())
+        self.assertFalse(UserData.objects.exists())
+
+    @mock.patch.object(purge, "PURGE_INLINE_ROWS", 2)
+    def test_large_history_is_purged_in_chunks(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = purge.delete_user(self.user.id)
+        self.start.assert_called_once_with(job.id)
+        self.assertTrue(User.objects.filter(id=self.user.id).exists())
+
+        job = purge.run(job.id, chunk_size=2)
+
+        self.assertEqual((job.status, job.deleted_rows), (UserPurge.DONE, 5))
+        self.assertFalse(User.objects.filter(id=self.user.id).exists())
+
+    @mock.patch.object(purge, "PURGE_INLINE_ROWS", 2)
+    def test_failed_job_resumes(self):
+        job = purge.delete_user(self.user.id)
+        self.assertEqual(purge.delete_user(self.user.id).id, job.id)
+
+        with mock.patch.object(QuerySet, "delete", side_effect=RuntimeError("database is down")):
+            job = purge.run(job.id, chunk_size=2)
+        self.assertEqual((job.status, job.error), (UserPurge.FAILED, "database is down"))
+
+        self.assertEqual([job.status for job in purge.resume(chunk_size=2)], [UserPurge.DONE])
+        self.assertFalse(UserData.objects.exists())
+
+    @mock.patch.object(purge, "PURGE_INLINE_ROWS", 2)
+    def test_endpoints(self):
+        other = create_user("bor")
+        admin = create_user("admin", role_id=defaults.ADMIN_ROLE_ID)
+        client = APIClient()
+
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens.issue(admin)}")
+        response = client.delete("/api/delete-user/", {"target_user_id": self.user.id}, format="json")
+        self.assertEqual(response.status_code, 202)
+        path = f"/api/user-purges/{response.json()['purge_id']}/"
+
+        self.assertEqual(client.get(path).json()["status"], UserPurge.PENDING)
+
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens.issue(other)}")
+        self.assertEqual(client.get(path).status_code, 404)
+        client.credentials()
+        self.assertEqual(client.get(path).status_code, 401)
@@ -0,0 +1,65 @@
+from django.core.cache import cache, caches
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api import reference_cache, versions
+from api.models import SlovenskaMesta, SlovenskeUlice
+
+
+class ReferenceCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        caches["reference"].clear()
+        self.city = SlovenskaMesta.objects.create(name="Ljubljana")
+        self.client = APIClient()
+
+    def test_loader_runs_once(self):
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return "value"
+
+        for _ in range(2):
+            self.assertEqual(reference_cache.get_or_load(versions.SLOVENSKA_MESTA, "key", loader), "value")
+        self.assertEqual(len(calls), 1)
+
+    def test_none_is_not_cached(self):
+        calls = []
+
+        def loader():
+            calls.append(1)
+
+        for _ in range(2):
+            self.assertIsNone(reference_cache.get_or_load(versions.SLOVENSKA_MESTA, "key", loader))
+        self.assertEqual(len(calls), 2)
+
+    def test_detail_is_read_through(self):
+        path = f"/api/slovenska-mesta/{self.city.id}/"
+        self.client.get(path)
+
+        # the version lookup is cached too, so the row is not read again
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(path).json()["ime"], "Ljubljana")
+
+    def test_writes_invalidate_list_and_detail(self):
+        path = f"/api/slovenska-mesta/{self.city.id}/"
+        self.client.get(path)
+        self.client.get("/api/slovenska-mesta/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(path, {"ime": "Maribor"}, format="json")
+
+        self.assertEqual(self.client.get(path).json()["ime"], "Maribor")
+        self.assertEqual([city["ime"] for city in self.client.get("/api/slovenska-mesta/").json()], ["Maribor"])
+
+    def test_street_delete_invalidates(self):
+        street = SlovenskeUlice.objects.create(name="Trubarjeva", name_normalized="trubarjeva")
+        path = f"/api/slovenske-ulice/{street.id}/"
+        self.client.get(path)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(path)
+
+        self.assertEqual(self.client.get(path).status_code, 404)
@@ -0,0 +1,68 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.db.models import Sum
+from django.db.models.query import QuerySet
+from django.test import TestCase
+from django.utils import timezone
+
+from api import retention
+from api.models import Role, User, UserData, UserDataDaily
+
+
+class RetentionTests(TestCase):
+
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir)
+
+        role = Role.objects.create(name="user")
+        now = timezone.now()
+        self.old_ids = set()
+        for n in range(3):
+            user = User.objects.create(
+                username=f"user{n}", email=f"user{n}@example.com", password="x",
+                name="Name", surname="Surname", role=role
+            )
+            old = UserData.objects.bulk_create([
+                UserData(user=user, ts_ins=now - timedelta(days=100 + 10 * i), description=f"old {n}.{i}")
+                for i in range(n * 3)
+            ])
+            self.old_ids.update(row.id for row in old)
+            UserData.objects.create(user=user, ts_ins=now, description="recent")
+
+    def archived_ids(self):
+        ids = []
+        for name in sorted(os.listdir(self.archive_dir)):
+            with gzip.open(os.path.join(self.archive_dir, name), "rt", encoding="utf-8") as f:
+                ids.extend(json.loads(line)["id"] for line in f)
+        return ids
+
+    def test_archive_and_delete(self):
+        removed = retention.apply_retention(days=90, chunk_size=4, archive_dir=self.archive_dir)
+
+        self.assertEqual(removed, len(self.old_ids))
+        self.assertEqual(sorted(self.archived_ids()), sorted(self.old_ids))
+        self.assertEqual(UserData.objects.count(), 3)
+        self.assertEqual(UserDataDaily.objects.aggregate(events=Sum("events"))["events"], len(self.old_ids))
+        self.assertFalse([name for name in os.listdir(self.archive_dir) if name.endswith(".tmp")])
+
+    def test_failed_delete_removes_the_chunk_archive(self):
+        with mock.patch.object(QuerySet, "delete", side_effect=RuntimeError("database is down")):
+            with self.assertRaises(RuntimeError):
+                retention.apply_retention(days=90, chunk_size=4, archive_dir=self.archive_dir)
+
+        self.assertEqual(os.listdir(self.archive_dir), [])
+        self.assertEqual(UserData.objects.count(), len(self.old_ids) + 3)
+
+    def test_second_run_removes_nothing(self):
+        retention.apply_retention(days=90, chunk_size=4, archive_dir=self.archive_dir)
+        files = sorted(os.listdir(self.archive_dir))
+
+        self.assertEqual(retention.apply_retention(days=90, chunk_size=4, archive_dir=self.archive_dir), 0)
+        self.assertEqual(sorted(os.listdir(self.archive_dir)), files)
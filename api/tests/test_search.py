@@ -0,0 +1,60 @@
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.models import SlovenskeUlice
+from api.search import autocomplete_streets
+from api.text import normalize_name
+
+
+def create_street(name):
+    return SlovenskeUlice.objects.create(name=name, name_normalized=normalize_name(name))
+
+
+class NormalizeNameTests(TestCase):
+
+    def test_normalize(self):
+        self.assertEqual(normalize_name("Čopova  ulica"), "copova ulica")
+        self.assertEqual(normalize_name(" ŠKOFJELOŠKA cesta "), "skofjeloska cesta")
+        self.assertEqual(normalize_name("Đakovićeva"), "dakoviceva")
+
+
+class AutocompleteTests(TestCase):
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.client = APIClient()
+
+    def names(self, query, limit=10):
+        return [street["ime"] for street in autocomplete_streets(query, limit)]
+
+    def test_diacritics_are_optional(self):
+        create_street("Čopova ulica")
+        create_street("Cankarjeva cesta")
+
+        self.assertEqual(self.names("cop"), ["Čopova ulica"])
+        self.assertEqual(self.names("ČOP"), ["Čopova ulica"])
+
+    def test_exact_match_then_shorter_names(self):
+        for name in ["Trg republike", "Trg", "Trg OF"]:
+            create_street(name)
+
+        self.assertEqual(self.names("trg"), ["Trg", "Trg OF", "Trg republike"])
+
+    def test_ranking_covers_every_match(self):
+        # alphabetically early long names must not push out a short late one
+        for i in range(30):
+            create_street(f"Ca ulica {i:02d} z dolgim imenom")
+        create_street("Cz")
+
+        self.assertEqual(self.names("c", limit=2)[0], "Cz")
+
+    def test_endpoint(self):
+        create_street("Čopova ulica")
+
+        response = self.client.get("/api/slovenske-ulice/autocomplete/", {"q": "copo"})
+        self.assertEqual([street["ime"] for street in response.json()], ["Čopova ulica"])
+        self.assertEqual(self.client.get("/api/slovenske-ulice/autocomplete/", {"q": " "}).status_code, 400)
+        self.assertEqual(self.client.get("/api/slovenske-ulice/autocomplete/", {"q": "c", "limit": "x"}).status_code,
+                         400)
@@ -0,0 +1,53 @@
+import gzip
+import json
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api import snapshot
+from api.tests import create_spot
+
+
+class SnapshotTests(TestCase):
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        patcher = mock.patch.object(snapshot, "_current", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.spot = create_spot("Center", 46.05, 14.5)
+        self.client = APIClient()
+
+    def get(self, accept_encoding):
+        return self.client.get("/api/parkirna-mesta/", HTTP_ACCEPT_ENCODING=accept_encoding)
+
+    def test_identity(self):
+        response = self.get("")
+        self.assertNotIn("Content-Encoding", response)
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(json.loads(response.content), [
+            {"id": self.spot.id, "ime": "Center", "latitude": 46.05, "longitude": 14.5}
+        ])
+
+    def test_gzip(self):
+        response = self.get("gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), self.get("").content)
+
+    def test_preferences(self):
+        self.assertEqual(snapshot._pick_encoding("gzip;q=0, identity", {"identity": b"", "gzip": b""}), "identity")
+        self.assertEqual(snapshot._pick_encoding("br, gzip", {"identity": b"", "gzip": b"", "br": b""}), "br")
+        self.assertEqual(snapshot._pick_encoding("br", {"identity": b"", "gzip": b""}), "identity")
+
+    def test_rebuilt_after_a_write(self):
+        self.get("")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/parkirna-mesta/", {"ime": "Station", "latitude": 46.06, "longitude": 14.51},
+                             format="json")
+
+        self.assertEqual(len(json.loads(self.get("").content)), 2)
@@ -0,0 +1,80 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.geo import geohash_encode, haversine_m
+from api.spatial import nearest_spots, spots_within
+from api.tests import create_spot
+
+
+class GeohashTests(TestCase):
+
+    def test_encode(self):
+        self.assertEqual(geohash_encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+        self.assertEqual(geohash_encode(46.05, 14.5, 5), geohash_encode(46.05, 14.5)[:5])
+
+    def test_spot_gets_its_geohash(self):
+        spot = create_spot("Center", 46.05, 14.5)
+        self.assertEqual(spot.geohash, geohash_encode(46.05, 14.5))
+
+
+class NearbyTests(TestCase):
+
+    def setUp(self):
+        self.center = create_spot("Center", 46.05, 14.5)
+        self.close = create_spot("Close", 46.051, 14.5)
+        self.far = create_spot("Far", 46.1, 14.5)
+        self.client = APIClient()
+
+    def test_spots_within_radius_closest_first(self):
+        found = spots_within(46.0501, 14.5, 500)
+        self.assertEqual([spot.id for _, spot in found], [self.center.id, self.close.id])
+        self.assertAlmostEqual(found[0][0], haversine_m(46.0501, 14.5, 46.05, 14.5), places=3)
+
+    def test_nearest_spots_grows_the_radius(self):
+        found = nearest_spots(46.05, 14.5, 3)
+        self.assertEqual([spot.id for _, spot in found], [self.center.id, self.close.id, self.far.id])
+
+    def test_nearby_endpoint(self):
+        response = self.client.get("/api/parkirna-mesta/nearby/", {"latitude": 46.05, "longitude": 14.5, "k": 2})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([spot["id"] for spot in response.json()], [self.center.id, self.close.id])
+        self.assertEqual(response.json()[0]["distance"], 0.0)
+
+    def test_nearby_validation(self):
+        for params in [
+            {"latitude": 46.05, "longitude": 14.5},
+            {"latitude": 46.05, "longitude": 14.5, "radius": 0},
+            {"latitude": 46.05, "longitude": 14.5, "k": 1000},
+            {"latitude": 91, "longitude": 14.5, "k": 1},
+            {"latitude": "north", "longitude": 14.5, "k": 1},
+        ]:
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get("/api/parkirna-mesta/nearby/", params).status_code, 400)
+
+
+class BBoxTests(TestCase):
+
+    def setUp(self):
+        self.inside = [create_spot(f"Inside {i}", 46.05 + i / 1000, 14.5) for i in range(3)]
+        create_spot("Outside", 46.2, 14.5)
+        self.client = APIClient()
+
+    def get(self, **params):
+        return self.client.get("/api/parkirna-mesta/bbox/", {
+            "min_latitude": 46, "min_longitude": 14.4, "max_latitude": 46.1, "max_longitude": 14.6, **params
+        })
+
+    def test_spots_in_the_box(self):
+        body = self.get().json()
+        self.assertEqual([spot["id"] for spot in body["results"]], [spot.id for spot in self.inside])
+        self.assertFalse(body["truncated"])
+
+    def test_limit_truncates(self):
+        body = self.get(limit=2).json()
+        self.assertEqual(len(body["results"]), 2)
+        self.assertTrue(body["truncated"])
+
+    def test_validation(self):
+        self.assertEqual(self.get(min_latitude=46.2).status_code, 400)
+        self.assertEqual(self.get(max_longitude="east").status_code, 400)
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from api import defaults, ingest, tokens
+from api.buffering import BufferFull
+from api.models import UserData
+from api.tests import UTC
+from api.tests.test_users import create_roles, create_user
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class IngestTests(TestCase):
+
+    def setUp(self):
+        create_roles()
+        self.user = create_user("ana")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens.issue(self.user)}")
+
+    def post(self, events):
+        return self.client.post("/api/user-data/", {"events": events}, format="json")
+
+    def test_events_are_buffered(self):
+        with mock.patch.object(ingest, "submit") as submit:
+            response = self.post([{"description": "parked", "ts_ins": "2026-10-12T08:00:00Z"}, {}])
+
+        self.assertEqual((response.status_code, response.json()["accepted"]), (202, 2))
+        (events,), _ = submit.call_args
+        self.assertEqual([(event.user_id, event.description) for event in events],
+                         [(self.user.id, "parked"), (self.user.id, "")])
+        self.assertEqual(events[0].ts_ins, datetime(2026, 10, 12, 8, tzinfo=UTC))
+
+    def test_invalid_events(self):
+        response = self.post([{"description": 5}, {"ts_ins": "yesterday"}, "event"])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error["index"] for error in response.json()["errors"]], [0, 1, 2])
+        self.assertEqual(self.post([]).status_code, 400)
+
+        self.client.credentials()
+        self.assertEqual(self.post([{}]).status_code, 401)
+
+    def test_full_buffer_returns_503(self):
+        with mock.patch.object(ingest, "submit", side_effect=BufferFull()):
+            response = self.post([{}])
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class HistoryTests(TestCase):
+
+    def setUp(self):
+        create_roles()
+        self.user = create_user("ana")
+        start = datetime(2026, 10, 12, 8, tzinfo=UTC)
+        # two events share a timestamp, the id breaks the tie
+        self.events = [
+            UserData.objects.create(user=self.user, ts_ins=start + timedelta(minutes=minutes), description=str(i))
+            for i, minutes in enumerate([0, 10, 10, 20, 30])
+        ]
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens.issue(self.user)}")
+
+    def pages(self, **params):
+        params = {"page_size": 2, **params}
+        while True:
+            body = self.client.get("/api/user-data/", params).json()
+            yield [event["description"] for event in body["results"]]
+            if body["next_cursor"] is None:
+                return
+            params["cursor"] = body["next_cursor"]
+
+    def test_newest_first(self):
+        self.assertEqual(list(self.pages()), [["4", "3"], ["2", "1"], ["0"]])
+
+    def test_oldest_first(self):
+        self.assertEqual(list(self.pages(order="asc")), [["0", "1"], ["2", "3"], ["4"]])
+
+    def test_time_range(self):
+        pages = self.pages(**{"from": "2026-10-12T08:10:00Z", "to": "2026-10-12T08:30:00Z"})
+        self.assertEqual(list(pages), [["3", "2"], ["1"]])
+
+    def test_other_users_history(self):
+        other = create_user("bor")
+        admin = create_user("admin", role_id=defaults.ADMIN_ROLE_ID)
+
+        self.assertEqual(self.client.get("/api/user-data/", {"user_id": other.id}).status_code, 403)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens.issue(admin)}")
+        response = self.client.get("/api/user-data/", {"user_id": self.user.id})
+        self.assertEqual(len(response.json()["results"]), 5)
+
+    def test_validation(self):
+        for params in [{"order": "up"}, {"from": "yesterday"}, {"cursor": "forged"}, {"user_id": "me"}]:
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get("/api/user-data/", params).status_code, 400)
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class IngestWriteTests(TransactionTestCase):
+    # foreign keys are only checked when the batch commits
+
+    @mock.patch("api.ingest.close_old_connections")
+    def test_events_of_deleted_users_are_dropped(self, close_old_connections):
+        create_roles()
+        users = [create_user("ana"), create_user("bor")]
+        events = [ingest.build_event(user.id, {"description": user.username}) for user in users]
+        users[1].delete()
+
+        ingest._write(events)
+
+        self.assertEqual(list(UserData.objects.values_list("description", flat=True)), ["ana"])
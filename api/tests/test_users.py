@@ -0,0 +1,174 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core import signing
+from django.core.cache import caches
+from django.db import IntegrityError
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from api import defaults, hashing, tokens
+from api.models import Role, User
+from api.views import _unique_columns, unique_conflict
+
+
+def create_roles():
+    Role.objects.create(id=defaults.ADMIN_ROLE_ID, name="admin")
+    Role.objects.create(id=defaults.DEFAULT_ROLE_ID, name="user")
+    defaults.invalidate()
+
+
+def create_user(username, role_id=defaults.DEFAULT_ROLE_ID, password="password1"):
+    return User.objects.create(
+        username=username, email=f"{username}@example.com", password=make_password(password),
+        name="Name", surname="Surname", role_id=role_id
+    )
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class SignupTests(TransactionTestCase):
+    # a failed INSERT outside a savepoint breaks the enclosing test transaction
+
+    def setUp(self):
+        create_roles()
+        self.client = APIClient()
+
+    def signup(self, **fields):
+        data = {"username": "ana", "password": "password1", "name": "Ana", "surname": "Novak",
+                "email": "ana@example.com", **fields}
+        return self.client.post("/api/signup/", data, format="json")
+
+    def test_signup(self):
+        response = self.signup()
+
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.get(id=response.json()["user_id"])
+        self.assertEqual(user.role_id, defaults.DEFAULT_ROLE_ID)
+        self.assertNotEqual(user.password, "password1")
+
+    def test_conflicts(self):
+        self.signup()
+
+        response = self.signup(email="other@example.com")
+        self.assertEqual((response.status_code, response.json()["message"]), (409, "Username already exists"))
+
+        response = self.signup(username="other")
+        self.assertEqual((response.status_code, response.json()["message"]), (409, "Email already exists"))
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_validation(self):
+        self.assertEqual(self.signup(surname="").status_code, 400)
+        self.assertEqual(self.signup(password="short").status_code, 400)
+
+    def test_conflict_from_constraint_name(self):
+        # PostgreSQL reports the violated constraint instead of the column
+        cause = Exception()
+        cause.diag = SimpleNamespace(constraint_name="missing_constraint")
+        error = IntegrityError("duplicate key value violates unique constraint")
+        error.__cause__ = cause
+        self.assertIsNone(unique_conflict(error))
+
+        constraint = next(name for name, column in _unique_columns().items() if column == "email")
+        cause.diag = SimpleNamespace(constraint_name=constraint)
+        self.assertEqual(unique_conflict(error), "email")
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+                   PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_MAX_QUEUE=0)
+class HashingPoolTests(TestCase):
+
+    def setUp(self):
+        create_roles()
+        self.user = create_user("ana")
+        self.client = APIClient()
+
+        # a pool sized by the settings above, torn down after the test
+        for name in ("_executor", "_slots"):
+            patcher = mock.patch.object(hashing, name, None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(lambda: hashing._executor and hashing._executor.shutdown())
+
+    def login(self):
+        return self.client.post("/api/login/", {"email": "ana@example.com", "password": "password1"}, format="json")
+
+    def test_login(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["user_id"], self.user.id)
+
+    def test_full_pool_returns_503(self):
+        release = threading.Event()
+        hashing._submit(release.wait)
+        self.addCleanup(release.set)
+
+        response = self.login()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+
+        release.set()
+        hashing._executor.submit(lambda: None).result()
+        self.assertEqual(self.login().status_code, 200)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class TokenTests(TestCase):
+
+    def setUp(self):
+        create_roles()
+        self.user = create_user("ana")
+        self.admin = create_user("admin", role_id=defaults.ADMIN_ROLE_ID)
+        self.client = APIClient()
+
+    def authorize(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens.issue(user)}")
+
+    def test_verify(self):
+        payload = tokens.verify(tokens.issue(self.user))
+        self.assertEqual((payload["uid"], payload["role"]), (self.user.id, defaults.DEFAULT_ROLE_ID))
+
+        with self.assertRaisesMessage(tokens.InvalidToken, "Invalid token"):
+            tokens.verify(tokens.issue(self.user) + "x")
+
+    def test_expired(self):
+        token = tokens.issue(self.user)
+        with mock.patch("time.time", return_value=time.time() + tokens.max_age() + 1):
+            with self.assertRaisesMessage(tokens.InvalidToken, "Token expired"):
+                tokens.verify(token)
+
+    def test_logout_revokes_in_the_shared_cache(self):
+        token = tokens.issue(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        self.assertEqual(self.client.post("/api/logout/").status_code, 200)
+
+        payload = signing.loads(token, salt=tokens._SALT)
+        self.assertTrue(caches[settings.TOKEN_DENYLIST_CACHE].get(tokens._denied_key(payload["jti"])))
+        with self.assertRaisesMessage(tokens.InvalidToken, "Token revoked"):
+            tokens.verify(token)
+        self.assertEqual(self.client.post("/api/logout/").status_code, 401)
+
+    def test_edit_user_is_authorized_by_the_token(self):
+        self.assertEqual(self.client.put("/api/edit-user/", {"name": "Eva"}, format="json").status_code, 401)
+
+        # the denylist lookup and the UPDATE, the user row is not read
+        self.authorize(self.user)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.put("/api/edit-user/", {"name": "Eva"}, format="json").status_code, 200)
+        self.assertEqual(User.objects.get(id=self.user.id).name, "Eva")
+
+    def test_delete_user(self):
+        other = create_user("bor")
+
+        self.authorize(self.user)
+        response = self.client.delete("/api/delete-user/", {"target_user_id": other.id}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+        self.authorize(self.admin)
+        response = self.client.delete("/api/delete-user/", {"target_user_id": other.id}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(User.objects.filter(id=other.id).exists())
@@ -0,0 +1,50 @@
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api import versions
+from api.models import SlovenskaMesta
+
+
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.city = SlovenskaMesta.objects.create(name="Ljubljana")
+        self.client = APIClient()
+
+    def test_matching_etag_gets_304(self):
+        first = self.client.get("/api/slovenska-mesta/")
+        etag = first["ETag"]
+        self.assertIn("must-revalidate", first["Cache-Control"])
+
+        again = self.client.get("/api/slovenska-mesta/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], etag)
+
+        for header in ['"other", ' + etag, etag.removeprefix("W/"), "*"]:
+            with self.subTest(header=header):
+                self.assertEqual(self.client.get("/api/slovenska-mesta/", HTTP_IF_NONE_MATCH=header).status_code, 304)
+
+    def test_write_changes_the_etag(self):
+        etag = self.client.get("/api/slovenska-mesta/")["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/slovenska-mesta/", {"ime": "Maribor"}, format="json")
+
+        response = self.client.get("/api/slovenska-mesta/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_errors_carry_no_etag(self):
+        response = self.client.get("/api/slovenska-mesta/999/")
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn("ETag", response)
+
+    def test_bump(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            versions.bump(versions.GEOFENCES)
+            versions.bump(versions.GEOFENCES)
+        self.assertEqual(versions.get_version(versions.GEOFENCES), 2)
@@ -0,0 +1,11 @@
+import unicodedata
+
+# letters that do not decompose into a base letter + combining mark
+_EXTRA = str.maketrans({"đ": "d", "Đ": "d", "ł": "l", "Ł": "l", "ø": "o", "Ø": "o", "ß": "ss"})
+
+
+def normalize_name(value):
+    """Lowercase, strip diacritics and collapse whitespace: 'Čopova  ulica' -> 'copova ulica'."""
+    value = unicodedata.normalize("NFKD", value.translate(_EXTRA))
+    value = "".join(ch for ch in value if not unicodedata.combining(ch))
+    return " ".join(value.casefold().split())
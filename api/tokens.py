@@ -0,0 +1,61 @@
+import secrets
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+
+# Access tokens are signed with SECRET_KEY and carry everything needed to
+# authorize a request (user id and role), so checking one needs no user lookup.
+# A role change or account deletion takes effect when the token expires;
+# revoked tokens are kept in the TOKEN_DENYLIST_CACHE cache until then. That
+# cache must be shared by every worker, a per-process cache (LocMemCache)
+# only denies the token on the worker that revoked it.
+
+_SALT = "api.access-token"
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def max_age():
+    return getattr(settings, "ACCESS_TOKEN_MAX_AGE", 3600)
+
+
+def _denylist():
+    return caches[getattr(settings, "TOKEN_DENYLIST_CACHE", "default")]
+
+
+def _denied_key(jti):
+    return f"token-denied:{jti}"
+
+
+def issue(user):
+    payload = {
+        "uid": user.id,
+        "role": user.role_id,
+        "jti": secrets.token_urlsafe(8),
+        "exp": int(time.time()) + max_age(),
+    }
+    return signing.dumps(payload, salt=_SALT)
+
+
+def verify(token):
+    """Return the token payload, raises InvalidToken."""
+    try:
+        payload = signing.loads(token, salt=_SALT, max_age=max_age())
+    except signing.SignatureExpired:
+        raise InvalidToken("Token expired")
+    except signing.BadSignature:
+        raise InvalidToken("Invalid token")
+
+    if _denylist().get(_denied_key(payload["jti"])):
+        raise InvalidToken("Token revoked")
+    return payload
+
+
+def revoke(payload):
+    remaining = payload["exp"] - int(time.time())
+    if remaining > 0:
+        _denylist().set(_denied_key(payload["jti"]), True, remaining)
@@ -0,0 +1,100 @@
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from api.models import TableVersion
+
+SLOVENSKA_MESTA = "slovenska_mesta"
+SLOVENSKE_ULICE = "slovenske_ulice"
+PARKIRNA_MESTA = "parkirna_mesta"
+GEOFENCES = "geofences"
+
+
+def _cache_key(table):
+    return f"table-version:{table}"
+
+
+def get_version(table):
+    key = _cache_key(table)
+
+    version = cache.get(key)
+    if version is None:
+        version = TableVersion.objects.filter(name=table).values_list("version", flat=True).first() or 0
+        cache.set(key, version, getattr(settings, "TABLE_VERSION_CACHE_TIMEOUT", 5))
+
+    return version
+
+
+def bump(table):
+    """Increment the version of `table`. Call inside the writing transaction."""
+    with transaction.atomic():
+        updated = TableVersion.objects.filter(name=table).update(
+            version=F("version") + 1,
+            updated_at=timezone.now()
+        )
+
+        if not updated:
+            try:
+                with transaction.atomic():
+                    TableVersion.objects.create(name=table, version=1)
+            except IntegrityError:
+                TableVersion.objects.filter(name=table).update(
+                    version=F("version") + 1,
+                    updated_at=timezone.now()
+                )
+
+    transaction.on_commit(lambda: cache.delete(_cache_key(table)))
+
+
+def etag(table):
+    return f'W/"{table}-{get_version(table)}"'
+
+
+def _matches(request, current):
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+
+    current = current.removeprefix("W/")
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == current:
+            return True
+
+    return False
+
+
+def _add_headers(response, current):
+    response["ETag"] = current
+    max_age = getattr(settings, "REFERENCE_DATA_MAX_AGE", 0)
+    response["Cache-Control"] = f"public, max-age={max_age}, must-revalidate"
+    return response
+
+
+def conditional_get(table):
+    """
+    Answer GETs with 304 when the client's ETag matches the current version
+    of `table`; the rows are not read in that case.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            current = etag(table)
+
+            if _matches(request, current):
+                return _add_headers(Response(status=status.HTTP_304_NOT_MODIFIED), current)
+
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                _add_headers(response, current)
+            return response
+
+        return wrapper
+
+    return decorator
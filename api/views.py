@@ -1,16 +1,35 @@
-import random
+import copy
+import functools
+import math
 from dataclasses import dataclass
 
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, connection, transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework.request import Request
 
-from django.contrib.auth.hashers import check_password
-from django.contrib.auth.hashers import make_password
+from adrf.views import APIView as AsyncAPIView
+from asgiref.sync import sync_to_async
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status, serializers
-from api.models import User, Role, Image, SlovenskaMesta, ParkirnaMesta, SlovenskeUlice
+from api import changelog, defaults, exporters, forecast, geofences, hashing, hooks, ingest, live, nearest, occupancy, \
+    purge, reference_cache, snapshot, tokens, versions
+from api.authentication import SignedTokenAuthentication
+from api.clusters import clusters_in_bbox
+from api.models import User, UserData, UserPurge, Geofence, SlovenskaMesta, ParkirnaMesta, SlovenskeUlice
+from api.batch import BatchError, run_batch
+from api.buffering import BufferFull
+from api.importers import FORMATS, ImportFormatError, RowError, build_object, guess_format, import_records, \
+    iter_records
+from api.pagination import PaginationError, is_paginated, keyset_page, time_keyset_page
+from api.search import AUTOCOMPLETE_DEFAULT_LIMIT, AUTOCOMPLETE_MAX_LIMIT, autocomplete_streets
+from api.spatial import BBOX_MAX_RESULTS, NEARBY_MAX_K, NEARBY_MAX_RADIUS_M, nearest_spots, spots_in_bbox, \
+    spots_within
 
 
 # Create your views here.
@@ -49,10 +68,54 @@ class SignupSerializer(serializers.Serializer):
     phone = serializers.CharField(required=False, allow_blank=True)
 
 
-class Signup(APIView):
+@functools.cache
+def _unique_columns():
+    """{constraint name: column} of the single-column unique constraints on the user table."""
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, User._meta.db_table)
+    return {
+        name: constraint["columns"][0] for name, constraint in constraints.items()
+        if constraint["unique"] and not constraint["primary_key"] and len(constraint["columns"]) == 1
+    }
+
+
+def unique_conflict(error):
+    """Return "username" or "email" if the IntegrityError is a duplicate of that field."""
+    fields = {User._meta.get_field(field).column: field for field in ("username", "email")}
+
+    diag = getattr(error.__cause__, "diag", None)
+    if diag is not None and diag.constraint_name:
+        columns = _unique_columns()
+        if diag.constraint_name not in columns:
+            # constraint added or renamed by a migration since the lookup
+            _unique_columns.cache_clear()
+            columns = _unique_columns()
+        return fields.get(columns.get(diag.constraint_name))
+
+    # backends without diagnostics (sqlite) name the column:
+    # "UNIQUE constraint failed: api_user.email"
+    message = str(error)
+    if message.startswith("UNIQUE constraint failed: "):
+        return fields.get(message.rsplit(".", 1)[-1])
+    return None
+
+
+def hashing_busy():
+    print("[ERROR] Password hashing pool is saturated")
+    return Response(
+        {
+            "status": "error",
+            "message": "Server is busy, try again later"
+        },
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"}
+    )
+
+
+class Signup(AsyncAPIView):
 
     @extend_schema(request=SignupSerializer)
-    def post(self, request):
+    async def post(self, request):
         print('===== SIGNUP START =====')
 
         data = request.data
@@ -96,31 +159,10 @@ class Signup(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if User.objects.filter(username=username).exists():
-            print(f"[ERROR] Username already exists: {username}")
-            return Response(
-                {
-                    "status": "error",
-                    "message": "Username already exists"
-                },
-                status=status.HTTP_409_CONFLICT
-            )
-
-        if User.objects.filter(email=email).exists():
-            print(f"[ERROR] Email already exists: {email}")
-            return Response(
-                {
-                    "status": "error",
-                    "message": "Email already exists"
-                },
-                status=status.HTTP_409_CONFLICT
-            )
-
-        try:
-            role = Role.objects.get(id=2)
-            print(f"[DEBUG] Role found: id={role.id}, name={role}")
-        except Role.DoesNotExist:
-            print("[ERROR] Default role (id=2) not found")
+        # cached in process, no queries unless the cache is cold
+        role_id = await sync_to_async(defaults.default_role_id)()
+        if role_id is None:
+            print(f"[ERROR] Default role (id={defaults.DEFAULT_ROLE_ID}) not found")
             return Response(
                 {
                     "status": "error",
@@ -129,18 +171,19 @@ class Signup(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-        random_image_id = random.randint(1, 10)
-        image = Image.objects.filter(id=random_image_id).first()
-        if image:
-            print(f"[DEBUG] Image found: id={image.id}")
-        else:
-            print(f"[WARN] Image not found for id={random_image_id}")
+        image_id = await sync_to_async(defaults.random_image_id)()
+        print(f"[DEBUG] Role id={role_id}, image id={image_id}")
 
-        hashed_password = make_password(password)
+        # hashed on the bounded pool, the event loop stays free for other requests
+        try:
+            hashed_password = await hashing.make_password(password)
+        except hashing.HashingBusy:
+            return hashing_busy()
         print("[DEBUG] Password hashed successfully")
 
+        # single INSERT, the unique constraints on username/email detect conflicts
         try:
-            user = User.objects.create(
+            user = await User.objects.acreate(
                 username=username,
                 password=hashed_password,
                 name=name,
@@ -149,10 +192,33 @@ class Signup(APIView):
                 location="",
                 email=email,
                 phone=phone,
-                role=role,
-                image=image
+                role_id=role_id,
+                image_id=image_id
             )
             print(f"[SUCCESS] User created with id={user.id}")
+        except IntegrityError as e:
+            conflict = await sync_to_async(unique_conflict)(e)
+            if conflict:
+                print(f"[ERROR] {conflict} already exists")
+                return Response(
+                    {
+                        "status": "error",
+                        "message": f"{conflict.capitalize()} already exists"
+                    },
+                    status=status.HTTP_409_CONFLICT
+                )
+
+            # most likely the cached role or image was removed meanwhile
+            defaults.invalidate()
+            print("[ERROR] Failed to create user")
+            print(f"[ERROR DETAILS] {e}")
+            return Response(
+                {
+                    "status": "error",
+                    "message": "Failed to create user"
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
         except Exception as e:
             print("[ERROR] Failed to create user")
             print(f"[ERROR DETAILS] {e}")
@@ -181,10 +247,10 @@ class LoginSerializer(serializers.Serializer):
     password = serializers.CharField()
 
 
-class Login(APIView):
+class Login(AsyncAPIView):
 
     @extend_schema(request=LoginSerializer)
-    def post(self, request):
+    async def post(self, request):
         print('===== LOGIN START =====')
 
         data = request.data
@@ -206,7 +272,7 @@ class Login(APIView):
 
         # try to fetch user
         try:
-            user = User.objects.get(email=email)
+            user = await User.objects.aget(email=email)
             print(f"[DEBUG] User found: id={user.id}, username={user.username}")
         except User.DoesNotExist:
             print("[ERROR] User not found for email:", email)
@@ -219,7 +285,12 @@ class Login(APIView):
             )
 
         # check password
-        if not check_password(password, user.password):
+        try:
+            valid = await hashing.check_password(password, user.password)
+        except hashing.HashingBusy:
+            return hashing_busy()
+
+        if not valid:
             print("[ERROR] Invalid password")
             return Response(
                 {
@@ -238,23 +309,71 @@ class Login(APIView):
                 "message": "Login successful",
                 "user_id": user.id,
                 "username": user.username,
-                "email": user.email
+                "email": user.email,
+                "token": tokens.issue(user),
+                "expires_in": tokens.max_age()
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class Logout(APIView):
+    authentication_classes = [SignedTokenAuthentication]
+
+    def post(self, request):
+        print('===== LOGOUT START =====')
+
+        if not request.auth:
+            return Response(
+                {
+                    "status": "error",
+                    "message": "Bearer token is required"
+                },
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        tokens.revoke(request.auth)
+        print(f"[SUCCESS] Token revoked for user id={request.user.id}")
+        print('===== LOGOUT END =====')
+
+        return Response(
+            {
+                "status": "success",
+                "message": "Logout successful"
             },
             status=status.HTTP_200_OK
         )
 
 
+def legacy_user_ids():
+    """Whether requests without a token may still name the acting user by id."""
+    return getattr(settings, "LEGACY_USER_ID_AUTH", False)
+
+
+def token_required():
+    return Response(
+        {
+            "status": "error",
+            "message": "Bearer token is required"
+        },
+        status=status.HTTP_401_UNAUTHORIZED,
+        headers={"WWW-Authenticate": SignedTokenAuthentication.keyword}
+    )
+
+
 class DeleteUserSerializer(serializers.Serializer):
     requester_id = serializers.IntegerField()
     target_user_id = serializers.IntegerField()
 
 
 class DeleteUser(APIView):
+    authentication_classes = [SignedTokenAuthentication]
 
     @extend_schema(
         parameters=[
             OpenApiParameter("requester_id", int, location=OpenApiParameter.QUERY,
-                             description="ID of the user requesting deletion"),
+                             description="ID of the user requesting deletion, only read without a Bearer token "
+                                         "when LEGACY_USER_ID_AUTH is enabled"),
             OpenApiParameter("target_user_id", int, location=OpenApiParameter.QUERY,
                              description="ID of the user to delete")
         ]
@@ -265,11 +384,20 @@ class DeleteUser(APIView):
         data = request.data
         print(f'[DEBUG] Requst data: {data}')
 
-        requester_id = data.get("requester_id") # who is requesting to delete
         target_user_id = data.get("target_user_id")   # who should be deleted
 
+        # who is requesting to delete, from the token or (legacy) the request
+        if request.auth:
+            requester_id = request.user.id
+            is_admin = request.user.is_admin
+        elif legacy_user_ids():
+            requester_id = data.get("requester_id")
+            is_admin = None
+        else:
+            return token_required()
+
         # requried params check
-        if not requester_id or not target_user_id:
+        if requester_id is None or target_user_id is None:
             print("[ERROR] requester_id or user_id missing")
             return Response(
                 {
@@ -279,37 +407,36 @@ class DeleteUser(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # try to fetch requester
         try:
-            requester = User.objects.get(id=requester_id)
-            print(f"[DEBUG] Requester found: id={requester.id}, role={requester.role.id}")
-        except User.DoesNotExist:
-            print("[ERROR] Requester not found")
+            requester_id = int(requester_id)
+            target_user_id = int(target_user_id)
+        except (TypeError, ValueError):
             return Response(
                 {
                     "status": "error",
-                    "message": "Requester not found"
+                    "message": "requester_id and user_id must be numbers"
                 },
-                status=status.HTTP_401_UNAUTHORIZED
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-        # try to fetch targer user
-        try:
-            target_user = User.objects.get(id=target_user_id)
-            print(f"[DEBUG] Target user found: id={target_user.id}")
-        except User.DoesNotExist:
-            print("[ERROR] Target user not found")
-            return Response(
-                {
-                    "status": "error",
-                    "message": "User to delete not found"
-                },
-                status=status.HTTP_404_NOT_FOUND
-            )
+        # legacy requests without a token, the requester is looked up
+        if is_admin is None:
+            role_id = User.objects.filter(id=requester_id).values_list("role_id", flat=True).first()
+            if role_id is None:
+                print("[ERROR] Requester not found")
+                return Response(
+                    {
+                        "status": "error",
+                        "message": "Requester not found"
+                    },
+                    status=status.HTTP_401_UNAUTHORIZED
+                )
+            is_admin = role_id == defaults.ADMIN_ROLE_ID
+
+        print(f"[DEBUG] Requester id={requester_id}, admin={is_admin}")
 
         # check authorization
-        is_self = requester.id == target_user.id
-        is_admin = requester.role.id == 1
+        is_self = requester_id == target_user_id
 
         if not (is_self or is_admin):
             print("[ERROR] Unauthorized delete attempt")
@@ -321,10 +448,18 @@ class DeleteUser(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        # delete user
+        # delete user, a large history is purged in the background
         try:
-            target_user.delete()
-            print(f"[SUCCESS] User deleted: id={target_user_id}")
+            job = purge.delete_user(target_user_id)
+        except User.DoesNotExist:
+            print("[ERROR] Target user not found")
+            return Response(
+                {
+                    "status": "error",
+                    "message": "User to delete not found"
+                },
+                status=status.HTTP_404_NOT_FOUND
+            )
         except Exception as e:
             print("[ERROR] Failed to delete user")
             print(f"[ERROR DETAILS] {e}")
@@ -336,6 +471,22 @@ class DeleteUser(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+        # a deleted user's own token must not outlive the account
+        if request.auth and is_self:
+            tokens.revoke(request.auth)
+
+        if job is not None:
+            print(f"[SUCCESS] User purge started: id={target_user_id}, job={job.id}")
+            return Response(
+                {
+                    "status": "accepted",
+                    "message": "User deletion started",
+                    "purge_id": job.id
+                },
+                status=status.HTTP_202_ACCEPTED
+            )
+
+        print(f"[SUCCESS] User deleted: id={target_user_id}")
         print("===== DELETE USER END =====")
 
         return Response(
@@ -347,6 +498,37 @@ class DeleteUser(APIView):
         )
 
 
+class UserPurgeAPI(APIView):
+    authentication_classes = [SignedTokenAuthentication]
+
+    def get(self, request, pk):
+        print(f"===== USER PURGE {pk} =====")
+
+        if not request.auth:
+            return token_required()
+
+        # admins see every purge, users only the purge of their own account
+        job = UserPurge.objects.filter(id=pk).first()
+        if job is None or not (request.user.is_admin or job.user_id == request.user.id):
+            return Response(
+                {"message": "Purge not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(
+            {
+                "purge_id": job.id,
+                "user_id": job.user_id,
+                "status": job.status,
+                "deleted_rows": job.deleted_rows,
+                "error": job.error,
+                "created_at": job.created_at,
+                "updated_at": job.updated_at
+            },
+            status=status.HTTP_200_OK
+        )
+
+
 class EditUserSerializer(serializers.Serializer):
     username = serializers.CharField(required=False)
     name = serializers.CharField(required=False)
@@ -358,6 +540,7 @@ class EditUserSerializer(serializers.Serializer):
 
 
 class EditUser(APIView):
+    authentication_classes = [SignedTokenAuthentication]
 
     @extend_schema(
         parameters=[
@@ -423,24 +606,19 @@ class EditUser(APIView):
         data = request.data
         print(f"[DEBUG] Request data: {data}")
 
-        requester_id = request.query_params.get('user_id')
-
-        # check requester_id
-        if not requester_id:
-            return Response(
-                {"message": "Unauthorized"},
-                status=status.HTTP_401_UNAUTHORIZED
-            )
-
-        # fetch user
-        try:
-            user = User.objects.get(id=requester_id)
-            print(f"[DEBUG] User found: id={user.id}")
-        except User.DoesNotExist:
-            return Response(
-                {"message": "Unauthorized"},
-                status=status.HTTP_401_UNAUTHORIZED
-            )
+        # the token identifies the user, legacy clients pass ?user_id=
+        if request.auth:
+            requester_id = request.user.id
+        elif legacy_user_ids():
+            try:
+                requester_id = int(request.query_params.get('user_id'))
+            except (TypeError, ValueError):
+                return Response(
+                    {"message": "Unauthorized"},
+                    status=status.HTTP_401_UNAUTHORIZED
+                )
+        else:
+            return token_required()
 
         # fields allowed to be updated
         updatable_fields = [
@@ -448,18 +626,14 @@ class EditUser(APIView):
             "bio", "location", "email", "phone"
         ]
 
-        # update fields
-        for field in updatable_fields:
-            if field in data:
-                old = getattr(user, field)
-                new = data.get(field)
-                setattr(user, field, new)
-                print(f"[DEBUG] Updated {field}: {old} -> {new}")
+        changes = {field: data.get(field) for field in updatable_fields if field in data}
+        for field, new in changes.items():
+            print(f"[DEBUG] Updating {field} -> {new}")
 
-        # save the changes
+        # a single UPDATE, no row is fetched first
         try:
-            user.save()
-            print("[SUCCESS] User updated")
+            users = User.objects.filter(id=requester_id)
+            found = users.update(**changes) if changes else users.exists()
         except Exception as e:
             print("[ERROR] Update failed")
             print(e)
@@ -468,6 +642,13 @@ class EditUser(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+        if not found:
+            return Response(
+                {"message": "Unauthorized"},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        print("[SUCCESS] User updated")
         print("===== EDIT USER PUT END =====")
 
         return Response(
@@ -476,6 +657,41 @@ class EditUser(APIView):
         )
 
 
+def resource_id(pk, *values):
+    """
+    The id from the path, or else the first one sent in the query or body.
+    A value may be a callable, it is only called when the earlier ones are
+    missing. Raises ValueError.
+    """
+    if pk is not None:
+        return pk
+    for value in values:
+        if callable(value):
+            value = value()
+        if value is not None and value != "":
+            return int(value)
+    return None
+
+
+def body_id(request):
+    data = request.data
+    return data.get("id") if isinstance(data, dict) else None
+
+
+def invalid_id():
+    return Response(
+        {"message": "id must be a number"},
+        status=status.HTTP_400_BAD_REQUEST
+    )
+
+
+def post_on_detail():
+    return Response(
+        {"message": "POST is only allowed on the list route"},
+        status=status.HTTP_405_METHOD_NOT_ALLOWED
+    )
+
+
 class SlovenskaMestaGetSerializer(serializers.Serializer):
     id = serializers.IntegerField(required=False)
 
@@ -497,44 +713,82 @@ class SlovenskaMestaAPI(APIView):
 
     @extend_schema(
         parameters=[
-            OpenApiParameter("id", int, location=OpenApiParameter.QUERY, description="Optional city ID to fetch")
+            OpenApiParameter("id", int, location=OpenApiParameter.QUERY, description="Optional city ID to fetch"),
+            OpenApiParameter("page_size", int, location=OpenApiParameter.QUERY, required=False,
+                             description="Return a page of this size instead of the full list"),
+            OpenApiParameter("cursor", str, location=OpenApiParameter.QUERY, required=False,
+                             description="next_cursor from the previous page")
         ]
     )
-    def get(self, request):
+    @versions.conditional_get(versions.SLOVENSKA_MESTA)
+    def get(self, request, pk=None):
         print("===== SLOVENSKA MESTA GET =====")
 
-        data = request.data
-        print(f"[DEBUG] data={data}")
-
-        city_id = data.get("id")
+        # body is only parsed for legacy clients that send the id there
+        try:
+            city_id = resource_id(pk, request.query_params.get("id"), lambda: body_id(request))
+        except (TypeError, ValueError):
+            return invalid_id()
+        print(f"[DEBUG] id={city_id}")
 
         # --- get one ---
-        if city_id:
-            try:
-                city = SlovenskaMesta.objects.get(id=city_id)
-                return Response(
-                    {
-                        "id": city.id,
-                        "ime": city.name
-                    },
-                    status=status.HTTP_200_OK
-                )
-            except SlovenskaMesta.DoesNotExist:
+        if city_id is not None:
+            city = reference_cache.get_or_load(
+                versions.SLOVENSKA_MESTA,
+                f"detail:{city_id}",
+                lambda: SlovenskaMesta.objects.filter(id=city_id).values("id", "name").first()
+            )
+
+            if city is None:
                 return Response(
                     {"message": "City not found"},
                     status=status.HTTP_404_NOT_FOUND
                 )
 
+            return Response(
+                {
+                    "id": city["id"],
+                    "ime": city["name"]
+                },
+                status=status.HTTP_200_OK
+            )
+
+        # --- get page ---
+        if is_paginated(request):
+            try:
+                page = reference_cache.get_or_load(
+                    versions.SLOVENSKA_MESTA,
+                    f"page:{request.query_params.get('cursor')}:{request.query_params.get('page_size')}",
+                    lambda: keyset_page(
+                        SlovenskaMesta.objects.all(),
+                        request,
+                        lambda c: {"id": c.id, "ime": c.name}
+                    )
+                )
+            except PaginationError as e:
+                return Response(
+                    {"message": str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            return Response(page, status=status.HTTP_200_OK)
+
         # --- get all ---
-        cities = SlovenskaMesta.objects.all()
-        result = [{"id": c.id, "ime": c.name} for c in cities]
+        result = reference_cache.get_or_load(
+            versions.SLOVENSKA_MESTA,
+            "list",
+            lambda: [{"id": c.id, "ime": c.name} for c in SlovenskaMesta.objects.all()]
+        )
 
         return Response(result, status=status.HTTP_200_OK)
 
     @extend_schema(request=SlovenskaMestaPostSerializer)
-    def post(self, request):
+    def post(self, request, pk=None):
         print("===== SLOVENSKA MESTA POST =====")
 
+        if pk is not None:
+            return post_on_detail()
+
         ime = request.data.get("ime")
         print(f"[DEBUG] ime={ime}")
 
@@ -544,7 +798,10 @@ class SlovenskaMestaAPI(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        city = SlovenskaMesta.objects.create(name=ime)
+        with transaction.atomic():
+            city = SlovenskaMesta.objects.create(name=ime)
+            reference_cache.invalidate(versions.SLOVENSKA_MESTA)
+            versions.bump(versions.SLOVENSKA_MESTA)
 
         return Response(
             {
@@ -555,16 +812,19 @@ class SlovenskaMestaAPI(APIView):
         )
 
     @extend_schema(request=SlovenskaMestaPutSerializer)
-    def put(self, request):
+    def put(self, request, pk=None):
         print("===== SLOVENSKA MESTA PUT =====")
 
         data = request.data
         print(f"[DEBUG] data={data}")
 
-        city_id = data.get("id")
+        try:
+            city_id = resource_id(pk, data.get("id"))
+        except (TypeError, ValueError):
+            return invalid_id()
         ime = data.get("ime")
 
-        if not city_id or not ime:
+        if city_id is None or not ime:
             return Response(
                 {"message": "id and ime are required"},
                 status=status.HTTP_400_BAD_REQUEST
@@ -579,7 +839,11 @@ class SlovenskaMestaAPI(APIView):
             )
 
         city.name = ime
-        city.save()
+
+        with transaction.atomic():
+            city.save()
+            reference_cache.invalidate(versions.SLOVENSKA_MESTA, f"detail:{city_id}")
+            versions.bump(versions.SLOVENSKA_MESTA)
 
         return Response(
             {"message": "City updated"},
@@ -589,13 +853,16 @@ class SlovenskaMestaAPI(APIView):
     @extend_schema(
         parameters=[OpenApiParameter("id", int, location=OpenApiParameter.QUERY, description="City ID to delete")]
     )
-    def delete(self, request):
+    def delete(self, request, pk=None):
         print("===== SLOVENSKA MESTA DELETE =====")
 
-        city_id = request.data.get("id")
+        try:
+            city_id = resource_id(pk, request.query_params.get("id"), lambda: body_id(request))
+        except (TypeError, ValueError):
+            return invalid_id()
         print(f"[DEBUG] id={city_id}")
 
-        if not city_id:
+        if city_id is None:
             return Response(
                 {"message": "id is required"},
                 status=status.HTTP_400_BAD_REQUEST
@@ -609,7 +876,10 @@ class SlovenskaMestaAPI(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        city.delete()
+        with transaction.atomic():
+            city.delete()
+            reference_cache.invalidate(versions.SLOVENSKA_MESTA, f"detail:{city_id}")
+            versions.bump(versions.SLOVENSKA_MESTA)
 
         return Response(
             {"message": "City deleted"},
@@ -642,18 +912,25 @@ class ParkirnaMestaAPI(APIView):
 
     @extend_schema(
         parameters=[
-            OpenApiParameter("id", int, location=OpenApiParameter.QUERY, description="Optional parking spot ID")
+            OpenApiParameter("id", int, location=OpenApiParameter.QUERY, description="Optional parking spot ID"),
+            OpenApiParameter("page_size", int, location=OpenApiParameter.QUERY, required=False,
+                             description="Return a page of this size instead of the full list"),
+            OpenApiParameter("cursor", str, location=OpenApiParameter.QUERY, required=False,
+                             description="next_cursor from the previous page")
         ]
     )
-    def get(self, request):
+    @versions.conditional_get(versions.PARKIRNA_MESTA)
+    def get(self, request, pk=None):
         print("===== PARKIRNA MESTA GET =====")
 
-        data = request.data
-        print(f"[DEBUG] data={data}")
-
-        park_id = data.get("id")
+        # body is only parsed for legacy clients that send the id there
+        try:
+            park_id = resource_id(pk, request.query_params.get("id"), lambda: body_id(request))
+        except (TypeError, ValueError):
+            return invalid_id()
+        print(f"[DEBUG] id={park_id}")
 
-        if park_id:
+        if park_id is not None:
             try:
                 park = ParkirnaMesta.objects.get(id=park_id)
                 return Response(
@@ -671,6 +948,30 @@ class ParkirnaMestaAPI(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
 
+        if is_paginated(request):
+            try:
+                page = keyset_page(
+                    ParkirnaMesta.objects.all(),
+                    request,
+                    lambda p: {
+                        "id": p.id,
+                        "ime": p.name,
+                        "latitude": p.latitude,
+                        "longitude": p.longitude
+                    }
+                )
+            except PaginationError as e:
+                return Response(
+                    {"message": str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            return Response(page, status=status.HTTP_200_OK)
+
+        # JSON clients get the pre-rendered (and pre-compressed) full list
+        if request.accepted_renderer.format == "json":
+            return snapshot.get(versions.get_version(versions.PARKIRNA_MESTA)).response(request)
+
         parks = ParkirnaMesta.objects.all()
         result = [
             {
@@ -685,9 +986,12 @@ class ParkirnaMestaAPI(APIView):
         return Response(result, status=status.HTTP_200_OK)
 
     @extend_schema(request=ParkirnaMestaPostSerializer)
-    def post(self, request):
+    def post(self, request, pk=None):
         print("===== PARKIRNA MESTA POST =====")
 
+        if pk is not None:
+            return post_on_detail()
+
         name = request.data.get("ime")
         latitude = request.data.get("latitude")
         longitude = request.data.get("longitude")
@@ -698,11 +1002,18 @@ class ParkirnaMestaAPI(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        park = ParkirnaMesta.objects.create(
-            name=name,
-            latitude=latitude,
-            longitude=longitude
-        )
+        # same validation as PUT, the hooks only ever see in-range rounded coordinates
+        try:
+            park = build_object("parkirna-mesta", {"ime": name, "latitude": latitude, "longitude": longitude})
+        except RowError as e:
+            return Response(
+                {"message": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            park.save()
+            hooks.parkirna_mesta_created([park])
 
         return Response(
             {
@@ -713,36 +1024,49 @@ class ParkirnaMestaAPI(APIView):
         )
 
     @extend_schema(request=ParkirnaMestaPutSerializer)
-    def put(self, request):
+    def put(self, request, pk=None):
         print("===== PARKIRNA MESTA PUT =====")
 
-        park_id = request.data.get("id")
+        try:
+            park_id = resource_id(pk, request.data.get("id"))
+        except (TypeError, ValueError):
+            return invalid_id()
         name = request.data.get("ime")
         latitude = request.data.get("latitude")
         longitude = request.data.get("longitude")
 
-        if not all([park_id, name, latitude, longitude]):
+        if park_id is None or not all([name, latitude, longitude]):
             return Response(
                 {"message": "id, ime, latitude, longitude are required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        # same validation as imports, coordinates are rounded like the
+        # stored ones so an unchanged position does not count as a move
         try:
-            park = ParkirnaMesta.objects.get(id=park_id)
-        except ParkirnaMesta.DoesNotExist:
+            validated = build_object("parkirna-mesta", {"ime": name, "latitude": latitude, "longitude": longitude})
+        except RowError as e:
             return Response(
-                {"message": "Parking spot not found"},
-                status=status.HTTP_404_NOT_FOUND
+                {"message": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-        if name is not None:
-            park.name = name
-        if latitude is not None:
-            park.latitude = latitude
-        if longitude is not None:
-            park.longitude = longitude
+        with transaction.atomic():
+            # locked so concurrent moves apply their cluster deltas in turn
+            park = ParkirnaMesta.objects.select_for_update().filter(id=park_id).first()
+            if park is None:
+                return Response(
+                    {"message": "Parking spot not found"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+
+            old = copy.copy(park)
+            park.name = validated.name
+            park.latitude = validated.latitude
+            park.longitude = validated.longitude
 
-        park.save()
+            park.save()
+            hooks.parkirna_mesta_updated([(old, park)])
 
         return Response(
             {"message": "Parking spot updated"},
@@ -753,26 +1077,31 @@ class ParkirnaMestaAPI(APIView):
         parameters=[
             OpenApiParameter("id", int, location=OpenApiParameter.QUERY, description="Parking spot ID to delete")]
     )
-    def delete(self, request):
+    def delete(self, request, pk=None):
         print("===== PARKIRNA MESTA DELETE =====")
 
-        park_id = request.data.get("id")
+        try:
+            park_id = resource_id(pk, request.query_params.get("id"), lambda: body_id(request))
+        except (TypeError, ValueError):
+            return invalid_id()
 
-        if not park_id:
+        if park_id is None:
             return Response(
                 {"message": "id is required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            park = ParkirnaMesta.objects.get(id=park_id)
-        except ParkirnaMesta.DoesNotExist:
-            return Response(
-                {"message": "Parking spot not found"},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        with transaction.atomic():
+            park = ParkirnaMesta.objects.select_for_update().filter(id=park_id).first()
+            if park is None:
+                return Response(
+                    {"message": "Parking spot not found"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
 
-        park.delete()
+            deleted = copy.copy(park)
+            park.delete()
+            hooks.parkirna_mesta_deleted([deleted])
 
         return Response(
             {"message": "Parking spot deleted"},
@@ -780,63 +1109,577 @@ class ParkirnaMestaAPI(APIView):
         )
 
 
-class SlovenskeUliceGetSerializer(serializers.Serializer):
-    id = serializers.IntegerField(required=False)
-
-
-class SlovenskeUlicePostSerializer(serializers.Serializer):
-    ime = serializers.CharField()
-
-
-class SlovenskeUlicePutSerializer(serializers.Serializer):
-    id = serializers.IntegerField()
-    ime = serializers.CharField()
-
-
-class SlovenskeUliceDeleteSerializer(serializers.Serializer):
-    id = serializers.IntegerField()
+def parse_free(params):
+    """The optional free=true/false filter, raises ValueError."""
+    value = params.get("free")
+    if value is None or value == "":
+        return None
+    if value.lower() in ("true", "1"):
+        return True
+    if value.lower() in ("false", "0"):
+        return False
+    raise ValueError("free must be true or false")
 
 
-class SlovenskeUliceAPI(APIView):
+class ParkirnaMestaNearbyAPI(APIView):
 
     @extend_schema(
         parameters=[
-            OpenApiParameter("id", int, location=OpenApiParameter.QUERY, description="Optional street ID")
+            OpenApiParameter("latitude", float, location=OpenApiParameter.QUERY, description="Latitude of the position"),
+            OpenApiParameter("longitude", float, location=OpenApiParameter.QUERY, description="Longitude of the position"),
+            OpenApiParameter("radius", float, location=OpenApiParameter.QUERY, required=False,
+                             description="Search radius in meters"),
+            OpenApiParameter("k", int, location=OpenApiParameter.QUERY, required=False,
+                             description="Maximum number of closest spots to return"),
+            OpenApiParameter("free", bool, location=OpenApiParameter.QUERY, required=False,
+                             description="Only spots reported free (true) or taken (false)"),
         ]
     )
     def get(self, request):
-        print("===== SLOVENSKE ULICE GET =====")
+        print("===== PARKIRNA MESTA NEARBY =====")
 
-        data = request.data
-        print(f"[DEBUG] data={data}")
+        params = request.query_params
+        print(f"[DEBUG] params={params}")
 
-        street_id = data.get("id")
-
-        if street_id:
-            try:
-                street = SlovenskeUlice.objects.get(id=street_id)
-                return Response(
-                    {
-                        "id": street.id,
-                        "ime": street.name
-                    },
-                    status=status.HTTP_200_OK
-                )
-            except SlovenskeUlice.DoesNotExist:
-                return Response(
-                    {"message": "Street not found"},
-                    status=status.HTTP_404_NOT_FOUND
-                )
+        try:
+            latitude = float(params["latitude"])
+            longitude = float(params["longitude"])
+            radius = float(params["radius"]) if params.get("radius") else None
+            k = int(params["k"]) if params.get("k") else None
+            free = parse_free(params)
+        except (KeyError, ValueError):
+            return Response(
+                {"message": "latitude and longitude are required, radius and k must be numbers, "
+                            "free must be true or false"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        streets = SlovenskeUlice.objects.all()
-        result = [{"id": s.id, "ime": s.name} for s in streets]
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return Response(
+                {"message": "latitude or longitude out of range"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        return Response(result, status=status.HTTP_200_OK)
+        if radius is None and k is None:
+            return Response(
+                {"message": "radius or k is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-    @extend_schema(request=SlovenskeUlicePostSerializer)
+        if (radius is not None and not 0 < radius <= NEARBY_MAX_RADIUS_M) or \
+                (k is not None and not 0 < k <= NEARBY_MAX_K):
+            return Response(
+                {"message": f"radius must be in (0, {NEARBY_MAX_RADIUS_M}] and k in (0, {NEARBY_MAX_K}]"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        spots = None if free is None else occupancy.filter_free(ParkirnaMesta.objects.all(), free)
+
+        if radius is not None:
+            found = spots_within(latitude, longitude, radius, spots)
+            if k is not None:
+                found = found[:k]
+        else:
+            found = nearest_spots(latitude, longitude, k, queryset=spots)
+
+        states = occupancy.free_states([p.id for _, p in found])
+        result = [
+            {
+                "id": p.id,
+                "ime": p.name,
+                "latitude": p.latitude,
+                "longitude": p.longitude,
+                "distance": round(distance, 1),
+                "free": states.get(p.id)
+            }
+            for distance, p in found
+        ]
+
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class ParkirnaMestaNearestBatchSerializer(serializers.Serializer):
+    positions = serializers.ListField(child=serializers.ListField(child=serializers.FloatField()))
+    k = serializers.IntegerField(required=False)
+    radius = serializers.FloatField(required=False)
+
+
+class ParkirnaMestaNearestBatchAPI(APIView):
+
+    @extend_schema(request=ParkirnaMestaNearestBatchSerializer)
     def post(self, request):
+        print("===== PARKIRNA MESTA NEAREST BATCH =====")
+
+        data = request.data
+        if not isinstance(data, dict) or not isinstance(data.get("positions"), list):
+            return Response(
+                {"message": "Body must be an object with a positions list"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            k = int(data.get("k", 1))
+            radius = float(data["radius"]) if data.get("radius") is not None else None
+            positions = [(float(p[0]), float(p[1])) for p in data["positions"]]
+            if radius is not None and not math.isfinite(radius):
+                raise ValueError(radius)
+        except (TypeError, ValueError, IndexError, KeyError, OverflowError):
+            return Response(
+                {"message": "positions must be a list of [latitude, longitude] pairs, k and radius numbers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not 0 < len(positions) <= nearest.BATCH_NEAREST_MAX_POSITIONS:
+            return Response(
+                {"message": f"Between 1 and {nearest.BATCH_NEAREST_MAX_POSITIONS} positions per request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not 0 < k <= nearest.BATCH_NEAREST_MAX_K or (radius is not None and radius <= 0):
+            return Response(
+                {"message": f"k must be in (0, {nearest.BATCH_NEAREST_MAX_K}] and radius positive"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if any(not (-90 <= lat <= 90 and -180 <= lon <= 180) for lat, lon in positions):
+            return Response(
+                {"message": "latitude or longitude out of range"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # vectorized over the in-memory array, no query unless spots changed
+        spots = nearest.spot_array()
+        found = spots.nearest(positions, k, radius)
+
+        results = [
+            [
+                {
+                    "id": spots.ids[i],
+                    "ime": spots.names[i],
+                    "latitude": spots.latitudes[i],
+                    "longitude": spots.longitudes[i],
+                    "distance": round(distance, 1)
+                }
+                for distance, i in row
+            ]
+            for row in found
+        ]
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class ParkirnaMestaBBoxAPI(APIView):
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("min_latitude", float, location=OpenApiParameter.QUERY, description="South edge"),
+            OpenApiParameter("min_longitude", float, location=OpenApiParameter.QUERY, description="West edge"),
+            OpenApiParameter("max_latitude", float, location=OpenApiParameter.QUERY, description="North edge"),
+            OpenApiParameter("max_longitude", float, location=OpenApiParameter.QUERY, description="East edge"),
+            OpenApiParameter("limit", int, location=OpenApiParameter.QUERY, required=False,
+                             description=f"Maximum number of spots (at most {BBOX_MAX_RESULTS})"),
+            OpenApiParameter("free", bool, location=OpenApiParameter.QUERY, required=False,
+                             description="Only spots reported free (true) or taken (false)"),
+        ]
+    )
+    def get(self, request):
+        print("===== PARKIRNA MESTA BBOX =====")
+
+        params = request.query_params
+        print(f"[DEBUG] params={params}")
+
+        try:
+            min_lat = float(params["min_latitude"])
+            min_lon = float(params["min_longitude"])
+            max_lat = float(params["max_latitude"])
+            max_lon = float(params["max_longitude"])
+            limit = int(params.get("limit", BBOX_MAX_RESULTS))
+            free = parse_free(params)
+        except (KeyError, ValueError):
+            return Response(
+                {"message": "min_latitude, min_longitude, max_latitude and max_longitude are required, "
+                            "free must be true or false"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if min_lat > max_lat or min_lon > max_lon:
+            return Response(
+                {"message": "min values must not be greater than max values"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        limit = max(1, min(limit, BBOX_MAX_RESULTS))
+
+        spots = None if free is None else occupancy.filter_free(ParkirnaMesta.objects.all(), free)
+
+        parks, truncated = spots_in_bbox(min_lat, min_lon, max_lat, max_lon, limit, spots)
+        states = occupancy.free_states([p.id for p in parks])
+        result = [
+            {
+                "id": p.id,
+                "ime": p.name,
+                "latitude": p.latitude,
+                "longitude": p.longitude,
+                "free": states.get(p.id)
+            }
+            for p in parks
+        ]
+
+        return Response(
+            {
+                "results": result,
+                "truncated": truncated
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class OccupancySerializer(serializers.Serializer):
+    reports = serializers.ListField(child=serializers.DictField())
+
+
+class ParkirnaMestaOccupancyAPI(APIView):
+
+    @extend_schema(request=OccupancySerializer)
+    def post(self, request):
+        print("===== PARKIRNA MESTA OCCUPANCY =====")
+
+        records = request.data.get("reports") if isinstance(request.data, dict) else request.data
+        if not isinstance(records, list) or not records:
+            return Response(
+                {"message": "reports must be a non-empty list"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(records) > occupancy.OCCUPANCY_MAX_REPORTS:
+            return Response(
+                {"message": f"At most {occupancy.OCCUPANCY_MAX_REPORTS} reports per request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        reports = []
+        errors = []
+        for index, record in enumerate(records):
+            try:
+                reports.append(occupancy.build_report(record))
+            except occupancy.ReportError as e:
+                errors.append({"index": index, "message": str(e)})
+
+        if errors:
+            return Response(
+                {
+                    "message": "Invalid reports",
+                    "errors": errors
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # coalesced per spot in memory, only the latest state is written
+        try:
+            occupancy.submit(reports)
+        except BufferFull:
+            print("[ERROR] Occupancy buffer is full")
+            return Response(
+                {"message": "Server is busy, try again later"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"}
+            )
+
+        return Response(
+            {
+                "message": "Reports accepted",
+                "accepted": len(reports)
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+class ParkirnaMestaForecastAPI(APIView):
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("weekday", int, location=OpenApiParameter.QUERY, required=False,
+                             description="0 (Monday) to 6 (Sunday), default today"),
+            OpenApiParameter("time", str, location=OpenApiParameter.QUERY, required=False,
+                             description="Local time HH:MM (Europe/Ljubljana), default now"),
+        ]
+    )
+    def get(self, request, pk):
+        print(f"===== PARKIRNA MESTA FORECAST {pk} =====")
+
+        params = request.query_params
+        weekday, minutes = forecast.local_now()
+
+        try:
+            if params.get("weekday"):
+                weekday = int(params["weekday"])
+            if params.get("time"):
+                hours, mins = params["time"].split(":")
+                hours, mins = int(hours), int(mins)
+                if not (0 <= hours < 24 and 0 <= mins < 60):
+                    raise ValueError(params["time"])
+                minutes = hours * 60 + mins
+        except ValueError:
+            return Response(
+                {"message": "weekday must be a number and time HH:MM between 00:00 and 23:59"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not 0 <= weekday <= 6:
+            return Response(
+                {"message": "weekday must be 0-6"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not ParkirnaMesta.objects.filter(id=pk).exists():
+            return Response(
+                {"message": "Parking spot not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # answered from the precomputed histogram, a spot without observations
+        # yet gets null probabilities
+        result = forecast.forecast(pk, weekday, minutes)
+
+        return Response({"id": pk, **result}, status=status.HTTP_200_OK)
+
+
+class ParkirnaMestaClustersAPI(APIView):
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("zoom", int, location=OpenApiParameter.QUERY, description="Map zoom level (0-22)"),
+            OpenApiParameter("min_latitude", float, location=OpenApiParameter.QUERY, description="South edge"),
+            OpenApiParameter("min_longitude", float, location=OpenApiParameter.QUERY, description="West edge"),
+            OpenApiParameter("max_latitude", float, location=OpenApiParameter.QUERY, description="North edge"),
+            OpenApiParameter("max_longitude", float, location=OpenApiParameter.QUERY, description="East edge"),
+        ]
+    )
+    def get(self, request):
+        print("===== PARKIRNA MESTA CLUSTERS =====")
+
+        params = request.query_params
+        print(f"[DEBUG] params={params}")
+
+        try:
+            zoom = int(params["zoom"])
+            min_lat = float(params["min_latitude"])
+            min_lon = float(params["min_longitude"])
+            max_lat = float(params["max_latitude"])
+            max_lon = float(params["max_longitude"])
+        except (KeyError, ValueError):
+            return Response(
+                {"message": "zoom, min_latitude, min_longitude, max_latitude and max_longitude are required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not 0 <= zoom <= 22:
+            return Response(
+                {"message": "zoom must be between 0 and 22"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if min_lat > max_lat or min_lon > max_lon:
+            return Response(
+                {"message": "min values must not be greater than max values"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        result = clusters_in_bbox(zoom, min_lat, min_lon, max_lat, max_lon)
+
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class ParkirnaMestaSyncAPI(APIView):
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("since", int, location=OpenApiParameter.QUERY,
+                             description="Last seq the client has applied, 0 for a full sync"),
+            OpenApiParameter("limit", int, location=OpenApiParameter.QUERY, required=False,
+                             description=f"Maximum number of changes (at most {changelog.SYNC_MAX_LIMIT})"),
+        ]
+    )
+    def get(self, request):
+        print("===== PARKIRNA MESTA SYNC =====")
+
+        params = request.query_params
+        print(f"[DEBUG] params={params}")
+
+        try:
+            since = int(params["since"])
+            limit = int(params.get("limit", changelog.SYNC_DEFAULT_LIMIT))
+        except (KeyError, ValueError):
+            return Response(
+                {"message": "since is required and must be a number"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if since < 0:
+            return Response(
+                {"message": "since must not be negative"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        limit = max(1, min(limit, changelog.SYNC_MAX_LIMIT))
+
+        return Response(changelog.changes_since(since, limit), status=status.HTTP_200_OK)
+
+
+class ParkirnaMestaLiveAPI(AsyncAPIView):
+    renderer_classes = [live.EventStreamRenderer, JSONRenderer]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("min_latitude", float, location=OpenApiParameter.QUERY, required=False,
+                             description="South edge of the area"),
+            OpenApiParameter("min_longitude", float, location=OpenApiParameter.QUERY, required=False,
+                             description="West edge of the area"),
+            OpenApiParameter("max_latitude", float, location=OpenApiParameter.QUERY, required=False,
+                             description="North edge of the area"),
+            OpenApiParameter("max_longitude", float, location=OpenApiParameter.QUERY, required=False,
+                             description="East edge of the area"),
+            OpenApiParameter("latitude", float, location=OpenApiParameter.QUERY, required=False,
+                             description="Center of a circular area"),
+            OpenApiParameter("longitude", float, location=OpenApiParameter.QUERY, required=False,
+                             description="Center of a circular area"),
+            OpenApiParameter("radius", float, location=OpenApiParameter.QUERY, required=False,
+                             description="Radius of a circular area in meters"),
+            OpenApiParameter("since", int, location=OpenApiParameter.QUERY, required=False,
+                             description="Replay changes after this seq first, Last-Event-ID works too"),
+        ]
+    )
+    async def get(self, request):
+        print("===== PARKIRNA MESTA LIVE =====")
+
+        params = request.query_params
+        print(f"[DEBUG] params={params}")
+
+        try:
+            if "min_latitude" in params:
+                area = live.BBoxArea(
+                    float(params["min_latitude"]),
+                    float(params["min_longitude"]),
+                    float(params["max_latitude"]),
+                    float(params["max_longitude"])
+                )
+            elif "latitude" in params:
+                area = live.CircleArea(
+                    float(params["latitude"]),
+                    float(params["longitude"]),
+                    float(params["radius"])
+                )
+            else:
+                area = None
+
+            since = params.get("since") or request.headers.get("Last-Event-ID")
+            since = int(since) if since else None
+        except (KeyError, ValueError):
+            return Response(
+                {"message": "area needs all four bbox edges or latitude, longitude and radius; since must be a number"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        response = StreamingHttpResponse(live.stream(area, since), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+class SlovenskeUliceGetSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False)
+
+
+class SlovenskeUlicePostSerializer(serializers.Serializer):
+    ime = serializers.CharField()
+
+
+class SlovenskeUlicePutSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    ime = serializers.CharField()
+
+
+class SlovenskeUliceDeleteSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+
+
+class SlovenskeUliceAPI(APIView):
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("id", int, location=OpenApiParameter.QUERY, description="Optional street ID"),
+            OpenApiParameter("page_size", int, location=OpenApiParameter.QUERY, required=False,
+                             description="Return a page of this size instead of the full list"),
+            OpenApiParameter("cursor", str, location=OpenApiParameter.QUERY, required=False,
+                             description="next_cursor from the previous page")
+        ]
+    )
+    @versions.conditional_get(versions.SLOVENSKE_ULICE)
+    def get(self, request, pk=None):
+        print("===== SLOVENSKE ULICE GET =====")
+
+        # body is only parsed for legacy clients that send the id there
+        try:
+            street_id = resource_id(pk, request.query_params.get("id"), lambda: body_id(request))
+        except (TypeError, ValueError):
+            return invalid_id()
+        print(f"[DEBUG] id={street_id}")
+
+        if street_id is not None:
+            street = reference_cache.get_or_load(
+                versions.SLOVENSKE_ULICE,
+                f"detail:{street_id}",
+                lambda: SlovenskeUlice.objects.filter(id=street_id).values("id", "name").first()
+            )
+
+            if street is None:
+                return Response(
+                    {"message": "Street not found"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+
+            return Response(
+                {
+                    "id": street["id"],
+                    "ime": street["name"]
+                },
+                status=status.HTTP_200_OK
+            )
+
+        if is_paginated(request):
+            try:
+                page = reference_cache.get_or_load(
+                    versions.SLOVENSKE_ULICE,
+                    f"page:{request.query_params.get('cursor')}:{request.query_params.get('page_size')}",
+                    lambda: keyset_page(
+                        SlovenskeUlice.objects.all(),
+                        request,
+                        lambda s: {"id": s.id, "ime": s.name}
+                    )
+                )
+            except PaginationError as e:
+                return Response(
+                    {"message": str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            return Response(page, status=status.HTTP_200_OK)
+
+        result = reference_cache.get_or_load(
+            versions.SLOVENSKE_ULICE,
+            "list",
+            lambda: [{"id": s.id, "ime": s.name} for s in SlovenskeUlice.objects.all()]
+        )
+
+        return Response(result, status=status.HTTP_200_OK)
+
+    @extend_schema(request=SlovenskeUlicePostSerializer)
+    def post(self, request, pk=None):
         print("===== SLOVENSKE ULICE POST =====")
 
+        if pk is not None:
+            return post_on_detail()
+
         ime = request.data.get("ime")
         print(f"[DEBUG] ime={ime}")
 
@@ -846,7 +1689,10 @@ class SlovenskeUliceAPI(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        street = SlovenskeUlice.objects.create(name=ime)
+        with transaction.atomic():
+            street = SlovenskeUlice.objects.create(name=ime)
+            reference_cache.invalidate(versions.SLOVENSKE_ULICE)
+            versions.bump(versions.SLOVENSKE_ULICE)
 
         return Response(
             {
@@ -857,13 +1703,16 @@ class SlovenskeUliceAPI(APIView):
         )
 
     @extend_schema(request=SlovenskeUlicePutSerializer)
-    def put(self, request):
+    def put(self, request, pk=None):
         print("===== SLOVENSKE ULICE PUT =====")
 
-        street_id = request.data.get("id")
+        try:
+            street_id = resource_id(pk, request.data.get("id"))
+        except (TypeError, ValueError):
+            return invalid_id()
         ime = request.data.get("ime")
 
-        if not street_id or not ime:
+        if street_id is None or not ime:
             return Response(
                 {"message": "id and ime are required"},
                 status=status.HTTP_400_BAD_REQUEST
@@ -878,7 +1727,11 @@ class SlovenskeUliceAPI(APIView):
             )
 
         street.name = ime
-        street.save()
+
+        with transaction.atomic():
+            street.save()
+            reference_cache.invalidate(versions.SLOVENSKE_ULICE, f"detail:{street_id}")
+            versions.bump(versions.SLOVENSKE_ULICE)
 
         return Response(
             {"message": "Street updated"},
@@ -888,12 +1741,15 @@ class SlovenskeUliceAPI(APIView):
     @extend_schema(
         parameters=[OpenApiParameter("id", int, location=OpenApiParameter.QUERY, description="Street ID to delete")]
     )
-    def delete(self, request):
+    def delete(self, request, pk=None):
         print("===== SLOVENSKE ULICE DELETE =====")
 
-        street_id = request.data.get("id")
+        try:
+            street_id = resource_id(pk, request.query_params.get("id"), lambda: body_id(request))
+        except (TypeError, ValueError):
+            return invalid_id()
 
-        if not street_id:
+        if street_id is None:
             return Response(
                 {"message": "id is required"},
                 status=status.HTTP_400_BAD_REQUEST
@@ -907,9 +1763,478 @@ class SlovenskeUliceAPI(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        street.delete()
+        with transaction.atomic():
+            street.delete()
+            reference_cache.invalidate(versions.SLOVENSKE_ULICE, f"detail:{street_id}")
+            versions.bump(versions.SLOVENSKE_ULICE)
 
         return Response(
             {"message": "Street deleted"},
             status=status.HTTP_200_OK
-        )
\ No newline at end of file
+        )
+
+
+class SlovenskeUliceAutocompleteAPI(APIView):
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("q", str, location=OpenApiParameter.QUERY,
+                             description="Beginning of the street name, diacritics are optional"),
+            OpenApiParameter("limit", int, location=OpenApiParameter.QUERY, required=False,
+                             description=f"Maximum number of streets (at most {AUTOCOMPLETE_MAX_LIMIT})"),
+        ]
+    )
+    def get(self, request):
+        print("===== SLOVENSKE ULICE AUTOCOMPLETE =====")
+
+        query = request.query_params.get("q", "")
+        print(f"[DEBUG] q={query}")
+
+        try:
+            limit = int(request.query_params.get("limit", AUTOCOMPLETE_DEFAULT_LIMIT))
+        except ValueError:
+            return Response(
+                {"message": "limit must be a number"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not query.strip():
+            return Response(
+                {"message": "q is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        limit = max(1, min(limit, AUTOCOMPLETE_MAX_LIMIT))
+
+        result = reference_cache.get_or_load(
+            versions.SLOVENSKE_ULICE,
+            f"autocomplete:{limit}:{query.strip().casefold()}",
+            lambda: autocomplete_streets(query, limit)
+        )
+
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class ImportAPI(APIView):
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("file_format", str, location=OpenApiParameter.QUERY, required=False,
+                             enum=list(FORMATS),
+                             description="Input format, otherwise guessed from the file name or Content-Type")
+        ],
+        request={
+            "multipart/form-data": {"type": "object", "properties": {"file": {"type": "string", "format": "binary"}}},
+            "text/csv": {"type": "string"},
+            "application/x-ndjson": {"type": "string"},
+            "application/geo+json": {"type": "object"},
+        }
+    )
+    def post(self, request, resource):
+        print(f"===== IMPORT {resource.upper()} START =====")
+
+        content_type = request.content_type or ""
+
+        # the body is read as a stream, it is never parsed into request.data
+        if content_type.startswith("multipart/form-data"):
+            upload = request.FILES.get("file")
+            if upload is None:
+                return Response(
+                    {"message": "file is required"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            stream = upload
+            name = upload.name
+        else:
+            stream = request.stream
+            name = ""
+
+        fmt = request.query_params.get("file_format") or guess_format(name, content_type)
+        print(f"[DEBUG] format={fmt}")
+
+        if fmt not in FORMATS or stream is None:
+            return Response(
+                {"message": f"file_format must be one of {', '.join(FORMATS)} and a body is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            report = import_records(resource, iter_records(stream, fmt))
+        except ImportFormatError as e:
+            return Response(
+                {"message": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        print(f"[SUCCESS] created={report['created']} failed={report['failed']}")
+        print(f"===== IMPORT {resource.upper()} END =====")
+
+        return Response(
+            {
+                "message": "Import finished",
+                **report
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class ExportAPI(APIView):
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("file_format", str, location=OpenApiParameter.QUERY, required=False,
+                             enum=list(exporters.FORMATS), description="Output format, ndjson by default")
+        ]
+    )
+    def get(self, request, resource):
+        print(f"===== EXPORT {resource.upper()} =====")
+
+        fmt = request.query_params.get("file_format", "ndjson")
+
+        if resource not in exporters.RESOURCES:
+            return Response(
+                {"message": f"Unknown resource: {resource}"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        if fmt not in exporters.FORMATS:
+            return Response(
+                {"message": f"file_format must be one of {', '.join(exporters.FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # ASGI needs an async iterator to send chunks as they are produced
+        if isinstance(request._request, ASGIRequest):
+            chunks = exporters.astream(resource, fmt)
+        else:
+            chunks = exporters.stream(resource, fmt)
+
+        response = StreamingHttpResponse(chunks, content_type=exporters.CONTENT_TYPES[fmt])
+        response["Content-Disposition"] = f'attachment; filename="{resource}.{fmt}"'
+        return response
+
+
+class BatchSerializer(serializers.Serializer):
+    create = serializers.ListField(child=serializers.DictField(), required=False)
+    update = serializers.ListField(child=serializers.DictField(), required=False)
+    delete = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+
+class BatchAPI(APIView):
+
+    @extend_schema(request=BatchSerializer)
+    def post(self, request, resource):
+        print(f"===== BATCH {resource.upper()} START =====")
+
+        try:
+            results = run_batch(resource, request.data)
+        except BatchError as e:
+            return Response(
+                {"message": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        print(f"[SUCCESS] create={len(results['create'])} update={len(results['update'])} "
+              f"delete={len(results['delete'])}")
+        print(f"===== BATCH {resource.upper()} END =====")
+
+        return Response(
+            {
+                "message": "Batch processed",
+                **results
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class UserDataSerializer(serializers.Serializer):
+    events = serializers.ListField(child=serializers.DictField())
+
+
+class UserDataAPI(APIView):
+    authentication_classes = [SignedTokenAuthentication]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("from", str, location=OpenApiParameter.QUERY, required=False,
+                             description="Only events at or after this ISO 8601 time"),
+            OpenApiParameter("to", str, location=OpenApiParameter.QUERY, required=False,
+                             description="Only events before this ISO 8601 time"),
+            OpenApiParameter("order", str, location=OpenApiParameter.QUERY, required=False,
+                             description="desc (newest first, default) or asc"),
+            OpenApiParameter("user_id", int, location=OpenApiParameter.QUERY, required=False,
+                             description="Another user's history, admins only"),
+            OpenApiParameter("page_size", int, location=OpenApiParameter.QUERY, required=False),
+            OpenApiParameter("cursor", str, location=OpenApiParameter.QUERY, required=False,
+                             description="next_cursor from the previous page"),
+        ]
+    )
+    def get(self, request):
+        print("===== USER DATA GET =====")
+
+        if not request.auth:
+            return Response(
+                {"message": "Bearer token is required"},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        params = request.query_params
+        print(f"[DEBUG] params={params}")
+
+        user_id = request.user.id
+        if params.get("user_id"):
+            try:
+                requested_id = int(params["user_id"])
+            except ValueError:
+                return Response(
+                    {"message": "user_id must be a number"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            if requested_id != user_id and not request.user.is_admin:
+                return Response(
+                    {"message": "You are not authorized to read this history"},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            user_id = requested_id
+
+        events = UserData.objects.filter(user_id=user_id)
+
+        for param, lookup in (("from", "ts_ins__gte"), ("to", "ts_ins__lt")):
+            if params.get(param):
+                value = ingest.parse_timestamp(params[param])
+                if value is None:
+                    return Response(
+                        {"message": f"{param} must be an ISO 8601 datetime"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                events = events.filter(**{lookup: value})
+
+        order = params.get("order", "desc")
+        if order not in ("asc", "desc"):
+            return Response(
+                {"message": "order must be asc or desc"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            page = time_keyset_page(
+                events,
+                request,
+                lambda e: {"id": e.id, "ts_ins": e.ts_ins, "description": e.description},
+                "ts_ins",
+                descending=order == "desc"
+            )
+        except PaginationError as e:
+            return Response(
+                {"message": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(page, status=status.HTTP_200_OK)
+
+    @extend_schema(request=UserDataSerializer)
+    def post(self, request):
+        print("===== USER DATA POST START =====")
+
+        if not request.auth:
+            return Response(
+                {"message": "Bearer token is required"},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        records = request.data.get("events") if isinstance(request.data, dict) else request.data
+        if not isinstance(records, list) or not records:
+            return Response(
+                {"message": "events must be a non-empty list"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(records) > ingest.INGEST_MAX_EVENTS:
+            return Response(
+                {"message": f"At most {ingest.INGEST_MAX_EVENTS} events per request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        events = []
+        errors = []
+        for index, record in enumerate(records):
+            try:
+                events.append(ingest.build_event(request.user.id, record))
+            except ingest.EventError as e:
+                errors.append({"index": index, "message": str(e)})
+
+        if errors:
+            print(f"[ERROR] {len(errors)} invalid events")
+            return Response(
+                {
+                    "message": "Invalid events",
+                    "errors": errors
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # buffered in process and written in batches by a background thread
+        try:
+            ingest.submit(events)
+        except BufferFull:
+            print("[ERROR] User data buffer is full")
+            return Response(
+                {"message": "Server is busy, try again later"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"}
+            )
+
+        print(f"[SUCCESS] {len(events)} events accepted")
+        print("===== USER DATA POST END =====")
+
+        return Response(
+            {
+                "message": "Events accepted",
+                "accepted": len(events)
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+class GeofenceSerializer(serializers.Serializer):
+    name = serializers.CharField(required=False, allow_blank=True)
+    latitude = serializers.FloatField(required=False)
+    longitude = serializers.FloatField(required=False)
+    radius = serializers.FloatField(required=False)
+    points = serializers.ListField(child=serializers.ListField(child=serializers.FloatField()), required=False)
+
+
+def geofence_data(fence):
+    data = {
+        "id": fence.id,
+        "name": fence.name,
+        "kind": fence.kind
+    }
+    if fence.kind == Geofence.CIRCLE:
+        data.update(latitude=fence.latitude, longitude=fence.longitude, radius=fence.radius_m)
+    else:
+        data["points"] = fence.points
+    return data
+
+
+class GeofenceAPI(APIView):
+    authentication_classes = [SignedTokenAuthentication]
+
+    def get(self, request):
+        print("===== GEOFENCE GET =====")
+
+        if not request.auth:
+            return Response(
+                {"message": "Bearer token is required"},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        fences = Geofence.objects.filter(user_id=request.user.id).order_by("id")
+        return Response([geofence_data(f) for f in fences], status=status.HTTP_200_OK)
+
+    @extend_schema(request=GeofenceSerializer)
+    def post(self, request):
+        print("===== GEOFENCE POST START =====")
+
+        if not request.auth:
+            return Response(
+                {"message": "Bearer token is required"},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        print(f"[DEBUG] Post data: {request.data}")
+
+        try:
+            fence = geofences.build_geofence(request.user.id, request.data)
+        except geofences.GeofenceError as e:
+            return Response(
+                {"message": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            # the user row stays locked until commit, so concurrent creates of
+            # one user are counted in turn and the user cannot be deleted meanwhile
+            if not User.objects.select_for_update().filter(id=request.user.id).values_list("id", flat=True):
+                # the user was deleted after the token was issued
+                return Response(
+                    {"message": "Unauthorized"},
+                    status=status.HTTP_401_UNAUTHORIZED
+                )
+
+            if Geofence.objects.filter(user_id=request.user.id).count() >= geofences.GEOFENCE_MAX_PER_USER:
+                return Response(
+                    {"message": f"At most {geofences.GEOFENCE_MAX_PER_USER} geofences per user"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            fence.save()
+            versions.bump(versions.GEOFENCES)
+            transaction.on_commit(lambda: geofences.fence_saved(fence))
+
+        print(f"[SUCCESS] Geofence created: id={fence.id}")
+        print("===== GEOFENCE POST END =====")
+
+        return Response(geofence_data(fence), status=status.HTTP_201_CREATED)
+
+
+class GeofenceDetailAPI(APIView):
+    authentication_classes = [SignedTokenAuthentication]
+
+    def get(self, request, pk):
+        print(f"===== GEOFENCE GET {pk} =====")
+
+        if not request.auth:
+            return token_required()
+
+        fence = Geofence.objects.filter(id=pk, user_id=request.user.id).first()
+        if fence is None:
+            return Response(
+                {"message": "Geofence not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(geofence_data(fence), status=status.HTTP_200_OK)
+
+    def delete(self, request, pk):
+        print(f"===== GEOFENCE DELETE {pk} =====")
+
+        if not request.auth:
+            return token_required()
+
+        with transaction.atomic():
+            deleted, _ = Geofence.objects.filter(id=pk, user_id=request.user.id).delete()
+            if deleted:
+                versions.bump(versions.GEOFENCES)
+                transaction.on_commit(lambda: geofences.fence_deleted(pk))
+
+        if not deleted:
+            return Response(
+                {"message": "Geofence not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(
+            {"message": "Geofence deleted"},
+            status=status.HTTP_200_OK
+        )
+
+
+class GeofenceAlertsAPI(AsyncAPIView):
+    authentication_classes = [SignedTokenAuthentication]
+    renderer_classes = [live.EventStreamRenderer, JSONRenderer]
+
+    async def get(self, request):
+        print("===== GEOFENCE ALERTS =====")
+
+        if not request.auth:
+            return Response(
+                {"message": "Bearer token is required"},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        response = StreamingHttpResponse(live.stream_alerts(request.user.id), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
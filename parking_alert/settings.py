@@ -124,6 +124,82 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [],
 }
 
+# Login/Signup hash passwords on a bounded thread pool (api/hashing.py).
+# Requests beyond workers + queue are answered with 503 instead of piling up.
+PASSWORD_HASHING_WORKERS = 4
+PASSWORD_HASHING_MAX_QUEUE = 32
+
+# Lifetime in seconds of the signed access tokens issued by Login.
+ACCESS_TOKEN_MAX_AGE = 3600
+
+# DeleteUser/EditUser require a Bearer token. Enable only while old clients
+# still send requester_id/user_id instead; those ids are not verified.
+LEGACY_USER_ID_AUTH = False
+
+# UserData events posted to /api/user-data/ are buffered in process and
+# written with bulk_create every BATCH_SIZE events or MAX_WAIT seconds.
+# Producers wait up to BLOCK_TIMEOUT seconds when CAPACITY events are pending.
+USERDATA_INGEST_BATCH_SIZE = 1000
+USERDATA_INGEST_MAX_WAIT = 1.0
+USERDATA_INGEST_CAPACITY = 50000
+USERDATA_INGEST_BLOCK_TIMEOUT = 0.5
+
+# Raw UserData events older than this many days are rolled up into daily
+# summaries by `manage.py apply_retention` (run it daily from cron).
+USERDATA_RETENTION_DAYS = 90
+
+# Occupancy reports are coalesced per spot and the latest states written every
+# OCCUPANCY_FLUSH_INTERVAL seconds. A report equal to the stored state is
+# written only when its reported_at is OCCUPANCY_REFRESH_SECONDS newer, and a
+# report older than the stored one is never written.
+OCCUPANCY_FLUSH_INTERVAL = 1.0
+OCCUPANCY_REFRESH_SECONDS = 300
+OCCUPANCY_MAX_PENDING = 100000
+
+# Weekdays and time slots of occupancy forecasts are in this time zone.
+# Forecasts weight states by the time they lasted, a state is assumed to hold
+# for at most FORECAST_MAX_GAP_SECONDS after it was reported.
+FORECAST_TIME_ZONE = 'Europe/Ljubljana'
+FORECAST_MAX_GAP_SECONDS = 3600
+
+# Backend of the live push hub (/api/parkirna-mesta/live/). LocalBackend only
+# reaches clients connected to the same process; with several workers or
+# nodes use api.pubsub.RedisBackend and set PUBSUB_REDIS_URL.
+PUBSUB_BACKEND = 'api.pubsub.LocalBackend'
+
+# Reference data (cities, streets, parking spots) is versioned per table.
+# Versions are cached for a few seconds so 304 answers skip the database.
+TABLE_VERSION_CACHE_TIMEOUT = 5
+REFERENCE_DATA_MAX_AGE = 0
+
+# Cities and streets are served from a read-through cache. LocMemCache evicts
+# least recently used entries once MAX_ENTRIES is reached; point "reference"
+# at a shared backend (Redis, Memcached) to share it between workers.
+#
+# Revoked access tokens are kept in "token-denylist" until they expire. It has
+# to be shared by all workers, so it lives in the database (create the table
+# with `python manage.py createcachetable`); Redis or Memcached work as well.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'reference': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'reference-data',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+            'CULL_FREQUENCY': 10,
+        },
+    },
+    'token-denylist': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'api_token_denylist',
+    },
+}
+REFERENCE_CACHE_ALIAS = 'reference'
+TOKEN_DENYLIST_CACHE = 'token-denylist'
+
 
 
 # Internationalization
@@ -17,18 +17,45 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
-from api.views import Test, Signup, Login, DeleteUser, EditUser, SlovenskaMestaAPI, ParkirnaMestaAPI, SlovenskeUliceAPI
+from api.views import Test, Signup, Login, Logout, DeleteUser, EditUser, SlovenskaMestaAPI, ParkirnaMestaAPI, SlovenskeUliceAPI, \
+    ParkirnaMestaNearbyAPI, ParkirnaMestaBBoxAPI, ParkirnaMestaClustersAPI, SlovenskeUliceAutocompleteAPI, \
+    ImportAPI, ExportAPI, ParkirnaMestaSyncAPI, BatchAPI, UserPurgeAPI, UserDataAPI, \
+    ParkirnaMestaLiveAPI, GeofenceAPI, GeofenceDetailAPI, GeofenceAlertsAPI, ParkirnaMestaOccupancyAPI, \
+    ParkirnaMestaForecastAPI, ParkirnaMestaNearestBatchAPI
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/test/', Test.as_view(), name='test'),
     path('api/signup/', Signup.as_view(), name='signup'),
     path('api/login/', Login.as_view(), name='login'),
+    path('api/logout/', Logout.as_view(), name='logout'),
     path('api/delete-user/', DeleteUser.as_view(), name='delete-user'),
+    path('api/user-purges/<int:pk>/', UserPurgeAPI.as_view(), name='user-purge'),
     path('api/edit-user/', EditUser.as_view(), name='edit-user'),
+    path('api/user-data/', UserDataAPI.as_view(), name='user-data'),
+    path('api/geofences/', GeofenceAPI.as_view(), name='geofences'),
+    path('api/geofences/<int:pk>/', GeofenceDetailAPI.as_view(), name='geofence-detail'),
+    path('api/geofences/alerts/', GeofenceAlertsAPI.as_view(), name='geofence-alerts'),
     path('api/slovenska-mesta/', SlovenskaMestaAPI.as_view(), name='slovenska-mesta'),
+    path('api/slovenska-mesta/<int:pk>/', SlovenskaMestaAPI.as_view(), name='slovenska-mesta-detail'),
+    path('api/slovenska-mesta/batch/', BatchAPI.as_view(), {'resource': 'slovenska-mesta'}, name='slovenska-mesta-batch'),
     path('api/parkirna-mesta/', ParkirnaMestaAPI.as_view(), name='parkirna-mesta'),
+    path('api/parkirna-mesta/<int:pk>/', ParkirnaMestaAPI.as_view(), name='parkirna-mesta-detail'),
+    path('api/parkirna-mesta/<int:pk>/forecast/', ParkirnaMestaForecastAPI.as_view(), name='parkirna-mesta-forecast'),
+    path('api/parkirna-mesta/batch/', BatchAPI.as_view(), {'resource': 'parkirna-mesta'}, name='parkirna-mesta-batch'),
+    path('api/parkirna-mesta/nearby/', ParkirnaMestaNearbyAPI.as_view(), name='parkirna-mesta-nearby'),
+    path('api/parkirna-mesta/nearest/', ParkirnaMestaNearestBatchAPI.as_view(), name='parkirna-mesta-nearest'),
+    path('api/parkirna-mesta/bbox/', ParkirnaMestaBBoxAPI.as_view(), name='parkirna-mesta-bbox'),
+    path('api/parkirna-mesta/clusters/', ParkirnaMestaClustersAPI.as_view(), name='parkirna-mesta-clusters'),
+    path('api/parkirna-mesta/occupancy/', ParkirnaMestaOccupancyAPI.as_view(), name='parkirna-mesta-occupancy'),
+    path('api/parkirna-mesta/live/', ParkirnaMestaLiveAPI.as_view(), name='parkirna-mesta-live'),
+    path('api/parkirna-mesta/sync/', ParkirnaMestaSyncAPI.as_view(), name='parkirna-mesta-sync'),
     path('api/slovenske-ulice/', SlovenskeUliceAPI.as_view(), name='slovenske-ulice'),
+    path('api/slovenske-ulice/<int:pk>/', SlovenskeUliceAPI.as_view(), name='slovenske-ulice-detail'),
+    path('api/slovenske-ulice/batch/', BatchAPI.as_view(), {'resource': 'slovenske-ulice'}, name='slovenske-ulice-batch'),
+    path('api/slovenske-ulice/autocomplete/', SlovenskeUliceAutocompleteAPI.as_view(), name='slovenske-ulice-autocomplete'),
+    path('api/import/<str:resource>/', ImportAPI.as_view(), name='import'),
+    path('api/export/<str:resource>/', ExportAPI.as_view(), name='export'),
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
 ]